@@ -1,33 +1,314 @@
-from fastapi import APIRouter, HTTPException
-from models.schemas import AnalysisResponse
-from scoring.engine import analyze_ticker
-from sources.yfinance_client import cache as yf_cache
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from models.schemas import AnalysisResponse, BatchAnalysisItem, BatchAnalysisResponse, CrossSectionResponse, ScreenResponse
+from scoring.cross_section import analyze_cross_section, return_matrix
+from scoring.engine import analyze_ticker, analyze_batch
+from scoring.factors import SIGNAL_LABELS
+from scoring.screener import screen_index
+from services.cache import cache_stats, flight_stats
+from services.headline_sentiment import headline_cache_stats
+from services.live import LiveHub
+from services.prefetch import popularity, scheduler as prefetch_scheduler
+from services.startup import startup_stats
+from services.response_cache import PRICE_FORMATS, render, data_version, get_rendered, store_rendered, response_cache_stats
+from services.upstream import upstream_stats, OPEN
+from sources.datasource import source_stats
+from utils.logging_utils import get_request_id
+from utils.metrics import registry
+from utils.config import (
+    BATCH_MAX_TICKERS, LIVE_MAX_TICKERS, LIVE_HEARTBEAT_INTERVAL, SCREEN_DEFAULT_LIMIT,
+    CROSS_SECTION_DAYS, CROSS_SECTION_BENCHMARK, CROSS_SECTION_BETA_WINDOW, CROSS_SECTION_MAX_TICKERS
+)
+from typing import Optional, Union
+import asyncio
 import logging
 
 router = APIRouter()
 logger = logging.getLogger("TradePulse.API")
+live_hub = LiveHub(analyze_ticker)
+
+def _is_valid_ticker(ticker: str) -> bool:
+    return bool(ticker) and len(ticker) <= 6 and ticker.isalpha()
+
+def _price_format(request: dict) -> str:
+    price_format = request.get("price_format", "rows")
+    if price_format not in PRICE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"price_format must be one of {', '.join(PRICE_FORMATS)}")
+    return price_format
+
+def _include_fundamentals(request: dict) -> bool:
+    include = request.get("include_fundamentals", True)
+    if not isinstance(include, bool):
+        raise HTTPException(status_code=400, detail="include_fundamentals must be true or false")
+    return include
 
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_stock(request: dict):
+    """
+    Analyzes one ticker: {"ticker": "AAPL", "price_format": "rows", "include_fundamentals": true}.
+    "price_format": "columnar" returns the price history as parallel
+    dates/prices arrays; "include_fundamentals": false skips the fundamentals
+    lookup (fundamentals is null). Complete responses are rendered once and
+    served from the response cache until the data they were built from is
+    refreshed or stops being fresh.
+    """
     # Retrieve ticker from body safely
     ticker = request.get("ticker", "").upper()
-    if not ticker or len(ticker) > 6 or not ticker.isalpha():
+    if not _is_valid_ticker(ticker):
         raise HTTPException(status_code=400, detail="Invalid Ticker Format")
+    price_format = _price_format(request)
+    include_fundamentals = _include_fundamentals(request)
 
     logger.info(f"Received analysis request for {ticker}")
+    popularity.record(ticker)
+    version = data_version(ticker)
+    cached = get_rendered(ticker, price_format, get_request_id(), include_fundamentals)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     try:
-        return await analyze_ticker(ticker)
+        result = await analyze_ticker(ticker, price_format, include_fundamentals)
     except ValueError as e:
         logger.warning(f"Validation Error: {e}")
         raise HTTPException(status_code=404, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning(f"Price data timed out for {ticker}")
+        raise HTTPException(status_code=504, detail="Upstream price data timed out")
     except Exception as e:
         logger.error(f"Internal Error: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+    # Already a validated model: encode it directly instead of round-tripping
+    # through response_model
+    body = render(result)
+    store_rendered(ticker, price_format, result, body, include_fundamentals, version)
+    return Response(content=body, media_type="application/json")
+
+def _batch_item(ticker: str, outcome: Union[AnalysisResponse, Exception]) -> BatchAnalysisItem:
+    if isinstance(outcome, AnalysisResponse):
+        return BatchAnalysisItem(ticker=ticker, status="ok", result=outcome)
+    if isinstance(outcome, ValueError):
+        error = str(outcome)
+    elif isinstance(outcome, asyncio.TimeoutError):
+        error = "Upstream price data timed out"
+    else:
+        logger.error(f"Internal Error for {ticker}: {outcome!r}")
+        error = "Internal Server Error"
+    return BatchAnalysisItem(ticker=ticker, status="error", error=error)
+
+@router.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_watchlist(request: dict):
+    """
+    Analyzes a list of tickers: {"tickers": [...], "stream": false, "price_format": "rows",
+    "include_fundamentals": true}.
+    With "stream": true the results are sent as NDJSON, one line per ticker
+    in completion order.
+    """
+    raw = request.get("tickers")
+    if not isinstance(raw, list) or not raw:
+        raise HTTPException(status_code=400, detail="tickers must be a non-empty list")
+
+    # Normalize + dedupe, keeping the caller's order
+    tickers = list(dict.fromkeys(str(t).upper() for t in raw))
+    if len(tickers) > BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_TICKERS} tickers per batch")
+
+    price_format = _price_format(request)
+    include_fundamentals = _include_fundamentals(request)
+
+    invalid = [t for t in tickers if not _is_valid_ticker(t)]
+    valid = [t for t in tickers if _is_valid_ticker(t)]
+    logger.info(f"Received batch analysis request for {len(valid)} tickers ({len(invalid)} invalid)")
+    for ticker in valid:
+        popularity.record(ticker)
+
+    async def items():
+        for ticker in invalid:
+            yield BatchAnalysisItem(ticker=ticker, status="error", error="Invalid Ticker Format")
+        if valid:
+            async for ticker, outcome in analyze_batch(valid, price_format, include_fundamentals):
+                yield _batch_item(ticker, outcome)
+
+    if request.get("stream"):
+        async def ndjson():
+            async for item in items():
+                yield render(item) + b"\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    results = {item.ticker: item async for item in items()}
+    return Response(content=render(BatchAnalysisResponse(results=[results[t] for t in tickers])), media_type="application/json")
+
+@router.get("/stream")
+async def stream_scores(request: Request, tickers: str):
+    """
+    Server-sent events with live analysis for ?tickers=AAPL,MSFT.
+    Each ticker first sends a "snapshot" event with the full analysis, then
+    "delta" events holding only the fields that changed. A client that reads
+    slowly gets the merged latest delta, not every intermediate one.
+    """
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+    if not symbols or not all(_is_valid_ticker(t) for t in symbols):
+        raise HTTPException(status_code=400, detail="Invalid Ticker Format")
+    if len(symbols) > LIVE_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {LIVE_MAX_TICKERS} tickers per stream")
+
+    logger.info(f"Live stream opened for {len(symbols)} tickers")
+    for ticker in symbols:
+        popularity.record(ticker)
+    subscriber = live_hub.subscribe(symbols)
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                messages = await subscriber.next(timeout=LIVE_HEARTBEAT_INTERVAL)
+                if not messages:
+                    yield b": keep-alive\n\n"
+                for message in messages:
+                    yield b"event: " + message["type"].encode() + b"\ndata: " + render(message) + b"\n\n"
+        finally:
+            live_hub.unsubscribe(subscriber)
+            logger.info(f"Live stream closed for {len(symbols)} tickers")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/screen", response_model=ScreenResponse)
+def screen_universe(
+    sector: Optional[str] = None,
+    signal: Optional[str] = None,
+    rsi_min: Optional[float] = None,
+    rsi_max: Optional[float] = None,
+    adx_min: Optional[float] = None,
+    adx_max: Optional[float] = None,
+    limit: int = SCREEN_DEFAULT_LIMIT,
+):
+    """
+    Top `limit` tickers of the screener universe by final_score.
+    sector and signal take comma-separated values, e.g. ?signal=BUY,STRONG BUY.
+    Served from the precomputed index; never triggers upstream fetches.
+    """
+    sectors = [s.strip() for s in sector.split(",") if s.strip()] if sector else []
+    signals = [s.strip().upper() for s in signal.split(",") if s.strip()] if signal else []
+    unknown = [s for s in signals if s not in SIGNAL_LABELS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown signal(s): {', '.join(unknown)}")
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+
+    result = screen_index.query(sectors, signals, rsi_min, rsi_max, adx_min, adx_max, limit)
+    return Response(content=render(result), media_type="application/json")
+
+def _int_field(request: dict, name: str, default: int, low: int, high: int) -> int:
+    value = request.get(name, default)
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise HTTPException(status_code=400, detail=f"{name} must be an integer between {low} and {high}")
+    return value
+
+@router.post("/cross-section", response_model=CrossSectionResponse)
+async def cross_section(request: dict):
+    """
+    Cross-sectional analytics: {"tickers": [...], "benchmark": "SPY", "window": 260,
+    "beta_window": 60, "beta_points": 20, "correlation": true}.
+    Returns the pairwise correlation of daily returns over the last `window`
+    weekdays, rolling beta against the benchmark (last `beta_points` values)
+    and sector-relative z-scores of final_score and RSI. Without "tickers" the
+    screener's indexed universe is used.
+    Only history already cached on this host is used, never an upstream fetch:
+    uncached tickers are listed under "missing" and counted as requested, so
+    the prefetcher picks them up once they are popular.
+    """
+    raw = request.get("tickers")
+    if raw is None:
+        tickers = sorted(screen_index.entries)
+        if not tickers:
+            raise HTTPException(status_code=400, detail="tickers must be given while the screener index is empty")
+    elif not isinstance(raw, list) or not raw:
+        raise HTTPException(status_code=400, detail="tickers must be a non-empty list")
+    else:
+        tickers = list(dict.fromkeys(str(t).upper() for t in raw))
+    if len(tickers) > CROSS_SECTION_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {CROSS_SECTION_MAX_TICKERS} tickers per request")
+    invalid = [t for t in tickers if not _is_valid_ticker(t)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid ticker(s): {', '.join(invalid)}")
+    benchmark = str(request.get("benchmark", CROSS_SECTION_BENCHMARK)).upper()
+    if not _is_valid_ticker(benchmark):
+        raise HTTPException(status_code=400, detail="Invalid benchmark ticker")
+    window = _int_field(request, "window", CROSS_SECTION_DAYS, 20, CROSS_SECTION_DAYS)
+    beta_window = _int_field(request, "beta_window", min(CROSS_SECTION_BETA_WINDOW, window), 20, window)
+    beta_points = _int_field(request, "beta_points", 20, 1, CROSS_SECTION_DAYS - beta_window + 1)
+    with_correlation = request.get("correlation", True)
+    if not isinstance(with_correlation, bool):
+        raise HTTPException(status_code=400, detail="correlation must be true or false")
+
+    logger.info(f"Received cross-section request for {len(tickers)} tickers against {benchmark}")
+    try:
+        result = await analyze_cross_section(tickers, benchmark, window, beta_window, beta_points, with_correlation)
+    except ValueError as e:
+        popularity.record(benchmark)
+        raise HTTPException(status_code=404, detail=str(e))
+    for ticker in result.missing:
+        popularity.record(ticker)
+    return Response(content=render(result), media_type="application/json")
+
+def _collect_metrics():
+    """Exports the stats other modules already keep, evaluated per scrape."""
+    caches = {f"market_{tier}": stats for tier, stats in cache_stats().items()}
+    caches["headline_sentiment"] = headline_cache_stats()
+    caches["response"] = response_cache_stats()
+    for field, kind, doc in (
+        ("hits", "counter", "Cache lookups that found a live entry."),
+        ("misses", "counter", "Cache lookups that found nothing (or an expired entry)."),
+        ("evictions", "counter", "Entries evicted to stay within the size bound."),
+    ):
+        yield f"tradepulse_cache_{field}_total", kind, doc, ("cache",), [((name,), stats.get(field)) for name, stats in caches.items()]
+    yield "tradepulse_cache_entries", "gauge", "Entries currently held.", ("cache",), [((name,), stats.get("size")) for name, stats in caches.items()]
+    yield "tradepulse_cache_bytes", "gauge", "Approximate bytes held by byte-bounded caches.", ("cache",), [((name,), stats.get("bytes")) for name, stats in caches.items()]
+
+    fetches = flight_stats()
+    yield "tradepulse_fetches_in_flight", "gauge", "Upstream fetches currently in flight (single-flight keys).", (), [((), fetches["inflight"])]
+    yield "tradepulse_fetches_coalesced_total", "counter", "Requests that joined an in-flight fetch.", (), [((), fetches["coalesced"])]
+    live = live_hub.stats()
+    yield "tradepulse_live_subscribers", "gauge", "Connected /stream clients.", (), [((), live["subscribers"])]
+    yield "tradepulse_live_tickers", "gauge", "Tickers with a running live refresh loop.", (), [((), live["tickers"])]
+
+    upstreams = upstream_stats()
+    yield "tradepulse_upstream_circuit_open", "gauge", "1 while the upstream's circuit breaker is open.", ("upstream",), [((name,), int(stats["state"] == OPEN)) for name, stats in upstreams.items()]
+    yield "tradepulse_upstream_rate_limit", "gauge", "Current adaptive request rate (requests/s).", ("upstream",), [((name,), stats["rate"]) for name, stats in upstreams.items()]
+    yield "tradepulse_upstream_rejected_total", "counter", "Calls failed fast by the limiter or circuit breaker.", ("upstream",), [((name,), stats["rejected"]) for name, stats in upstreams.items()]
+
+    startup = startup_stats()
+    yield "tradepulse_ready", "gauge", "1 once this worker has started up and warmed.", (), [((), int(startup["ready"]))]
+    yield "tradepulse_startup_phase_seconds", "gauge", "Duration of each startup phase.", ("phase", "process"), [((name, p["process"]), p["seconds"]) for name, p in startup["phases"].items()]
+
+registry.register_collector(_collect_metrics)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/ready")
+def readiness():
+    """
+    Readiness probe, separate from /health (liveness): 503 until this worker has
+    finished startup and warm-up, and again once it starts shutting down.
+    The body has the startup time breakdown.
+    """
+    stats = startup_stats()
+    return JSONResponse(stats, status_code=200 if stats["ready"] else 503)
+
 @router.get("/health")
 def health_check():
     return {
         "status": "online",
-        "cache_size": yf_cache.currsize
+        "cache": cache_stats(),
+        "fetches": flight_stats(),
+        "headline_sentiment_cache": headline_cache_stats(),
+        "response_cache": response_cache_stats(),
+        "live": live_hub.stats(),
+        "prefetch": prefetch_scheduler.stats(),
+        "screener": screen_index.stats(),
+        "cross_section": return_matrix.stats(),
+        "data_sources": source_stats(),
+        "upstreams": upstream_stats()
         # could add downstream checks here
     }
@@ -0,0 +1,214 @@
+import hashlib
+import sys
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# Offline stand-ins for the external services, used by the benchmarks.
+#
+# FakeNewsServer serves Yahoo-style quote pages and Google News RSS for any
+# ticker from a local HTTP server (with ETag/304 support and optional latency);
+# point TP_YAHOO_NEWS_URL / TP_GOOGLE_NEWS_RSS_URL at `yahoo_url` / `google_url`.
+# install_fake_yfinance() swaps yfinance's Ticker and download for synthetic,
+# deterministic per-ticker OHLCV and fundamentals.
+
+_SUBJECTS = ["Shares", "Analysts", "Investors", "The company", "Options traders", "Insiders"]
+_VERBS = ["surge after", "slump on", "hold steady despite", "rally ahead of", "fall following", "rebound on"]
+_OBJECTS = [
+    "strong quarterly earnings", "a disappointing revenue forecast", "new product launch",
+    "regulatory concerns", "record buyback plan", "weak guidance", "upgrade from major bank",
+    "supply chain disruption", "CEO departure", "surprise dividend increase",
+]
+
+def _seed(*parts) -> int:
+    return zlib.crc32(":".join(map(str, parts)).encode())
+
+def fake_headlines(ticker: str, count: int = 20) -> List[str]:
+    rng = np.random.default_rng(_seed("news", ticker))
+    return [
+        f"{ticker}: {_SUBJECTS[rng.integers(len(_SUBJECTS))]} {_VERBS[rng.integers(len(_VERBS))]} "
+        f"{_OBJECTS[rng.integers(len(_OBJECTS))]} ({i})"
+        for i in range(count)
+    ]
+
+def yahoo_page(ticker: str, count: int = 20) -> bytes:
+    items = "".join(
+        f'<li class="js-stream-content Pos(r)"><div><h3 class="Mb(5px)"><a href="/news/{i}">{escape(title)}</a></h3>'
+        f"<p>Summary text for the story goes here, long enough to look like a real teaser.</p></div></li>"
+        for i, title in enumerate(fake_headlines(ticker, count))
+    )
+    nav = "".join(f"<h3>Nav {i}</h3>" for i in range(10))
+    return (
+        f"<html><head><title>{ticker} news</title></head><body><nav>{nav}</nav>"
+        f'<ul class="My(0) Ov(h) P(0) Wow(bw)">{items}</ul><footer>{"x" * 20000}</footer></body></html>'
+    ).encode()
+
+def google_rss(ticker: str, count: int = 20) -> bytes:
+    items = "".join(
+        f"<item><title>{escape(title)}</title><link>https://example.com/{ticker}/{i}</link>"
+        f"<pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate><source url=\"https://example.com\">Example Wire</source></item>"
+        for i, title in enumerate(fake_headlines(ticker, count))
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{ticker}</title>{items}</channel></rss>'.encode()
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Hedged fetches cancel the losing request mid-response; that's expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class FakeNewsServer:
+    """
+    Local HTTP server for /yahoo/<TICKER> and /google/<TICKER>. `latency` is
+    added to every response (seconds); `yahoo_error_rate` makes that share of
+    Yahoo requests fail with a 503 so the fallback path is exercised.
+    """
+
+    def __init__(self, latency: float = 0.0, yahoo_error_rate: float = 0.0, items: int = 20):
+        self.latency = latency
+        self.yahoo_error_rate = yahoo_error_rate
+        self.items = items
+        self.requests = 0
+        self.not_modified = 0
+        self._bodies: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _body(self, kind: str, ticker: str) -> Tuple[bytes, str]:
+        with self._lock:
+            cached = self._bodies.get((kind, ticker))
+            if cached is None:
+                body = yahoo_page(ticker, self.items) if kind == "yahoo" else google_rss(ticker, self.items)
+                cached = self._bodies[(kind, ticker)] = (body, '"%s"' % hashlib.md5(body).hexdigest())
+            return cached
+
+    def start(self) -> "FakeNewsServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 2 or parts[0] not in ("yahoo", "google"):
+                    self.send_error(404)
+                    return
+                kind, ticker = parts[0], parts[1].upper()
+                with fake._lock:
+                    fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if kind == "yahoo" and fake.yahoo_error_rate and (_seed(ticker, time.time_ns()) % 1000) < fake.yahoo_error_rate * 1000:
+                    self.send_error(503)
+                    return
+                body, etag = fake._body(kind, ticker)
+                if self.headers.get("If-None-Match") == etag:
+                    with fake._lock:
+                        fake.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html" if kind == "yahoo" else "application/rss+xml")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(usegmt=True))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _QuietHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-news").start()
+        return self
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def yahoo_url(self) -> str:
+        return self.base_url + "/yahoo/{ticker}"
+
+    @property
+    def google_url(self) -> str:
+        return self.base_url + "/google/{ticker}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+def fake_history(ticker: str, bars: int = 252, end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Deterministic daily OHLCV (geometric random walk) ending at `end` (default today)."""
+    end = (end or pd.Timestamp.today()).normalize()
+    index = pd.bdate_range(end=end, periods=bars, name="Date", tz="America/New_York")
+    rng = np.random.default_rng(_seed("ohlcv", ticker))
+    close = 20 + 200 * rng.random() * np.exp(np.cumsum(rng.normal(0.0003, 0.018, bars)))
+    spread = close * rng.uniform(0.002, 0.02, bars)
+    return pd.DataFrame({
+        "Open": close + rng.normal(0, 0.3, bars) * spread,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 50_000_000, bars).astype(np.float64),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=index)
+
+def _window(ticker: str, period: Optional[str] = None, start=None, bars: int = 252) -> pd.DataFrame:
+    history = fake_history(ticker, max(bars, 3 * 252))
+    if start is not None:
+        return history[history.index >= pd.Timestamp(start).tz_localize(history.index.tz)]
+    return history.iloc[-bars:]
+
+def install_fake_yfinance(latency: float = 0.0, bars: int = 252):
+    """
+    Replaces yfinance.Ticker / yfinance.download process-wide. `latency` is
+    slept (seconds) per call, standing in for Yahoo's round trip.
+    """
+    import yfinance as yf
+
+    class FakeTicker:
+        def __init__(self, ticker: str):
+            self.ticker = ticker.upper()
+
+        def history(self, period: Optional[str] = None, start=None, **kwargs) -> pd.DataFrame:
+            time.sleep(latency)
+            return _window(self.ticker, period, start, bars)
+
+        @property
+        def info(self) -> Dict:
+            time.sleep(latency)
+            rng = np.random.default_rng(_seed("info", self.ticker))
+            return {
+                "marketCap": float(rng.integers(1, 3000)) * 1e9,
+                "trailingPE": float(rng.uniform(5, 60)),
+                "sector": ["Technology", "Healthcare", "Energy", "Financial Services"][rng.integers(4)],
+                "industry": "Synthetic",
+                "averageVolume": float(rng.integers(1_000_000, 50_000_000)),
+                "currentPrice": None,
+            }
+
+    def download(tickers, period: Optional[str] = None, start=None, group_by: str = "column", **kwargs) -> pd.DataFrame:
+        time.sleep(latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t.upper(): _window(t.upper(), period, start, bars).tz_localize(None) for t in tickers}
+        return pd.concat(frames, axis=1)
+
+    yf.Ticker = FakeTicker
+    yf.download = download
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Benchmark suite. Runs fully offline against the stand-ins in fakes.py.
+#
+#   python -m benchmarks.run                          # all suites -> stdout
+#   python -m benchmarks.run --suite micro,e2e --output bench.json
+#   python -m benchmarks.run --compare old.json new.json
+#   python -m benchmarks.run --suite e2e --replay recordings/   # recorded upstream data
+#
+# Every measurement is reported as n / mean / p50 / p95 / p99 / max in
+# milliseconds, with the git commit in the metadata, so two result files can be
+# compared with --compare.
+
+SUITES = ("micro", "scoring", "parsing", "e2e")
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "n": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+def measure(func: Callable[[], Any], repeat: int, warmup: int = 3) -> Dict[str, float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+def _configure_environment(workdir: str, args: argparse.Namespace):
+    # Must run before any app module is imported: utils.config reads these once
+    os.environ.setdefault("TP_CACHE_SQLITE_PATH", os.path.join(workdir, "cache.sqlite3"))
+    os.environ.setdefault("TP_OHLCV_STORE_DIR", os.path.join(workdir, "ohlcv"))
+    os.environ.setdefault("TP_PREFETCH_ENABLED", "0")
+    os.environ.setdefault("TP_SCREEN_ENABLED", "0")
+    # The fakes are local: don't let the outbound limiter shape the load test
+    os.environ.setdefault("TP_UPSTREAM_RATE", "100000")
+    os.environ.setdefault("TP_UPSTREAM_BURST", "100000")
+    os.environ.setdefault("TP_UPSTREAM_MAX_CONCURRENCY", "1000")
+    if args.no_response_cache:
+        os.environ["TP_RESPONSE_CACHE_TTL"] = "0"
+    if args.replay:
+        os.environ["TP_DATA_SOURCE_MODE"] = "replay"
+        os.environ["TP_DATA_RECORD_DIR"] = args.replay
+        os.environ["TP_REPLAY_LATENCY"] = str(args.yf_latency / 1000)
+        os.environ["TP_REPLAY_ERROR_RATE"] = str(args.replay_error_rate)
+
+# -- suites -------------------------------------------------------------------
+
+def bench_micro(args) -> Dict[str, Any]:
+    from indicators import technical
+    from benchmarks.fakes import fake_history
+
+    results = {}
+    for bars in args.lengths:
+        history = fake_history("MICRO", bars)
+        close, high, low, volume = (history[c] for c in ("Close", "High", "Low", "Volume"))
+        arrays = [history[c].to_numpy() for c in ("Close", "High", "Low", "Volume")]
+        cases = {
+            "calculate_rsi": lambda: technical.calculate_rsi(close),
+            "calculate_macd": lambda: technical.calculate_macd(close),
+            "calculate_atr": lambda: technical.calculate_atr(high, low, close),
+            "calculate_adx": lambda: technical.calculate_adx(high, low, close),
+            "get_volume_z_score": lambda: technical.get_volume_z_score(volume),
+            "compute_indicators": lambda: technical.compute_indicators(*arrays),
+        }
+        for name, func in cases.items():
+            results[f"{name}[{bars}]"] = measure(func, args.repeat)
+    return results
+
+def bench_scoring(args) -> Dict[str, Any]:
+    from benchmarks.fakes import fake_history
+    from models.schemas import SentimentAnalysis
+    from scoring.engine import build_analysis
+
+    history = fake_history("SCORE", 252)
+    fundamentals = {"market_cap": 1e12, "pe_ratio": 30.0, "sector": "Technology", "industry": "Synthetic",
+                    "volume_avg": 1e7}
+    sentiment = SentimentAnalysis(score_normalized=62.0, raw_vader=0.24, headline_count=5, top_headlines=[])
+    counter = iter(range(10 ** 9))
+
+    return {
+        # Same ticker every call: indicator state is cached, only the factor model + response run
+        "build_analysis[warm]": measure(lambda: build_analysis("SCORE", history, fundamentals, sentiment, [], "bench"), args.repeat),
+        # New ticker every call: indicator state is built from the full history
+        "build_analysis[cold]": measure(
+            lambda: build_analysis(f"C{next(counter)}", history, fundamentals, sentiment, [], "bench"), args.repeat
+        ),
+        "build_analysis[columnar]": measure(
+            lambda: build_analysis("SCORE", history, fundamentals, sentiment, [], "bench", "columnar"), args.repeat
+        ),
+    }
+
+def bench_parsing(args) -> Dict[str, Any]:
+    from benchmarks.fakes import yahoo_page, google_rss
+    from sources.news_scraper import parse_yahoo_html, parse_google_rss
+
+    page, rss = yahoo_page("PARSE", 50), google_rss("PARSE", 50)
+    return {
+        "parse_yahoo_html": measure(lambda: parse_yahoo_html(page), args.repeat),
+        "parse_google_rss": measure(lambda: parse_google_rss(rss), args.repeat),
+    }
+
+async def _load(base_url: str, tickers: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[int] = []
+    statuses: Dict[str, int] = {}
+    queue = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient):
+        for i in queue:
+            ticker = tickers[i % len(tickers)]
+            start = time.perf_counter_ns()
+            try:
+                response = await client.post(f"{base_url}/analyze", json={"ticker": ticker})
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter_ns() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return {**summarize(latencies), "throughput_rps": round(requests / elapsed, 2), "statuses": statuses}
+
+def bench_e2e(args) -> Dict[str, Any]:
+    """
+    POST /analyze against an in-process uvicorn server backed by the fakes,
+    or by recorded responses with --replay.
+    """
+    import threading
+    import uvicorn
+    from benchmarks.fakes import install_fake_yfinance
+
+    news = args.news_server
+    if args.replay:
+        from urllib.parse import unquote
+        tickers = sorted(unquote(name[:-len(".npz")]) for name in os.listdir(os.path.join(args.replay, "history")))[:args.tickers]
+    else:
+        install_fake_yfinance(latency=args.yf_latency / 1000)
+        tickers = [f"B{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(args.tickers)]
+
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        results = {}
+        # First touch of every ticker: upstream fetches, indicator build
+        results["analyze[cold]"] = asyncio.run(_load(base_url, tickers, len(tickers), args.concurrency))
+        results["analyze[warm]"] = asyncio.run(_load(base_url, tickers, args.requests, args.concurrency))
+        results["analyze[warm]"]["concurrency"] = args.concurrency
+        if news is not None:
+            results["fake_news_requests"] = {"total": news.requests, "not_modified": news.not_modified}
+        else:
+            from sources.datasource import source_stats
+            results["replay"] = source_stats()
+        return results
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+# -- driver -------------------------------------------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(old_path: str, new_path: str):
+    """Prints p50/p95 changes per benchmark between two result files."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'benchmark':45} {'p50 old':>10} {'p50 new':>10} {'change':>8} {'p95 old':>10} {'p95 new':>10} {'change':>8}")
+    for suite, results in new["results"].items():
+        for name, stats in results.items():
+            before = old.get("results", {}).get(suite, {}).get(name)
+            if not before or "p50_ms" not in stats or "p50_ms" not in before:
+                continue
+            row = [f"{suite}/{name}"[:45].ljust(45)]
+            for key in ("p50_ms", "p95_ms"):
+                change = (stats[key] / before[key] - 1) * 100 if before[key] else float("nan")
+                row.append(f"{before[key]:>10.3f} {stats[key]:>10.3f} {change:>+7.1f}%")
+            print(" ".join(row))
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="TradePulse benchmark suite (offline).")
+    parser.add_argument("--suite", default=",".join(SUITES), help=f"comma separated, from {', '.join(SUITES)}")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--repeat", type=int, default=200, help="iterations per micro/scoring/parsing benchmark")
+    parser.add_argument("--lengths", default="252,756,2520", help="history lengths (bars) for micro benchmarks")
+    parser.add_argument("--requests", type=int, default=500, help="e2e: requests in the warm phase")
+    parser.add_argument("--concurrency", type=int, default=16, help="e2e: concurrent clients")
+    parser.add_argument("--tickers", type=int, default=50, help="e2e: distinct tickers requested")
+    parser.add_argument("--yf-latency", type=float, default=50, help="e2e: fake Yahoo Finance latency (ms); per-call latency with --replay")
+    parser.add_argument("--news-latency", type=float, default=80, help="e2e: fake news server latency (ms)")
+    parser.add_argument("--replay", metavar="DIR", help="e2e: serve upstream data from a recording (see sources/recording.py)")
+    parser.add_argument("--replay-error-rate", type=float, default=0.0, help="e2e: share of replayed upstream calls that fail")
+    parser.add_argument("--no-response-cache", action="store_true", help="e2e: disable the rendered response cache")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    args.lengths = [int(n) for n in args.lengths.split(",")]
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="tradepulse-bench-")
+    _configure_environment(workdir, args)
+    args.news_server = None
+    if "e2e" in suites and not args.replay:
+        from benchmarks.fakes import FakeNewsServer
+        args.news_server = FakeNewsServer(latency=args.news_latency / 1000).start()
+        os.environ["TP_YAHOO_NEWS_URL"] = args.news_server.yahoo_url
+        os.environ["TP_GOOGLE_NEWS_RSS_URL"] = args.news_server.google_url
+    import logging
+    logging.disable(logging.WARNING)
+
+    runners = {"micro": bench_micro, "scoring": bench_scoring, "parsing": bench_parsing, "e2e": bench_e2e}
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("compare", "news_server")},
+        },
+        "results": {},
+    }
+    try:
+        for suite in suites:
+            print(f"Running {suite} benchmarks...", file=sys.stderr)
+            report["results"][suite] = runners[suite](args)
+    finally:
+        if args.news_server is not None:
+            args.news_server.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# Gunicorn settings for production (start.sh). Worker count and port come from
+# the usual WEB_CONCURRENCY / PORT variables.
+#
+# With TP_STARTUP_PRELOAD (default on) the master imports the app, preloads the
+# heavy modules and the VADER lexicon and runs the warm-up once, before forking:
+# workers share all of that copy-on-write and boot in a fraction of the time,
+# which matters when autoscaling adds capacity under load. See services/startup.py.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config import STARTUP_PRELOAD
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+preload_app = STARTUP_PRELOAD
+
+def when_ready(server):
+    # Master, after the app was loaded and before the first fork
+    if STARTUP_PRELOAD:
+        from services import startup
+        startup.preload()
+        startup.warm_up()
+
+def post_fork(server, worker):
+    from services import startup
+    startup.forked()
@@ -0,0 +1,283 @@
+import math
+from collections import deque
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from models.price_history import PriceHistory, as_price_history
+
+# Incremental (streaming) versions of the indicators in technical.py.
+# Every indicator there is a recursive EMA (or a short rolling window), so the
+# state needed to extend it by one bar is a handful of floats. IndicatorState
+# carries that state per ticker: appending a bar or replacing today's intraday
+# bar is O(1), and the results are identical to a full recompute over the same
+# bars (enforced by tests/test_incremental.py).
+
+STATE_VERSION = 1
+
+HistoryLike = Union[PriceHistory, pd.DataFrame]
+
+class _EWM:
+    """
+    One step of pandas' `ewm(alpha=..., adjust=False, min_periods=...).mean()`.
+    Mirrors pandas' NaN handling (ignore_na=False) so results match bit for bit.
+    """
+    __slots__ = ("alpha", "min_periods", "value", "old_wt", "nobs")
+
+    def __init__(self, alpha: float, min_periods: int = 0):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = math.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, x: float) -> float:
+        is_observation = x == x
+        self.nobs += is_observation
+        if self.value == self.value:
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.value != x:
+                    self.value = self.old_wt * self.value + self.alpha * x
+                    self.value /= self.old_wt + self.alpha
+                self.old_wt = 1.0
+        elif is_observation:
+            self.value = x
+        return self.current()
+
+    def current(self) -> float:
+        return self.value if self.nobs >= max(self.min_periods, 1) else math.nan
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "min_periods": self.min_periods, "value": self.value, "old_wt": self.old_wt, "nobs": self.nobs}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_EWM":
+        ewm = cls(data["alpha"], data["min_periods"])
+        ewm.value, ewm.old_wt, ewm.nobs = data["value"], data["old_wt"], data["nobs"]
+        return ewm
+
+_EWM_FIELDS = ("avg_gain", "avg_loss", "ema_fast", "ema_slow", "signal", "atr", "adx_atr", "plus_dm", "minus_dm", "adx")
+
+class IndicatorState:
+    """
+    Serializable per-ticker indicator state (RSI, MACD, ATR, ADX, volume z-score).
+
+    Use `from_history` to build it once, then `append_bar` for each new bar or
+    `replace_last_bar` when today's bar is revised intraday. `sync` does the
+    right thing given a refreshed history (PriceHistory or yfinance frame).
+    """
+
+    def __init__(self, rsi_window: int = 14, fast: int = 12, slow: int = 26, signal: int = 9,
+                 atr_window: int = 14, adx_window: int = 14, volume_window: int = 20):
+        self.params = {
+            "rsi_window": rsi_window, "fast": fast, "slow": slow, "signal": signal,
+            "atr_window": atr_window, "adx_window": adx_window, "volume_window": volume_window,
+        }
+        self.avg_gain = _EWM(1 / rsi_window, rsi_window)
+        self.avg_loss = _EWM(1 / rsi_window, rsi_window)
+        self.ema_fast = _EWM(2.0 / (1.0 + fast))
+        self.ema_slow = _EWM(2.0 / (1.0 + slow))
+        self.signal = _EWM(2.0 / (1.0 + signal))
+        self.atr = _EWM(1 / atr_window, atr_window)
+        self.adx_atr = _EWM(1 / adx_window, adx_window)
+        self.plus_dm = _EWM(1 / adx_window, adx_window)
+        self.minus_dm = _EWM(1 / adx_window, adx_window)
+        self.adx = _EWM(1 / adx_window, adx_window)
+        self.volumes: deque = deque(maxlen=volume_window)
+        self.bars = 0
+        self.first_date: Optional[str] = None
+        self.last_date: Optional[str] = None
+        self.last_bar: Optional[Dict[str, float]] = None
+        self.prev_bar: Optional[Dict[str, float]] = None
+        self.outputs: Dict[str, float] = {}
+        # State as it was before the last bar, so that bar can be replaced
+        self._before_last: Optional[Dict[str, Any]] = None
+        # Bumped on every change, lets callers skip re-persisting an unchanged state
+        self.revision = 0
+
+    # -- updates ---------------------------------------------------------
+
+    def append_bar(self, date: str, high: float, low: float, close: float, volume: float = math.nan):
+        self._before_last = self._core_dict()
+        self._apply(date, float(high), float(low), float(close), float(volume))
+        self.revision += 1
+
+    def replace_last_bar(self, high: float, low: float, close: float, volume: float = math.nan):
+        if self._before_last is None:
+            raise ValueError("No bar to replace")
+        date = self.last_date
+        self._load_core(self._before_last)
+        self._apply(date, float(high), float(low), float(close), float(volume))
+        self.revision += 1
+
+    def _apply(self, date: str, high: float, low: float, close: float, volume: float):
+        prev = self.last_bar
+        prev_close = prev["close"] if prev else math.nan
+        prev_high = prev["high"] if prev else math.nan
+        prev_low = prev["low"] if prev else math.nan
+
+        # RSI: NaN deltas count as 0, like Series.where(delta > 0, 0)
+        delta = close - prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        g = self.avg_gain.update(gain)
+        l = self.avg_loss.update(loss)
+
+        # MACD
+        macd_line = self.ema_fast.update(close) - self.ema_slow.update(close)
+        signal_line = self.signal.update(macd_line)
+
+        # True range; NaN-skipping max like DataFrame.max(axis=1)
+        tr = _nanmax(high - low, abs(high - prev_close), abs(low - prev_close))
+        atr = self.atr.update(tr)
+        adx_atr = self.adx_atr.update(tr)
+
+        # ADX
+        up_move = high - prev_high
+        down_move = prev_low - low
+        plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+        minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        plus_di = 100 * _div(self.plus_dm.update(plus_dm), adx_atr)
+        minus_di = 100 * _div(self.minus_dm.update(minus_dm), adx_atr)
+        dx = _div(100 * abs(plus_di - minus_di), plus_di + minus_di)
+        adx = self.adx.update(dx)
+        rsi = 100 - _div(100, 1 + _div(g, l))
+
+        self.volumes.append(volume)
+        self.outputs = {
+            "rsi": rsi,
+            "macd_line": macd_line,
+            "signal_line": signal_line,
+            "histogram": macd_line - signal_line,
+            "atr": atr,
+            "adx": adx,
+        }
+        self.bars += 1
+        self.first_date = self.first_date or date
+        self.last_date = date
+        self.prev_bar = prev
+        self.last_bar = {"high": high, "low": low, "close": close, "volume": volume}
+
+    def _volume_z(self) -> float:
+        window = self.params["volume_window"]
+        if len(self.volumes) < window:
+            return math.nan
+        vols = np.fromiter(self.volumes, dtype=np.float64, count=window)
+        if np.isnan(vols).any():
+            return math.nan
+        std = vols.std(ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float((vols[-1] - vols.mean()) / np.float64(std))
+
+    # -- full history ----------------------------------------------------
+
+    @classmethod
+    def from_history(cls, history: HistoryLike, **params) -> "IndicatorState":
+        state = cls(**params)
+        state.extend(history)
+        return state
+
+    def extend(self, history: HistoryLike):
+        history = as_price_history(history)
+        if history.empty:
+            return
+        dates = history.date_strings()
+        highs = history.high.tolist()
+        lows = history.low.tolist()
+        closes = history.close.tolist()
+        volumes = history.volume.tolist()
+        # Only the final bar needs a snapshot to be replaceable
+        last = len(dates) - 1
+        for i in range(last):
+            self._apply(dates[i], highs[i], lows[i], closes[i], volumes[i])
+        self.append_bar(dates[last], highs[last], lows[last], closes[last], volumes[last])
+
+    def sync(self, history: HistoryLike) -> "IndicatorState":
+        """
+        Brings the state up to date with a refreshed history.
+        New bars are appended, a revised last bar is replaced. If the history no
+        longer starts where the state did (rolling window, split adjustment,
+        gaps), a fresh state is rebuilt so results still match a full recompute.
+        """
+        history = as_price_history(history)
+        if self.bars == 0 or history.empty:
+            return IndicatorState.from_history(history, **self.params)
+
+        pos = self.bars - 1
+        if len(history) <= pos or history.day(0) != self.first_date or history.day(pos) != self.last_date:
+            return IndicatorState.from_history(history, **self.params)
+
+        # The stored previous bar must still match, otherwise history was revised
+        if self.prev_bar is not None and pos >= 1 and not _bar_matches(self.prev_bar, history.bar(pos - 1)):
+            return IndicatorState.from_history(history, **self.params)
+
+        bar = history.bar(pos)
+        if not _bar_matches(self.last_bar, bar):
+            self.replace_last_bar(*bar)
+        if pos + 1 < len(history):
+            self.extend(history[pos + 1:])
+        return self
+
+    def values(self) -> Dict[str, float]:
+        """Latest indicator values, keyed like technical.compute_indicators."""
+        return {**self.outputs, "volume_z": self._volume_z()}
+
+    # -- serialization ---------------------------------------------------
+
+    def _core_dict(self) -> Dict[str, Any]:
+        core = {name: getattr(self, name).to_dict() for name in _EWM_FIELDS}
+        core.update({
+            "volumes": list(self.volumes),
+            "bars": self.bars,
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+            "last_bar": self.last_bar,
+            "prev_bar": self.prev_bar,
+            "outputs": dict(self.outputs),
+        })
+        return core
+
+    def _load_core(self, core: Dict[str, Any]):
+        for name in _EWM_FIELDS:
+            setattr(self, name, _EWM.from_dict(core[name]))
+        self.volumes = deque(core["volumes"], maxlen=self.params["volume_window"])
+        self.bars = core["bars"]
+        self.first_date = core["first_date"]
+        self.last_date = core["last_date"]
+        self.last_bar = core["last_bar"]
+        self.prev_bar = core["prev_bar"]
+        self.outputs = dict(core["outputs"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION, "params": dict(self.params), "revision": self.revision,
+            "core": self._core_dict(), "before_last": self._before_last,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        if data.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported indicator state version: {data.get('version')}")
+        state = cls(**data["params"])
+        state._load_core(data["core"])
+        state._before_last = data["before_last"]
+        state.revision = data["revision"]
+        return state
+
+def _nanmax(*values: float) -> float:
+    present = [v for v in values if v == v]
+    return max(present) if present else math.nan
+
+def _div(a: float, b: float) -> float:
+    # float division with NumPy semantics (x/0 -> +-inf, 0/0 -> nan) instead of raising
+    if b != 0 or b != b:
+        return a / b
+    if a == 0 or a != a:
+        return math.nan
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+def _bar_matches(bar: Dict[str, float], current: Tuple[float, float, float, float]) -> bool:
+    stored = (bar["high"], bar["low"], bar["close"], bar["volume"])
+    return all(a == b or (a != a and b != b) for a, b in zip(stored, current))
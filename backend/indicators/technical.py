@@ -5,85 +5,193 @@ from typing import Tuple, Dict
 def calculate_rsi(data: pd.Series, window: int = 14) -> float:
     """
     Calculate RSI using Wilder's Smoothing.
+    Wilder's: first value is SMA-like, subsequent are (prev * (n-1) + curr) / n,
+    which is ewm with alpha=1/n and adjust=False.
     """
-    delta = data.diff()
-    gain = (delta.where(delta > 0, 0))
-    loss = (-delta.where(delta < 0, 0))
-
-    # Wilder's Smoothing:
-    # First value is SMA, subsequent are (prev * (n-1) + curr) / n
-    avg_gain = gain.rolling(window=window, min_periods=window).mean()
-    avg_loss = loss.rolling(window=window, min_periods=window).mean()
-
-    # We need to apply the smoothing correctly for the rest of the series
-    # Pandas ewm with com=(window-1) matches Wilder's perfectly if adjust=False
-    avg_gain = gain.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    
+    rsi = compute_indicators(data.to_numpy(dtype=np.float64), include=("rsi",), rsi_window=window)["rsi"]
+
     # Handle NaN at start
-    return rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50.0
+    return rsi if not pd.isna(rsi) else 50.0
 
 def calculate_macd(data: pd.Series, slow: int = 26, fast: int = 12, signal: int = 9) -> Tuple[float, float, float]:
     """
     Returns (macd_line, signal_line, histogram)
     """
-    exp1 = data.ewm(span=fast, adjust=False).mean()
-    exp2 = data.ewm(span=slow, adjust=False).mean()
-    macd_line = exp1 - exp2
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    
-    return macd_line.iloc[-1], signal_line.iloc[-1], histogram.iloc[-1]
+    out = compute_indicators(data.to_numpy(dtype=np.float64), include=("macd",), fast=fast, slow=slow, signal=signal)
+    return out["macd_line"], out["signal_line"], out["histogram"]
 
 def calculate_atr(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 14) -> float:
     """
     Average True Range (ATR) for volatility.
     """
-    tr1 = high - low
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-    return atr.iloc[-1]
+    return compute_indicators(
+        close.to_numpy(dtype=np.float64), high.to_numpy(dtype=np.float64), low.to_numpy(dtype=np.float64),
+        include=("atr",), atr_window=window
+    )["atr"]
 
 def calculate_adx(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 14) -> float:
     """
     Average Directional Index (ADX) for trend strength.
     Uses +DI and -DI.
     """
-    # True Range
-    tr1 = high - low
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-
-    # Directional Movement
-    up_move = high - high.shift()
-    down_move = low.shift() - low
-    
-    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
-    
-    plus_dm_s = pd.Series(plus_dm, index=high.index).ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-    minus_dm_s = pd.Series(minus_dm, index=high.index).ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-
-    plus_di = 100 * (plus_dm_s / atr)
-    minus_di = 100 * (minus_dm_s / atr)
-    
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-    
-    return adx.iloc[-1]
+    return compute_indicators(
+        close.to_numpy(dtype=np.float64), high.to_numpy(dtype=np.float64), low.to_numpy(dtype=np.float64),
+        include=("adx",), adx_window=window
+    )["adx"]
 
 def get_volume_z_score(volume: pd.Series, window: int = 20) -> float:
     """
     Z-Score of the current volume relative to the last N days.
     """
-    mean = volume.rolling(window=window).mean()
-    std = volume.rolling(window=window).std()
-    z_score = (volume - mean) / std
-    return z_score.iloc[-1]
+    vol = volume.to_numpy(dtype=np.float64)
+    return compute_indicators(vol, volume=vol, include=("volume_z",), volume_window=window)["volume_z"]
+
+# ---------------------------------------------------------------------------
+# Fused indicator kernel
+# ---------------------------------------------------------------------------
+# The functions above are thin wrappers around `compute_indicators`, which works
+# on aligned NumPy arrays for one ticker (bars,) or many (tickers, bars). True
+# range is built once, and every EMA that shares a smoothing factor runs as a
+# single 2-D pandas `ewm` call (Cython, column-wise), so the cost of the Python
+# layer doesn't grow with the number of tickers.
+
+ALL_INDICATORS = ("rsi", "macd", "atr", "adx", "volume_z")
+
+def _as_2d(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=np.float64)
+    return arr.reshape(1, -1) if arr.ndim == 1 else arr
+
+def _shift(arr: np.ndarray) -> np.ndarray:
+    # Time-major (bars, tickers) equivalent of Series.shift()
+    out = np.empty_like(arr)
+    out[0] = np.nan
+    out[1:] = arr[:-1]
+    return out
+
+def _ewm_grouped(specs: Dict[str, Tuple[np.ndarray, float, int]]) -> Dict[str, np.ndarray]:
+    """
+    Runs adjust=False EWMs for several time-major (bars, tickers) blocks.
+    specs maps name -> (values, alpha, min_periods); blocks that share
+    (alpha, min_periods) are stacked into one ewm call.
+    """
+    groups: Dict[Tuple[float, int], list] = {}
+    for name, (values, alpha, min_periods) in specs.items():
+        groups.setdefault((alpha, min_periods), []).append((name, values))
+
+    out: Dict[str, np.ndarray] = {}
+    for (alpha, min_periods), members in groups.items():
+        stacked = np.hstack([values for _, values in members])
+        smoothed = pd.DataFrame(stacked).ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean().to_numpy()
+        offset = 0
+        for name, values in members:
+            width = values.shape[1]
+            out[name] = smoothed[:, offset:offset + width]
+            offset += width
+    return out
+
+def compute_indicators(
+    close,
+    high=None,
+    low=None,
+    volume=None,
+    include: Tuple[str, ...] = ALL_INDICATORS,
+    rsi_window: int = 14,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+    atr_window: int = 14,
+    adx_window: int = 14,
+    volume_window: int = 20,
+    full: bool = False,
+) -> Dict[str, np.ndarray]:
+    """
+    Computes RSI / MACD / ATR / ADX / volume z-score in one vectorized pass.
+
+    Inputs are aligned arrays shaped (bars,) or (tickers, bars). `high`/`low` are
+    required for ATR and ADX, `volume` for the z-score. Results match the
+    single-series pandas implementations exactly (no 50.0 RSI fallback here).
+
+    Returns a dict with keys rsi, macd_line, signal_line, histogram, atr, adx,
+    volume_z (for the requested indicators). Each value is the latest bar per
+    ticker, or the full series (same shape as the input) when `full=True`.
+    """
+    single = np.ndim(close) == 1
+    c = _as_2d(close).T # time-major: (bars, tickers)
+    include = set(include)
+    needs_range = bool(include & {"atr", "adx"})
+    if needs_range and (high is None or low is None):
+        raise ValueError("high and low are required for ATR/ADX")
+
+    prev_close = _shift(c)
+    specs: Dict[str, Tuple[np.ndarray, float, int]] = {}
+
+    if "rsi" in include:
+        delta = c - prev_close
+        # NaN deltas count as 0, like Series.where(delta > 0, 0)
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = -np.where(delta < 0, delta, 0.0)
+        specs["avg_gain"] = (gain, 1 / rsi_window, rsi_window)
+        specs["avg_loss"] = (loss, 1 / rsi_window, rsi_window)
+
+    if "macd" in include:
+        specs["ema_fast"] = (c, 2.0 / (1.0 + fast), 0)
+        specs["ema_slow"] = (c, 2.0 / (1.0 + slow), 0)
+
+    if needs_range:
+        h = _as_2d(high).T
+        l = _as_2d(low).T
+        # True range, computed once for ATR and ADX. fmax skips NaN like max(axis=1)
+        tr = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+        if "atr" in include:
+            specs["atr"] = (tr, 1 / atr_window, atr_window)
+        if "adx" in include:
+            up_move = h - _shift(h)
+            down_move = _shift(l) - l
+            plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+            minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+            specs["adx_atr"] = (tr, 1 / adx_window, adx_window)
+            specs["plus_dm"] = (plus_dm, 1 / adx_window, adx_window)
+            specs["minus_dm"] = (minus_dm, 1 / adx_window, adx_window)
+
+    # When ATR and ADX share a window the smoothed TR is only computed once
+    if "atr" in specs and "adx_atr" in specs and atr_window == adx_window:
+        del specs["adx_atr"]
+    smoothed = _ewm_grouped(specs)
+    if "adx" in include and "adx_atr" not in smoothed:
+        smoothed["adx_atr"] = smoothed["atr"]
+
+    results: Dict[str, np.ndarray] = {}
+    second_pass: Dict[str, Tuple[np.ndarray, float, int]] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "rsi" in include:
+            rs = smoothed["avg_gain"] / smoothed["avg_loss"]
+            results["rsi"] = 100 - (100 / (1 + rs))
+        if "macd" in include:
+            results["macd_line"] = smoothed["ema_fast"] - smoothed["ema_slow"]
+            second_pass["signal_line"] = (results["macd_line"], 2.0 / (1.0 + signal), 0)
+        if "atr" in include:
+            results["atr"] = smoothed["atr"]
+        if "adx" in include:
+            plus_di = 100 * (smoothed["plus_dm"] / smoothed["adx_atr"])
+            minus_di = 100 * (smoothed["minus_dm"] / smoothed["adx_atr"])
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+            second_pass["adx"] = (dx, 1 / adx_window, adx_window)
+
+        # Signal line and ADX depend on first-pass outputs: one more grouped pass
+        results.update(_ewm_grouped(second_pass))
+        if "macd" in include:
+            results["histogram"] = results["macd_line"] - results["signal_line"]
+
+        if "volume_z" in include:
+            if volume is None:
+                raise ValueError("volume is required for the volume z-score")
+            v = pd.DataFrame(_as_2d(volume).T)
+            rolling = v.rolling(window=volume_window)
+            results["volume_z"] = ((v - rolling.mean()) / rolling.std()).to_numpy()
+
+    for name, values in results.items():
+        values = values.T # back to (tickers, bars)
+        if not full:
+            values = values[:, -1]
+        results[name] = values[0] if single else values
+    return results
@@ -1,15 +1,53 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
-from contextlib import asynccontextmanager
+import asyncio
+import time
 
-from api.routes import router as api_router
-from utils.logging_utils import logger
+from services import startup
+
+# Timed for the startup breakdown (/ready); under gunicorn this runs once, in
+# the master (see gunicorn.conf.py)
+with startup.phase("imports"):
+    from fastapi import FastAPI, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    import uvicorn
+    from contextlib import asynccontextmanager
+
+    from api.routes import router as api_router, live_hub
+    from scoring.screener import screen_index
+    from services.executor import shutdown_executor
+    from services.headline_sentiment import shutdown_sentiment_pool
+    from services.prefetch import scheduler as prefetch_scheduler
+    from sources.http_client import start_http_client, close_http_client
+    from sources.news_scraper import get_news_sentiment
+    from sources.yfinance_client import get_price_history, get_fundamentals
+    from utils.config import PREFETCH_ENABLED, SCREEN_ENABLED
+    from utils.logging_utils import logger, new_request_id, RequestContext
+    from utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("TradePulse System Startup")
+    with startup.phase("lifespan"):
+        await start_http_client()
+        if PREFETCH_ENABLED:
+            prefetch_scheduler.start({
+                "history": lambda ticker: get_price_history(ticker, force=True),
+                "fundamentals": lambda ticker: get_fundamentals(ticker, force=True),
+                "news": lambda ticker: get_news_sentiment(ticker, force=True),
+            })
+        if SCREEN_ENABLED and screen_index.universe:
+            screen_index.start()
+    # Warm-up (unless the gunicorn master did it) runs while already serving;
+    # /ready reports 503 until it is done
+    ready_task = asyncio.create_task(startup.become_ready())
     yield
+    startup.draining()
+    ready_task.cancel()
+    await screen_index.stop()
+    await prefetch_scheduler.stop()
+    await live_hub.close()
+    await close_http_client()
+    shutdown_sentiment_pool()
+    shutdown_executor()
     logger.info("TradePulse System Shutdown")
 
 app = FastAPI(title="TradePulse Quant API", version="4.0.0", lifespan=lifespan)
@@ -22,6 +60,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """
+    Per-request id (X-Request-ID, generated if absent) and timings: exposes the
+    stage breakdown as Server-Timing and feeds the request latency histogram.
+    """
+    inbound = request.headers.get("X-Request-ID", "")
+    # Only accept ids that are safe to echo into headers, logs and JSON
+    request_id = inbound if 0 < len(inbound) <= 64 and inbound.replace("-", "").replace("_", "").isalnum() else new_request_id()
+    tokens = RequestContext.begin(request_id)
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = RequestContext.get_id()
+        timings = RequestContext.stage_timings()
+        if timings:
+            response.headers["Server-Timing"] = ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Templated path keeps label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_DURATION.labels(request.method, route, status).observe(time.perf_counter() - start)
+        RequestContext.end(tokens)
+
 app.include_router(api_router)
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import hashlib
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Compact daily OHLCV, the form price history takes in the market cache and
+# what the engine, indicators and screener consume. A yfinance frame carries
+# float64 columns (Dividends and Stock Splits included) behind a tz-aware
+# DatetimeIndex; here a bar is an int64 epoch day plus five float32 values,
+# 28 bytes, so the cache can be bounded by bytes (see services/cache.py).
+#
+# float32 keeps about 7 significant digits: exact to the cent below $100k, and
+# indicators are computed in float64 from these values. Frames passed in by
+# callers (tests, the backtest) are converted without narrowing.
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+PRICE_DTYPE = np.float32
+
+class PriceHistory:
+    """Daily bars as parallel arrays: `days` (epoch days) and open/high/low/close/volume."""
+    __slots__ = ("days", "open", "high", "low", "close", "volume")
+
+    def __init__(self, days: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.days = days
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dtype=PRICE_DTYPE) -> "PriceHistory":
+        """From a yfinance-style frame; extra columns are dropped, a missing one is NaN."""
+        n = len(frame)
+        if n:
+            index = pd.DatetimeIndex(frame.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            days = index.normalize().values.astype("datetime64[D]").astype(np.int64)
+        else:
+            days = np.empty(0, dtype=np.int64)
+        columns = [
+            frame[name].to_numpy(dtype=dtype) if name in frame else np.full(n, np.nan, dtype=dtype)
+            for name in COLUMNS
+        ]
+        return cls(days, *columns)
+
+    @classmethod
+    def from_array(cls, arr: np.ndarray, bars: Optional[int] = None, dtype=PRICE_DTYPE) -> "PriceHistory":
+        """From the OHLCV store's (6, bars) layout. Copies, so no file mapping is kept alive."""
+        if bars is not None:
+            arr = arr[:, -bars:]
+        return cls(arr[0].astype(np.int64), *(arr[i + 1].astype(dtype) for i in range(len(COLUMNS))))
+
+    def to_frame(self) -> pd.DataFrame:
+        index = pd.DatetimeIndex(self.days.astype("datetime64[D]"), name="Date")
+        return pd.DataFrame(dict(zip(COLUMNS, self._columns())), index=index)
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return self.open, self.high, self.low, self.close, self.volume
+
+    # -- access ----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __getitem__(self, index: slice) -> "PriceHistory":
+        if not isinstance(index, slice):
+            raise TypeError("PriceHistory only supports slicing; use bar() for a single bar")
+        return PriceHistory(self.days[index], *(column[index] for column in self._columns()))
+
+    @property
+    def empty(self) -> bool:
+        return len(self.days) == 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.days.nbytes + sum(column.nbytes for column in self._columns())
+
+    def tail(self, n: int) -> "PriceHistory":
+        return self[-n:] if n > 0 else self[:0]
+
+    def day(self, i: int) -> str:
+        return str(self.days[i].astype("datetime64[D]"))
+
+    def date_strings(self) -> List[str]:
+        return np.datetime_as_string(self.days.astype("datetime64[D]")).tolist()
+
+    def bar(self, i: int) -> Tuple[float, float, float, float]:
+        """(high, low, close, volume) of bar `i` as Python floats."""
+        return float(self.high[i]), float(self.low[i]), float(self.close[i]), float(self.volume[i])
+
+    def fingerprint(self) -> str:
+        """Short digest of the first bar: tells apart series that state derived from one can't be reused for."""
+        if self.empty:
+            return "empty"
+        first = np.array([self.days[0], *(column[0] for column in self._columns())], dtype=np.float64)
+        return hashlib.blake2b(first.tobytes(), digest_size=8).hexdigest()
+
+    @property
+    def last_close(self) -> float:
+        close = self.close[-1]
+        if close.dtype == np.float32:
+            # Shortest decimal that round-trips, so 187.23 doesn't come out as 187.22999572753906
+            return float(str(close))
+        return float(close)
+
+    def __repr__(self) -> str:
+        if self.empty:
+            return "PriceHistory(0 bars)"
+        return f"PriceHistory({len(self)} bars, {self.day(0)}..{self.day(-1)}, {self.close.dtype})"
+
+def as_price_history(history: Union[PriceHistory, pd.DataFrame]) -> PriceHistory:
+    """Accepts either form; frames are converted at full (float64) precision."""
+    if isinstance(history, PriceHistory):
+        return history
+    return PriceHistory.from_frame(history, dtype=np.float64)
@@ -14,6 +14,8 @@ class DataQuality(BaseModel):
     news_coverage: str = Field(..., description="Description of news sources found")
     missing_fields: List[str] = Field(default_factory=list, description="List of any missing data points")
     is_fallback_used: bool = False
+    timed_out_stages: List[str] = Field(default_factory=list, description="Fetch stages that hit their timeout (response is partial)")
+    degraded_stages: List[str] = Field(default_factory=list, description="Fetch stages that failed and were replaced by a neutral default")
 
 class FactorContribution(BaseModel):
     factor_name: str
@@ -54,19 +56,77 @@ class SentimentAnalysis(BaseModel):
     raw_vader: float = Field(..., ge=-1, le=1)
     headline_count: int
     top_headlines: List[NewsItem]
+    news_source: Optional[str] = Field(None, description="Source the headlines came from ('yahoo' or the 'google_rss' fallback)")
 
 class PricePoint(BaseModel):
     date: str
     price: float
 
+class PriceSeries(BaseModel):
+    dates: List[str]
+    prices: List[float]
+
 class AnalysisResponse(BaseModel):
     request_id: str
     ticker: str
     timestamp: datetime
     current_price: float
-    fundamentals: Fundamentals
+    fundamentals: Optional[Fundamentals] = Field(..., description="None when requested with include_fundamentals=false")
     technical_analysis: TechnicalIndicators
     sentiment_analysis: SentimentAnalysis
     signal_analysis: TradeSignal
     data_quality: DataQuality
     price_history: List[PricePoint]
+    price_history_columnar: Optional[PriceSeries] = Field(None, description="Set instead of price_history when price_format='columnar'")
+
+class BatchAnalysisItem(BaseModel):
+    ticker: str
+    status: Literal["ok", "error"]
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[BatchAnalysisItem]
+
+class ScreenResult(BaseModel):
+    ticker: str
+    sector: Optional[str] = None
+    price: float
+    signal: str
+    final_score: float
+    rsi: float
+    adx: float
+    macd_bullish: bool
+    sentiment_score: float = Field(..., description="Cached news sentiment (0-100), neutral 50 if none is cached")
+    as_of: str = Field(..., description="Date of the last bar the scores are based on")
+
+class ScreenResponse(BaseModel):
+    updated_at: Optional[datetime] = Field(None, description="When the background job last refreshed the index")
+    universe_size: int
+    indexed: int
+    matched: int
+    results: List[ScreenResult]
+
+class CrossSectionTicker(BaseModel):
+    ticker: str
+    sector: Optional[str] = None
+    observations: int = Field(..., description="Daily returns available in the correlation window")
+    beta: Optional[float] = Field(None, description="Latest rolling beta against the benchmark")
+    final_score: Optional[float] = None
+    rsi: Optional[float] = None
+    final_score_z: Optional[float] = Field(None, description="z-score of final_score within the ticker's sector")
+    rsi_z: Optional[float] = Field(None, description="z-score of RSI within the ticker's sector")
+
+class RollingBeta(BaseModel):
+    dates: List[str]
+    values: Dict[str, List[Optional[float]]] = Field(..., description="Per ticker, aligned with dates; null without enough overlapping returns")
+
+class CrossSectionResponse(BaseModel):
+    as_of: Optional[str] = Field(None, description="Last date of the aligned return matrix")
+    benchmark: str
+    window: int
+    beta_window: int
+    tickers: List[CrossSectionTicker]
+    missing: List[str] = Field(..., description="Requested tickers without price data")
+    correlation: Optional[List[List[Optional[float]]]] = Field(None, description="Pairwise correlation of daily returns, rows and columns in `tickers` order")
+    rolling_beta: Optional[RollingBeta] = None
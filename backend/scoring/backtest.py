@@ -0,0 +1,218 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicators.technical import compute_indicators
+from scoring import factors as factors_model
+from sources import ohlcv_store
+from utils.config import BACKTEST_HORIZONS, BACKTEST_WARMUP_BARS, BACKTEST_WORKERS
+
+logger = logging.getLogger("TradePulse.Backtest")
+
+# Historical evaluation of the factor model. Indicators come from the fused
+# kernel over the full stored history (full=True), the factor rules from
+# scoring/factors.py, so every bar is scored exactly like the live engine
+# would have scored it that day, in one vectorized pass per ticker.
+#
+# Sentiment is pluggable: a mapping of ticker -> Series of normalized scores
+# (0-100) indexed by date. A score applies from its date until the next one;
+# bars without a known score use neutral 50, like a ticker with no headlines.
+
+NEUTRAL_SENTIMENT = 50.0
+
+SentimentSeries = Mapping[str, pd.Series]
+
+def align_sentiment(series: Optional[pd.Series], index: pd.DatetimeIndex) -> np.ndarray:
+    """As-of alignment of a dated sentiment series onto bar dates."""
+    if series is None or series.empty:
+        return np.full(len(index), NEUTRAL_SENTIMENT)
+    series = series.sort_index()
+    series.index = pd.DatetimeIndex(series.index).tz_localize(None).normalize()
+    series = series[~series.index.duplicated(keep="last")]
+    aligned = series.reindex(index.tz_localize(None).normalize(), method="ffill")
+    return aligned.fillna(NEUTRAL_SENTIMENT).to_numpy(dtype=np.float64)
+
+def score_history(history: pd.DataFrame, sentiment: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Factor scores and signal for every bar of `history` (yfinance columns).
+    Leading bars are included; callers drop the indicator warm-up themselves.
+    """
+    close = history["Close"].to_numpy(dtype=np.float64)
+    indicators = compute_indicators(
+        close,
+        history["High"].to_numpy(dtype=np.float64),
+        history["Low"].to_numpy(dtype=np.float64),
+        include=("rsi", "macd", "adx"),
+        full=True,
+    )
+    # Same fallback as the live engine: no RSI yet reads as neutral
+    rsi = np.where(np.isnan(indicators["rsi"]), 50.0, indicators["rsi"])
+    rsi_s = factors_model.rsi_score(rsi)
+    trend_s = factors_model.trend_score(indicators["macd_line"], indicators["signal_line"], indicators["adx"])
+    sentiment_s = align_sentiment(sentiment, pd.DatetimeIndex(history.index))
+    final = factors_model.final_score(rsi_s, trend_s, sentiment_s)
+    bucket = factors_model.signal_bucket(final)
+
+    return pd.DataFrame({
+        "close": close,
+        "rsi": indicators["rsi"],
+        "macd_line": indicators["macd_line"],
+        "signal_line": indicators["signal_line"],
+        "adx": indicators["adx"],
+        "rsi_score": rsi_s,
+        "trend_score": trend_s,
+        "sentiment_score": sentiment_s,
+        "final_score": final,
+        "bucket": bucket,
+        "signal": np.asarray(factors_model.SIGNAL_LABELS, dtype=object)[bucket],
+    }, index=history.index)
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """close[t + horizon] / close[t] - 1, NaN where the horizon runs past the data."""
+    out = np.full(len(close), np.nan)
+    if horizon < len(close):
+        out[:-horizon] = close[horizon:] / close[:-horizon] - 1.0
+    return out
+
+def bucket_aggregates(scored: pd.DataFrame, horizons: Sequence[int] = BACKTEST_HORIZONS,
+                      warmup: int = BACKTEST_WARMUP_BARS) -> Dict[str, np.ndarray]:
+    """
+    Per-bucket sums for one ticker, in a form that adds up across tickers:
+    bars (buckets,), and (buckets, horizons) observations / return sums / hits.
+    """
+    n_buckets = len(factors_model.SIGNAL_LABELS)
+    close = scored["close"].to_numpy()
+    bucket = scored["bucket"].to_numpy()
+    directions = np.asarray(factors_model.SIGNAL_DIRECTIONS)[bucket]
+    live = np.arange(len(close)) >= warmup
+
+    observations = np.zeros((n_buckets, len(horizons)))
+    return_sums = np.zeros((n_buckets, len(horizons)))
+    hits = np.zeros((n_buckets, len(horizons)))
+    for j, horizon in enumerate(horizons):
+        fwd = forward_returns(close, horizon)
+        valid = live & ~np.isnan(fwd)
+        b = bucket[valid]
+        observations[:, j] = np.bincount(b, minlength=n_buckets)
+        return_sums[:, j] = np.bincount(b, weights=fwd[valid], minlength=n_buckets)
+        hits[:, j] = np.bincount(b, weights=(directions[valid] * fwd[valid] > 0), minlength=n_buckets)
+
+    return {
+        "bars": np.bincount(bucket[live], minlength=n_buckets).astype(np.float64),
+        "observations": observations,
+        "return_sums": return_sums,
+        "hits": hits,
+    }
+
+def backtest_ticker(ticker: str, sentiment: Optional[pd.Series] = None, horizons: Sequence[int] = BACKTEST_HORIZONS,
+                    warmup: int = BACKTEST_WARMUP_BARS, load: Callable[[str], Optional[pd.DataFrame]] = ohlcv_store.read) -> Dict[str, np.ndarray]:
+    history = load(ticker)
+    if history is None or len(history) <= warmup:
+        raise ValueError(f"Not enough stored price history for {ticker}")
+    return bucket_aggregates(score_history(history, sentiment), horizons, warmup)
+
+def _backtest_chunk(tickers: List[str], sentiment: SentimentSeries, horizons: Sequence[int], warmup: int) -> List[Tuple[str, Any]]:
+    # Runs in pool processes: each reads its tickers straight from the mmap store
+    results = []
+    for ticker in tickers:
+        try:
+            results.append((ticker, backtest_ticker(ticker, sentiment.get(ticker), horizons, warmup)))
+        except ValueError as e:
+            results.append((ticker, str(e)))
+    return results
+
+def summarize(aggregates: List[Dict[str, np.ndarray]], horizons: Sequence[int] = BACKTEST_HORIZONS) -> Dict[str, Any]:
+    """Pools per-ticker aggregates into a per-signal report."""
+    n_buckets = len(factors_model.SIGNAL_LABELS)
+    total = {
+        "bars": np.zeros(n_buckets),
+        "observations": np.zeros((n_buckets, len(horizons))),
+        "return_sums": np.zeros((n_buckets, len(horizons))),
+        "hits": np.zeros((n_buckets, len(horizons))),
+    }
+    for agg in aggregates:
+        for name in total:
+            total[name] += agg[name]
+
+    buckets = {}
+    for b, label in enumerate(factors_model.SIGNAL_LABELS):
+        per_horizon = {}
+        for j, horizon in enumerate(horizons):
+            n = total["observations"][b, j]
+            directional = factors_model.SIGNAL_DIRECTIONS[b] != 0
+            per_horizon[str(horizon)] = {
+                "observations": int(n),
+                "mean_return": float(total["return_sums"][b, j] / n) if n else None,
+                # HOLD makes no directional call, so it has no hit rate
+                "hit_rate": float(total["hits"][b, j] / n) if n and directional else None,
+            }
+        buckets[label] = {"bars": int(total["bars"][b]), "horizons": per_horizon}
+    return {"tickers": len(aggregates), "bars": int(total["bars"].sum()), "signals": buckets}
+
+def run_backtest(tickers: Sequence[str], sentiment: Optional[SentimentSeries] = None,
+                 horizons: Sequence[int] = BACKTEST_HORIZONS, warmup: int = BACKTEST_WARMUP_BARS,
+                 workers: int = BACKTEST_WORKERS) -> Dict[str, Any]:
+    """
+    Backtests the factor model over the stored history of `tickers`.
+    With `workers` > 0 tickers are split into chunks across a process pool.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    sentiment = dict(sentiment or {})
+    if workers > 0 and len(tickers) > 1:
+        size = max(1, -(-len(tickers) // (workers * 4)))
+        chunks = [tickers[i:i + size] for i in range(0, len(tickers), size)]
+        # spawn, matching the sentiment pool: never fork a threaded parent
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(_backtest_chunk, chunk, {t: sentiment[t] for t in chunk if t in sentiment}, horizons, warmup)
+                for chunk in chunks
+            ]
+            results = [item for future in futures for item in future.result()]
+    else:
+        results = _backtest_chunk(tickers, sentiment, horizons, warmup)
+
+    aggregates = [agg for _, agg in results if not isinstance(agg, str)]
+    report = summarize(aggregates, horizons)
+    report["errors"] = {ticker: agg for ticker, agg in results if isinstance(agg, str)}
+    return report
+
+def load_sentiment_csv(path: str) -> Dict[str, pd.Series]:
+    """Reads date,ticker,score rows (score normalized 0-100) into per-ticker series."""
+    frame = pd.read_csv(path, parse_dates=["date"])
+    return {
+        str(ticker).upper(): group.set_index("date")["score"].astype(np.float64)
+        for ticker, group in frame.groupby("ticker")
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Backtest the TradePulse factor model over stored daily history.")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--horizons", default=",".join(map(str, BACKTEST_HORIZONS)), help="forward-return horizons in bars")
+    parser.add_argument("--warmup", type=int, default=BACKTEST_WARMUP_BARS)
+    parser.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    parser.add_argument("--sentiment", help="CSV with date,ticker,score columns (default: neutral)")
+    parser.add_argument("--fetch", action="store_true", help="fetch/update price history from Yahoo first")
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.fetch:
+        from sources.yfinance_client import get_price_histories
+        for ticker, outcome in get_price_histories(tickers).items():
+            if isinstance(outcome, Exception):
+                logger.warning(f"Could not fetch {ticker}: {outcome}")
+
+    sentiment = load_sentiment_csv(args.sentiment) if args.sentiment else None
+    horizons = tuple(int(h) for h in args.horizons.split(","))
+    report = run_backtest(tickers, sentiment, horizons, args.warmup, args.workers)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
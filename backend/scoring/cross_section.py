@@ -0,0 +1,309 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.price_history import PriceHistory, as_price_history
+from models.schemas import CrossSectionResponse, CrossSectionTicker, RollingBeta
+from scoring.screener import screen_index
+from services.executor import run_blocking
+from sources.yfinance_client import cached_price_histories
+from utils.config import CROSS_SECTION_DAYS, CROSS_SECTION_BENCHMARK, CROSS_SECTION_BETA_WINDOW, CROSS_SECTION_MIN_OVERLAP
+from utils.logging_utils import time_execution
+
+logger = logging.getLogger("TradePulse.CrossSection")
+
+# Cross-sectional analytics over a date-aligned tickers x days matrix of daily
+# returns. Columns are weekdays (a dense index, so aligning a ticker is
+# arithmetic instead of a join; exchange holidays are simply all-NaN columns),
+# rows are tickers, missing returns are NaN.
+#
+# The matrix is maintained incrementally: a refreshed history only rewrites its
+# own row (and is skipped when its last bar didn't change), and a new trading
+# day shifts the columns once. The screener's background refresh feeds it for
+# the whole universe; requests only read history already cached or stored on
+# the host and never fetch upstream (uncached tickers are reported missing and
+# left to the background jobs).
+#
+# Statistics are pairwise-complete (each pair uses the days both have), computed
+# for all pairs at once with masked matrix products, not per-pair loops.
+
+def weekday_index(days: np.ndarray) -> np.ndarray:
+    """Dense index over Monday-Friday for epoch days; weekend days map to -1."""
+    shifted = np.asarray(days, dtype=np.int64) + 3 # epoch day 0 (1970-01-01) was a Thursday
+    dow = shifted % 7
+    return np.where(dow < 5, shifted // 7 * 5 + dow, -1)
+
+def weekday_to_day(index: np.ndarray) -> np.ndarray:
+    weeks, dow = np.divmod(np.asarray(index, dtype=np.int64), 5)
+    return weeks * 7 + dow - 3
+
+class ReturnMatrix:
+    def __init__(self, days: int = CROSS_SECTION_DAYS):
+        self.days = days
+        self._returns = np.full((16, days), np.nan)
+        self._rows: Dict[str, int] = {}
+        # Weekday index of the last column; None until the first update
+        self._end: Optional[int] = None
+        # (last bar day, last close) each row was built from
+        self._inputs: Dict[str, Tuple[int, float]] = {}
+        self.counters = {"updated": 0, "unchanged": 0, "shifts": 0}
+
+    def update(self, ticker: str, history: PriceHistory) -> bool:
+        """Rewrites `ticker`'s row from `history` if its last bar changed. Returns True if it did."""
+        history = as_price_history(history)
+        if len(history) < 2:
+            return False
+        inputs = (int(history.days[-1]), float(history.close[-1]))
+        if self._inputs.get(ticker) == inputs:
+            self.counters["unchanged"] += 1
+            return False
+
+        recent = history.tail(self.days + 1)
+        close = recent.close.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = close[1:] / close[:-1] - 1.0
+        index = weekday_index(recent.days[1:])
+        valid = (index >= 0) & np.isfinite(returns)
+        if not valid.any():
+            return False
+        last = int(index[valid].max())
+        if self._end is None or last > self._end:
+            self._advance(last)
+
+        columns = index - (self._end - self.days + 1)
+        valid &= (columns >= 0) & (columns < self.days)
+        row = self._row(ticker)
+        self._returns[row] = np.nan
+        self._returns[row, columns[valid]] = returns[valid]
+        self._inputs[ticker] = inputs
+        self.counters["updated"] += 1
+        return True
+
+    def _advance(self, last: int):
+        # A new trading day: shift every row left, the new columns start empty
+        if self._end is not None:
+            shift = last - self._end
+            if shift < self.days:
+                self._returns[:, :-shift] = self._returns[:, shift:]
+                self._returns[:, -shift:] = np.nan
+            else:
+                self._returns[:] = np.nan
+            self.counters["shifts"] += 1
+        self._end = last
+
+    def _row(self, ticker: str) -> int:
+        row = self._rows.get(ticker)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._returns):
+                grown = np.full((2 * row, self.days), np.nan)
+                grown[:row] = self._returns
+                self._returns = grown
+            self._rows[ticker] = row
+        return row
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._rows
+
+    def snapshot(self, tickers: Sequence[str], columns: int) -> Tuple[List[str], np.ndarray, List[str]]:
+        """
+        (tickers present, their last `columns` returns as a copy, dates of those
+        columns). The copy can be used off the event loop while updates go on.
+        """
+        present = [t for t in tickers if t in self._rows]
+        columns = min(columns, self.days)
+        matrix = self._returns[[self._rows[t] for t in present], self.days - columns:]
+        if self._end is None:
+            return present, matrix, []
+        days = weekday_to_day(np.arange(self._end - columns + 1, self._end + 1))
+        return present, matrix, np.datetime_as_string(days.astype("datetime64[D]")).tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self._rows),
+            "days": self.days,
+            "as_of": str(weekday_to_day(self._end).astype("datetime64[D]")) if self._end is not None else None,
+            "bytes": self._returns.nbytes,
+            **self.counters,
+        }
+
+return_matrix = ReturnMatrix()
+screen_index.history_listeners.append(return_matrix.update)
+
+# -- vectorized statistics ----------------------------------------------------
+
+def pairwise_correlation(returns: np.ndarray, min_overlap: int = CROSS_SECTION_MIN_OVERLAP) -> np.ndarray:
+    """Pearson correlation of every pair of rows over the days both have; NaN below `min_overlap` days."""
+    present = np.isfinite(returns)
+    x = np.where(present, returns, 0.0)
+    mask = present.astype(np.float64)
+    # For pair (i, j): n = shared days, sx = sum of x_i over them, sxx = sum of x_i^2
+    n = mask @ mask.T
+    sx = x @ mask.T
+    sxx = (x * x) @ mask.T
+    sxy = x @ x.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = n * sxx - sx * sx
+        corr = (n * sxy - sx * sx.T) / np.sqrt(var * var.T)
+    corr[(n < min_overlap) | ~np.isfinite(corr)] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    return corr
+
+def rolling_beta(returns: np.ndarray, benchmark: np.ndarray, window: int,
+                 min_overlap: int = CROSS_SECTION_MIN_OVERLAP) -> np.ndarray:
+    """
+    Beta of each row against `benchmark` over trailing `window`-day windows, as
+    (rows, days - window + 1): column k is the window ending at day window - 1 + k.
+    """
+    if returns.shape[1] < window:
+        return np.empty((returns.shape[0], 0))
+    present = np.isfinite(returns) & np.isfinite(benchmark)
+    x = np.where(present, returns, 0.0)
+    y = np.where(present, benchmark, 0.0)
+
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        total = np.zeros((values.shape[0], values.shape[1] + 1))
+        np.cumsum(values, axis=1, out=total[:, 1:])
+        return total[:, window:] - total[:, :-window]
+
+    n = window_sums(present.astype(np.float64))
+    sx, sy = window_sums(x), window_sums(y)
+    sxy, syy = window_sums(x * y), window_sums(y * y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = n * syy - sy * sy
+        beta = (n * sxy - sx * sy) / var
+    beta[(n < min_overlap) | (var <= 0) | ~np.isfinite(beta)] = np.nan
+    return beta
+
+def sector_zscores(values: np.ndarray, sectors: Sequence[Optional[str]]) -> np.ndarray:
+    """z-score of each value within its sector (sample std); NaN without a sector or peers."""
+    values = np.asarray(values, dtype=np.float64)
+    keys = np.array([sector or "" for sector in sectors], dtype=object)
+    _, group = np.unique(keys, return_inverse=True)
+    valid = np.isfinite(values) & (keys != "")
+    count = np.bincount(group, weights=valid.astype(np.float64))
+    mean = np.bincount(group, weights=np.where(valid, values, 0.0)) / np.maximum(count, 1)
+    deviation = np.where(valid, values - mean[group], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.bincount(group, weights=deviation * deviation) / (count - 1))
+        z = deviation / std[group]
+    z[~valid | (count[group] < 2) | ~np.isfinite(z)] = np.nan
+    return z
+
+def _nullable(values: np.ndarray, decimals: int) -> list:
+    # NaN -> None for JSON; nested lists for 2-D input
+    rounded = np.round(values, decimals).tolist()
+    if values.ndim == 1:
+        return [None if v != v else v for v in rounded]
+    return [[None if v != v else v for v in row] for row in rounded]
+
+# -- endpoint -----------------------------------------------------------------
+
+Scores = Dict[str, Tuple[Optional[str], float, float]]
+
+async def _refresh(tickers: List[str]) -> Tuple[List[str], Scores]:
+    """
+    Brings the requested rows up to date from cached or stored history (no
+    upstream calls). Returns the tickers without data, and (sector,
+    final_score, rsi) for the screener's index plus the requested tickers.
+    """
+    try:
+        histories, fresh_scores = await run_blocking(_read_and_score, tickers)
+    except Exception as e:
+        logger.error(f"Cross-section history read failed: {e!r}")
+        histories, fresh_scores = {}, {}
+    scores: Scores = {t: (e.sector, e.final_score, e.rsi) for t, e in screen_index.entries.items()}
+    scores.update(fresh_scores)
+    missing = []
+    for ticker in tickers:
+        history = histories.get(ticker)
+        if history is None:
+            if ticker not in return_matrix:
+                missing.append(ticker)
+            continue
+        return_matrix.update(ticker, history)
+    return missing, scores
+
+def _read_and_score(tickers: List[str]) -> Tuple[Dict[str, PriceHistory], Scores]:
+    """Runs in the executor: the local history reads, indicators and sentiment lookup are all blocking."""
+    histories = cached_price_histories(tickers)
+    scores: Scores = {}
+    for ticker, history in histories.items():
+        try:
+            entry = screen_index.score(ticker, history)
+        except Exception as e:
+            logger.warning(f"Cross-section scoring failed for {ticker}: {e!r}")
+            continue
+        scores[ticker] = (entry.sector, entry.final_score, entry.rsi)
+    return histories, scores
+
+@time_execution("cross_section")
+def _compute(present: List[str], returns: np.ndarray, dates: List[str], benchmark: np.ndarray,
+             window: int, beta_window: int, beta_points: int, with_correlation: bool, scores: Scores) -> Dict[str, Any]:
+    corr_window = returns[:, -window:]
+    observations = np.isfinite(corr_window).sum(axis=1)
+    correlation = _nullable(pairwise_correlation(corr_window), 4) if with_correlation else None
+
+    beta_span = beta_window + beta_points - 1
+    betas = rolling_beta(returns[:, -beta_span:], benchmark[-beta_span:], beta_window)
+    latest_beta = betas[:, -1] if betas.shape[1] else np.full(len(present), np.nan)
+
+    # z-scores over the whole scored cross-section, reported for the requested tickers
+    universe = list(scores)
+    sectors = [scores[t][0] for t in universe]
+    position = {t: i for i, t in enumerate(universe)}
+    score_z = sector_zscores(np.array([scores[t][1] for t in universe]), sectors)
+    rsi_z = sector_zscores(np.array([scores[t][2] for t in universe]), sectors)
+
+    rows = []
+    for i, ticker in enumerate(present):
+        k = position.get(ticker)
+        sector, final_score, rsi = scores[ticker] if k is not None else (None, None, None)
+        rows.append(CrossSectionTicker.model_construct(
+            ticker=ticker,
+            sector=sector,
+            observations=int(observations[i]),
+            beta=None if np.isnan(latest_beta[i]) else round(float(latest_beta[i]), 4),
+            final_score=final_score,
+            rsi=rsi,
+            final_score_z=None if k is None or np.isnan(score_z[k]) else round(float(score_z[k]), 3),
+            rsi_z=None if k is None or np.isnan(rsi_z[k]) else round(float(rsi_z[k]), 3),
+        ))
+    beta_dates = dates[-betas.shape[1]:] if betas.shape[1] else []
+    return {
+        "tickers": rows,
+        "correlation": correlation,
+        "rolling_beta": RollingBeta.model_construct(
+            dates=beta_dates, values={t: _nullable(betas[i], 4) for i, t in enumerate(present)}
+        ),
+    }
+
+async def analyze_cross_section(tickers: List[str], benchmark: str = CROSS_SECTION_BENCHMARK,
+                                window: int = CROSS_SECTION_DAYS, beta_window: int = CROSS_SECTION_BETA_WINDOW,
+                                beta_points: int = 20, with_correlation: bool = True) -> CrossSectionResponse:
+    """
+    Correlation matrix, rolling beta against `benchmark` (last `beta_points`
+    values) and sector-relative z-scores of final_score and RSI for `tickers`.
+    Only rows whose history changed since the last call are rebuilt; the
+    statistics run on the executor over a snapshot of the matrix.
+    """
+    missing, scores = await _refresh(list(dict.fromkeys(tickers + [benchmark])))
+    # Also covers a benchmark whose history is too short for a single return
+    if benchmark in missing or benchmark not in return_matrix:
+        raise ValueError(f"No price data found for benchmark {benchmark}")
+
+    columns = max(window, beta_window + beta_points - 1)
+    present, returns, dates = return_matrix.snapshot(tickers, columns)
+    _, benchmark_returns, _ = return_matrix.snapshot([benchmark], columns)
+    result = await run_blocking(
+        _compute, present, returns, dates, benchmark_returns[0], window, beta_window, beta_points, with_correlation, scores
+    )
+    return CrossSectionResponse.model_construct(
+        as_of=dates[-1] if dates else None,
+        benchmark=benchmark,
+        window=window,
+        beta_window=beta_window,
+        missing=[t for t in tickers if t in missing or t not in return_matrix],
+        **result,
+    )
@@ -1,70 +1,235 @@
+import asyncio
 from datetime import datetime
 import pandas as pd
-from typing import List, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 import logging
 
 from models.schemas import (
-    AnalysisResponse, Signal, DataQuality, FactorContribution, 
-    TradeSignal, Fundamentals, TechnicalIndicators, SentimentAnalysis, PricePoint
+    AnalysisResponse, DataQuality, FactorContribution, 
+    TradeSignal, Fundamentals, TechnicalIndicators, SentimentAnalysis, PricePoint, PriceSeries
 )
-from indicators.technical import (
-    calculate_rsi, calculate_macd, calculate_atr, calculate_adx
+from indicators.incremental import HistoryLike, IndicatorState
+from models.price_history import as_price_history
+from scoring import factors as factors_model
+from sources.yfinance_client import get_price_history, get_price_histories, get_fundamentals
+from sources.news_scraper import get_news_sentiment, SOURCE_GOOGLE
+from services.cache import market_cache, cache_key
+from services.executor import run_blocking
+from utils.config import (
+    PRICE_FETCH_TIMEOUT, FUNDAMENTALS_FETCH_TIMEOUT, FUNDAMENTALS_GRACE, NEWS_FETCH_TIMEOUT,
+    BATCH_PRICE_FETCH_TIMEOUT, BATCH_NEWS_CONCURRENCY, INDICATOR_STATE_TTL, ANALYSIS_BARS
 )
-from sources.yfinance_client import get_stock_data
-from sources.news_scraper import get_news_sentiment
-from utils.logging_utils import get_request_id
+from utils.logging_utils import get_request_id, time_execution
 
 logger = logging.getLogger("TradePulse.Scoring")
 
-async def analyze_ticker(ticker: str) -> AnalysisResponse:
+def _neutral_sentiment() -> SentimentAnalysis:
+    return SentimentAnalysis(score_normalized=50.0, raw_vader=0.0, headline_count=0, top_headlines=[])
+
+def _start_fundamentals(ticker: str, include: bool) -> Optional[asyncio.Task]:
+    if not include:
+        return None
+    return asyncio.ensure_future(asyncio.wait_for(get_fundamentals(ticker), FUNDAMENTALS_FETCH_TIMEOUT))
+
+async def _collect_fundamentals(ticker: str, task: Optional[asyncio.Task], timed_out_stages: List[str], degraded_stages: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Fundamentals are best effort and change slowly, so they never hold up a
+    response: once prices and news are in, the fetch gets FUNDAMENTALS_GRACE
+    more seconds. Past that the response goes out without them (flagged as
+    timed out, so it isn't cached) while the shared fetch carries on into the
+    cache for the next request. None when they weren't requested.
+    """
+    if task is None:
+        return None
+    done, _ = await asyncio.wait({task}, timeout=FUNDAMENTALS_GRACE)
+    if not done:
+        task.cancel() # only our wait; the single-flight fetch keeps running
+        timed_out_stages.append("fundamentals")
+        logger.info(f"Fundamentals for {ticker} still loading, responding without them")
+        return {}
+    try:
+        return dict(task.result())
+    except asyncio.TimeoutError:
+        timed_out_stages.append("fundamentals")
+        logger.warning(f"Fundamentals timed out for {ticker}")
+    except Exception as e:
+        degraded_stages.append("fundamentals")
+        logger.warning(f"Fundamentals unavailable for {ticker}: {e!r}")
+    return {}
+
+async def _fetch_news(ticker: str, timed_out_stages: List[str], degraded_stages: List[str],
+                      news_semaphore: Optional[asyncio.Semaphore] = None) -> SentimentAnalysis:
+    """News sentiment, degrading to neutral on failure or timeout."""
+    try:
+        if news_semaphore is None:
+            return await asyncio.wait_for(get_news_sentiment(ticker), NEWS_FETCH_TIMEOUT)
+        async with news_semaphore:
+            return await asyncio.wait_for(get_news_sentiment(ticker), NEWS_FETCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        timed_out_stages.append("news")
+        logger.warning(f"News sentiment timed out for {ticker}")
+    except Exception as e:
+        degraded_stages.append("news")
+        logger.warning(f"News sentiment unavailable for {ticker}: {e!r}")
+    return _neutral_sentiment()
+
+async def analyze_ticker(ticker: str, price_format: str = "rows", include_fundamentals: bool = True) -> AnalysisResponse:
     request_id = get_request_id()
     
     # 1. Fetch Data
+    # Price history, news and fundamentals are fetched concurrently. The yfinance
+    # calls are blocking, so they run on the bounded executor pool. Each stage has
+    # its own timeout; only price history is mandatory, and fundamentals are only
+    # waited for briefly (see _collect_fundamentals).
+    fundamentals_task = _start_fundamentals(ticker, include_fundamentals)
+    timed_out_stages: List[str] = []
+    degraded_stages: List[str] = []
+    history_res, sentiment = await asyncio.gather(
+        asyncio.wait_for(get_price_history(ticker), PRICE_FETCH_TIMEOUT),
+        _fetch_news(ticker, timed_out_stages, degraded_stages),
+        return_exceptions=True,
+    )
+    if isinstance(history_res, BaseException):
+        if fundamentals_task is not None:
+            fundamentals_task.cancel()
+        logger.error(f"Failed to fetch price data for {ticker}: {history_res!r}")
+        raise history_res
+    if isinstance(sentiment, BaseException):
+        raise sentiment
+
+    fundamentals_dict = await _collect_fundamentals(ticker, fundamentals_task, timed_out_stages, degraded_stages)
+    return build_analysis(ticker, history_res, fundamentals_dict, sentiment, timed_out_stages, request_id, price_format,
+                          degraded_stages=degraded_stages)
+
+async def analyze_batch(tickers: List[str], price_format: str = "rows", include_fundamentals: bool = True) -> AsyncIterator[Tuple[str, Union[AnalysisResponse, Exception]]]:
+    """
+    Analyzes a watchlist. OHLCV for all tickers comes from one bulk download,
+    news scrapes run with bounded concurrency, and results are yielded as each
+    ticker completes. Per-ticker failures are yielded as exceptions so one bad
+    ticker never fails the batch.
+    """
+    request_id = get_request_id()
     try:
-        history, fundamentals_dict = get_stock_data(ticker)
-        sentiment = await get_news_sentiment(ticker)
+        histories = await run_blocking(get_price_histories, tickers, timeout=BATCH_PRICE_FETCH_TIMEOUT)
     except Exception as e:
-        logger.error(f"Failed to fetch data for {ticker}: {e}")
-        # In production this should be handled more gracefully, 
-        # possibly returning a partial response or a specific error code.
-        raise e
+        logger.error(f"Bulk price download failed: {e!r}")
+        histories = {t: e for t in tickers}
+
+    news_semaphore = asyncio.Semaphore(BATCH_NEWS_CONCURRENCY)
+
+    async def analyze_one(ticker: str) -> Tuple[str, Union[AnalysisResponse, Exception]]:
+        history = histories.get(ticker)
+        if history is None:
+            return ticker, ValueError(f"No price data found for {ticker}")
+        if isinstance(history, Exception):
+            return ticker, history
+        try:
+            fundamentals_task = _start_fundamentals(ticker, include_fundamentals)
+            timed_out_stages: List[str] = []
+            degraded_stages: List[str] = []
+            sentiment = await _fetch_news(ticker, timed_out_stages, degraded_stages, news_semaphore)
+            fundamentals_dict = await _collect_fundamentals(ticker, fundamentals_task, timed_out_stages, degraded_stages)
+            return ticker, build_analysis(ticker, history, fundamentals_dict, sentiment, timed_out_stages, request_id, price_format,
+                                          degraded_stages=degraded_stages)
+        except Exception as e:
+            logger.warning(f"Batch analysis failed for {ticker}: {e!r}")
+            return ticker, e
+
+    tasks = [asyncio.ensure_future(analyze_one(t)) for t in tickers]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away mid-stream: don't leave scrapes running
+        for task in tasks:
+            task.cancel()
+
+@time_execution("indicators")
+def latest_indicators(ticker: str, history: HistoryLike) -> Dict[str, float]:
+    """
+    Latest RSI/MACD/ATR/ADX values from the ticker's cached IndicatorState,
+    always over the last ANALYSIS_BARS bars, so values don't depend on how much
+    history the store or cache happened to hold. Revised bars within the window
+    only cost those bars; the state is rebuilt from scratch when it is missing
+    or no longer lines up. The key carries the window's fingerprint, so state
+    built from another series (a re-adjusted history, yesterday's window, a
+    test fixture) is never picked up.
+    """
+    history = as_price_history(history).tail(ANALYSIS_BARS)
+    key = cache_key("indicators", ticker, history.fingerprint())
+    cached_state = market_cache.get(key)
+    state = None
+    if cached_state is not None:
+        try:
+            state = IndicatorState.from_dict(cached_state)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Discarding indicator state for {ticker}: {e}")
+
+    if state is None:
+        synced = IndicatorState.from_history(history)
+    else:
+        synced = state.sync(history)
+    if synced is not state or synced.revision != cached_state["revision"]:
+        market_cache.set(key, synced.to_dict(), INDICATOR_STATE_TTL)
+    return synced.values()
+
+@time_execution("scoring")
+def build_analysis(
+    ticker: str,
+    history: HistoryLike,
+    fundamentals_dict: Optional[Dict[str, Any]],
+    sentiment: SentimentAnalysis,
+    timed_out_stages: List[str],
+    request_id: str,
+    price_format: str = "rows",
+    indicators: Optional[Dict[str, float]] = None,
+    degraded_stages: Optional[List[str]] = None,
+) -> AnalysisResponse:
+    """
+    Runs indicators and the factor model over already-fetched data.
+    price_format "columnar" returns the 3mo history as parallel date/price
+    arrays (price_history_columnar) instead of one object per day.
+    `fundamentals_dict` None means they weren't requested (fundamentals=None).
+    `indicators` are precomputed values that bypass the cached IndicatorState
+    (the startup warm-up uses this to stay out of the cache).
+    `degraded_stages` are stages that failed and fell back to a neutral default.
+    """
+    history = as_price_history(history)
+    # Latest bar, not stock.info: fundamentals are cached for a day
+    current_price = history.last_close
+    if fundamentals_dict is None:
+        fundamentals, missing_fields = None, []
+    else:
+        fundamentals = Fundamentals(**{f: fundamentals_dict.get(f) for f in Fundamentals.model_fields})
+        missing_fields = [f for f in Fundamentals.model_fields if fundamentals_dict.get(f) is None]
 
     # 2. Calculate Technicals
-    rsi = calculate_rsi(history['Close'])
-    macd_line, signal_line, hist = calculate_macd(history['Close'])
-    atr = calculate_atr(history['High'], history['Low'], history['Close'])
-    adx = calculate_adx(history['High'], history['Low'], history['Close'])
+    if indicators is None:
+        indicators = latest_indicators(ticker, history)
+    rsi = indicators["rsi"] if not pd.isna(indicators["rsi"]) else 50.0
+    macd_line, signal_line, hist = indicators["macd_line"], indicators["signal_line"], indicators["histogram"]
+    atr, adx = indicators["atr"], indicators["adx"]
     
     # 3. Factor Scoring Model (0-100 Scale)
     factors: List[FactorContribution] = []
     
     # Factor A: Momentum (RSI) - weight 25%
     # Bullish if RSI < 30 (Oversold), Bearish if > 70
-    rsi_score = 50
-    if rsi < 30: rsi_score = 100 # Strong Bullish
-    elif rsi < 40: rsi_score = 75
-    elif rsi > 70: rsi_score = 0 # Strong Bearish
-    elif rsi > 60: rsi_score = 25
+    rsi_score = float(factors_model.rsi_score(rsi))
     
     factors.append(FactorContribution(
         factor_name="Momentum (RSI)",
-        score_impact=rsi_score * 0.25,
+        score_impact=rsi_score * factors_model.RSI_WEIGHT,
         reason=f"RSI is {rsi:.1f} ({'Oversold' if rsi<30 else 'Overbought' if rsi>70 else 'Neutral'})"
     ))
 
     # Factor B: Trend (MACD + ADX) - weight 35%
     # Bullish if MACD > Signal. Amplified if ADX > 25 (Strong Trend)
-    trend_score = 50
-    if macd_line > signal_line:
-        trend_score = 75
-        if adx > 25: trend_score = 100
-    else:
-        trend_score = 25
-        if adx > 25: trend_score = 0
+    trend_score = float(factors_model.trend_score(macd_line, signal_line, adx))
     
     factors.append(FactorContribution(
         factor_name="Trend (MACD+ADX)",
-        score_impact=trend_score * 0.35,
+        score_impact=trend_score * factors_model.TREND_WEIGHT,
         reason=f"MACD {'Bullish' if macd_line > signal_line else 'Bearish'} Cross, ADX {adx:.1f}"
     ))
 
@@ -72,39 +237,38 @@ async def analyze_ticker(ticker: str) -> AnalysisResponse:
     sent_score = sentiment.score_normalized
     factors.append(FactorContribution(
         factor_name="Market Sentiment",
-        score_impact=sent_score * 0.40,
+        score_impact=sent_score * factors_model.SENTIMENT_WEIGHT,
         reason=f"VADER Score: {sentiment.raw_vader:.2f} from {sentiment.headline_count} headlines"
     ))
 
-    # 4. Final Aggregation
-    final_score = (rsi_score * 0.25) + (trend_score * 0.35) + (sent_score * 0.40)
-    
-    # Generate Signal Label
-    if final_score >= 80: sig_label = Signal.STRONG_BUY
-    elif final_score >= 60: sig_label = Signal.BUY
-    elif final_score <= 20: sig_label = Signal.STRONG_SELL
-    elif final_score <= 40: sig_label = Signal.SELL
-    else: sig_label = Signal.HOLD
+    # 4. Final Aggregation (rules shared with the backtest, see scoring/factors.py)
+    final_score = float(factors_model.final_score(rsi_score, trend_score, sent_score))
+    sig_label = factors_model.SIGNAL_LABELS[int(factors_model.signal_bucket(final_score))]
     
     # Confidence: Higher if factors align (low variance between factor sources)
     # Simple proxy: if score is extreme, confidence is high.
-    confidence = abs(final_score - 50) + 50 # 50 to 100 roughly
+    confidence = float(factors_model.confidence(final_score))
     
     # 5. Construct Response
     
     # prepare 3mo history
-    history_3mo = history.tail(90).reset_index()
-    price_points = [
-        PricePoint(date=row['Date'].strftime('%Y-%m-%d'), price=round(row['Close'], 2))
-        for _, row in history_3mo.iterrows()
-    ]
+    history_3mo = history.tail(90)
+    dates = history_3mo.date_strings()
+    prices = [round(p, 2) for p in history_3mo.close.tolist()]
+    if price_format == "columnar":
+        price_points = []
+        price_columns = PriceSeries.model_construct(dates=dates, prices=prices)
+    else:
+        # Trusted, already-typed values: skip per-row validation
+        price_points = [PricePoint.model_construct(date=d, price=p) for d, p in zip(dates, prices)]
+        price_columns = None
     
     return AnalysisResponse(
         request_id=request_id,
         ticker=ticker,
         timestamp=datetime.now(),
-        current_price=fundamentals_dict.get("current_price"),
-        fundamentals=Fundamentals(**fundamentals_dict),
+        current_price=current_price,
+        fundamentals=fundamentals,
         technical_analysis=TechnicalIndicators(
             rsi=rsi, macd_line=macd_line, signal_line=signal_line, histogram=hist,
             atr=atr, adx=adx,
@@ -120,7 +284,11 @@ async def analyze_ticker(ticker: str) -> AnalysisResponse:
         data_quality=DataQuality(
             price_coverage="1Y Daily OHLCV",
             news_coverage=f"{sentiment.headline_count} Sources",
-            is_fallback_used=False # TODO: wiring this from news scraper return
+            missing_fields=missing_fields,
+            is_fallback_used=sentiment.news_source == SOURCE_GOOGLE,
+            timed_out_stages=timed_out_stages,
+            degraded_stages=degraded_stages or []
         ),
-        price_history=price_points
+        price_history=price_points,
+        price_history_columnar=price_columns
     )
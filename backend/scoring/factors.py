@@ -0,0 +1,39 @@
+import numpy as np
+
+from models.schemas import Signal
+
+# Factor model shared by the live engine (one bar, scalars) and the backtest
+# (every bar, arrays). Each function works elementwise on floats or NumPy
+# arrays, so both paths score bars with exactly the same rules.
+
+RSI_WEIGHT = 0.25
+TREND_WEIGHT = 0.35
+SENTIMENT_WEIGHT = 0.40
+
+STRONG_TREND_ADX = 25
+
+# Signal buckets in ascending order; signal_bucket returns indices into this
+SIGNAL_LABELS = (Signal.STRONG_SELL, Signal.SELL, Signal.HOLD, Signal.BUY, Signal.STRONG_BUY)
+# +1 = expects the price to rise, -1 = to fall, 0 = no call
+SIGNAL_DIRECTIONS = (-1, -1, 0, 1, 1)
+
+def rsi_score(rsi):
+    """Momentum (RSI): bullish when oversold (< 30), bearish when overbought (> 70)."""
+    return np.select([rsi < 30, rsi < 40, rsi > 70, rsi > 60], [100.0, 75.0, 0.0, 25.0], 50.0)
+
+def trend_score(macd_line, signal_line, adx):
+    """Trend (MACD + ADX): bullish if MACD > signal, amplified when ADX > 25."""
+    bullish = macd_line > signal_line
+    strong = adx > STRONG_TREND_ADX
+    return np.where(bullish, np.where(strong, 100.0, 75.0), np.where(strong, 0.0, 25.0))
+
+def final_score(rsi_s, trend_s, sentiment_s):
+    return (rsi_s * RSI_WEIGHT) + (trend_s * TREND_WEIGHT) + (sentiment_s * SENTIMENT_WEIGHT)
+
+def signal_bucket(final):
+    """Index into SIGNAL_LABELS for a final score."""
+    return np.select([final >= 80, final >= 60, final <= 20, final <= 40], [4, 3, 0, 1], 2)
+
+def confidence(final):
+    # Simple proxy: if score is extreme, confidence is high (50 to 100 roughly)
+    return np.abs(final - 50) + 50
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from models.price_history import PriceHistory, as_price_history
+from models.schemas import ScreenResult, ScreenResponse
+from scoring import factors as factors_model
+from scoring.engine import latest_indicators
+from services.cache import market_cache, cache_key
+from services.executor import run_blocking
+from services.prefetch import LeaderLock
+from sources.yfinance_client import cached_price_histories, get_price_histories
+from utils.config import (
+    SCREEN_UNIVERSE_FILE, SCREEN_REFRESH_INTERVAL, SCREEN_DEFAULT_LIMIT,
+    BATCH_MAX_TICKERS, BATCH_PRICE_FETCH_TIMEOUT, PREFETCH_STATE_DIR
+)
+
+logger = logging.getLogger("TradePulse.Screener")
+
+# Universe screener. A background job keeps an in-memory index of the latest
+# factor values for every ticker in the universe; GET /screen only filters and
+# sorts that index, so queries never touch Yahoo or the news sources.
+#
+# Refreshes are incremental: prices come through the bulk history path (cache,
+# then delta downloads into the OHLCV store), indicators from the per-ticker
+# IndicatorState, and a ticker is only re-scored when its last bar or cached
+# sentiment changed. Sentiment and sector are read from whatever the request
+# path has cached; the screener never scrapes news itself.
+#
+# Every gunicorn worker keeps its own index, but only the one holding the
+# host-wide screener lock (the prefetch leader lock, on its own file) downloads;
+# the others build their index from the history it leaves in the shared cache
+# and OHLCV store. Scoring runs on the executor and the results are applied to
+# the index on the event loop, so queries never see it half-updated.
+
+def load_universe(path: str = SCREEN_UNIVERSE_FILE) -> Dict[str, Optional[str]]:
+    """Ticker -> sector (None if not given) from a TICKER[,Sector] file."""
+    universe: Dict[str, Optional[str]] = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                ticker, _, sector = line.partition(",")
+                universe[ticker.strip().upper()] = sector.strip() or None
+    except FileNotFoundError:
+        logger.warning(f"Screener universe file not found: {path}")
+    return universe
+
+def _cached_sentiment(ticker: str) -> float:
+    sentiment = market_cache.get(cache_key("news", ticker))
+    return sentiment.score_normalized if sentiment is not None else 50.0
+
+def _cached_sector(ticker: str) -> Optional[str]:
+    fundamentals = market_cache.get(cache_key("fundamentals", ticker))
+    return fundamentals.get("sector") if fundamentals else None
+
+def score_entry(ticker: str, history: PriceHistory, sector: Optional[str], sentiment_score: float) -> ScreenResult:
+    indicators = latest_indicators(ticker, history)
+    rsi = indicators["rsi"] if not pd.isna(indicators["rsi"]) else 50.0
+    macd_line, signal_line, adx = indicators["macd_line"], indicators["signal_line"], indicators["adx"]
+    final = float(factors_model.final_score(
+        factors_model.rsi_score(rsi), factors_model.trend_score(macd_line, signal_line, adx), sentiment_score
+    ))
+    return ScreenResult(
+        ticker=ticker,
+        sector=sector,
+        price=history.last_close,
+        signal=factors_model.SIGNAL_LABELS[int(factors_model.signal_bucket(final))],
+        final_score=final,
+        rsi=rsi,
+        adx=adx,
+        macd_bullish=bool(macd_line > signal_line),
+        sentiment_score=sentiment_score,
+        as_of=history.day(-1),
+    )
+
+class ScreenIndex:
+    """
+    Latest factor values per universe ticker. With `state_dir` only the process
+    holding the screener lock there downloads prices (see above); None means
+    this process is alone.
+    """
+
+    def __init__(self, universe: Dict[str, Optional[str]], state_dir: Optional[str] = None):
+        self.universe = universe
+        self._leader = LeaderLock(os.path.join(state_dir, "screener.lock")) if state_dir else None
+        self.entries: Dict[str, ScreenResult] = {}
+        # (last bar epoch day, last close, sentiment) each entry was scored from
+        self._inputs: Dict[str, Tuple[int, float, float]] = {}
+        self.updated_at: Optional[datetime] = None
+        self.counters = {"refreshes": 0, "rescored": 0, "unchanged": 0, "failed": 0}
+        self._task: Optional[asyncio.Task] = None
+        # Called with (ticker, history) for every history a refresh loads
+        # (the cross-sectional return matrix keeps itself current this way)
+        self.history_listeners: List[Callable[[str, PriceHistory], Any]] = []
+
+    def _score_inputs(self, ticker: str, history: PriceHistory) -> Tuple[int, float, float]:
+        return int(history.days[-1]), history.last_close, _cached_sentiment(ticker)
+
+    def _rescore(self, ticker: str, history: PriceHistory) -> Optional[Tuple[ScreenResult, Tuple[int, float, float]]]:
+        """A new (entry, inputs) if the inputs changed since `ticker` was indexed, else None. Doesn't touch the index."""
+        history = as_price_history(history)
+        inputs = self._score_inputs(ticker, history)
+        if self._inputs.get(ticker) == inputs:
+            return None
+        sector = self.universe.get(ticker) or _cached_sector(ticker)
+        return score_entry(ticker, history, sector, inputs[2]), inputs
+
+    def update(self, ticker: str, history: PriceHistory) -> bool:
+        """Re-scores `ticker` if its inputs changed. Returns True if it did."""
+        rescored = self._rescore(ticker, history)
+        if rescored is None:
+            return False
+        self.entries[ticker], self._inputs[ticker] = rescored
+        return True
+
+    def _rescore_all(self, histories: Dict[str, PriceHistory]) -> Dict[str, Any]:
+        """_rescore for a chunk (blocking: indicators and cached sentiment); failures map to the exception."""
+        results: Dict[str, Any] = {}
+        for ticker, history in histories.items():
+            try:
+                results[ticker] = self._rescore(ticker, history)
+            except Exception as e:
+                results[ticker] = e
+        return results
+
+    def score(self, ticker: str, history: PriceHistory) -> ScreenResult:
+        """The indexed entry if it is current for `history`, else a fresh score that is not indexed."""
+        history = as_price_history(history)
+        inputs = self._score_inputs(ticker, history)
+        if self._inputs.get(ticker) == inputs:
+            return self.entries[ticker]
+        return score_entry(ticker, history, self.universe.get(ticker) or _cached_sector(ticker), inputs[2])
+
+    def is_leader(self) -> bool:
+        """Takes the screener lock if it is free (the previous holder exited)."""
+        if self._leader is None:
+            return True
+        was_leader = self._leader.held
+        if self._leader.try_acquire() and not was_leader:
+            logger.info(f"Screener downloads now run in pid {os.getpid()}")
+        return self._leader.held
+
+    async def refresh(self):
+        tickers = list(self.universe)
+        # Followers only read what the leader left on the host (missing tickers are skipped)
+        leader = self.is_leader()
+        for start in range(0, len(tickers), BATCH_MAX_TICKERS):
+            chunk = tickers[start:start + BATCH_MAX_TICKERS]
+            try:
+                if leader:
+                    histories = await run_blocking(get_price_histories, chunk, timeout=BATCH_PRICE_FETCH_TIMEOUT)
+                else:
+                    histories = await run_blocking(cached_price_histories, chunk)
+            except Exception as e:
+                logger.error(f"Screener price refresh failed: {e!r}")
+                self.counters["failed"] += len(chunk)
+                continue
+            loaded = {}
+            for ticker, history in histories.items():
+                if isinstance(history, Exception) or history is None or history.empty:
+                    self.counters["failed"] += 1
+                    continue
+                loaded[ticker] = history
+            rescored = await run_blocking(self._rescore_all, loaded)
+            for ticker, history in loaded.items():
+                outcome = rescored[ticker]
+                if isinstance(outcome, Exception):
+                    logger.warning(f"Screener scoring failed for {ticker}: {outcome!r}")
+                    self.counters["failed"] += 1
+                elif outcome is None:
+                    self.counters["unchanged"] += 1
+                else:
+                    self.entries[ticker], self._inputs[ticker] = outcome
+                    self.counters["rescored"] += 1
+                for listener in self.history_listeners:
+                    try:
+                        listener(ticker, history)
+                    except Exception as e:
+                        logger.warning(f"History listener failed for {ticker}: {e!r}")
+            # Yield between chunks so request handlers keep running
+            await asyncio.sleep(0)
+        self.updated_at = datetime.now()
+        self.counters["refreshes"] += 1
+
+    def query(self, sectors: Sequence[str] = (), signals: Sequence[str] = (),
+              rsi_min: Optional[float] = None, rsi_max: Optional[float] = None,
+              adx_min: Optional[float] = None, adx_max: Optional[float] = None,
+              limit: int = SCREEN_DEFAULT_LIMIT) -> ScreenResponse:
+        sectors = {s.lower() for s in sectors}
+        signals = {s.upper() for s in signals}
+        matched = [
+            entry for entry in self.entries.values()
+            if (not sectors or (entry.sector or "").lower() in sectors)
+            and (not signals or entry.signal in signals)
+            and (rsi_min is None or entry.rsi >= rsi_min)
+            and (rsi_max is None or entry.rsi <= rsi_max)
+            and (adx_min is None or (not math.isnan(entry.adx) and entry.adx >= adx_min))
+            and (adx_max is None or (not math.isnan(entry.adx) and entry.adx <= adx_max))
+        ]
+        matched.sort(key=lambda entry: entry.final_score, reverse=True)
+        return ScreenResponse(
+            updated_at=self.updated_at,
+            universe_size=len(self.universe),
+            indexed=len(self.entries),
+            matched=len(matched),
+            results=matched[:limit],
+        )
+
+    def start(self, interval: float = SCREEN_REFRESH_INTERVAL):
+        self._task = asyncio.create_task(self._run(interval))
+        logger.info(f"Screener index started for {len(self.universe)} tickers (refresh every {interval:g}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._leader is not None:
+            self._leader.release()
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Screener refresh failed: {e!r}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "universe_size": len(self.universe),
+            "indexed": len(self.entries),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "leader": self._leader is None or self._leader.held,
+            **self.counters,
+        }
+
+screen_index = ScreenIndex(load_universe(), state_dir=PREFETCH_STATE_DIR)
@@ -0,0 +1,419 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from cachetools import LRUCache
+
+from services.executor import run_blocking
+from services.singleflight import SingleFlight
+from utils.config import (
+    CACHE_BACKEND, CACHE_L1_MAX_BYTES, CACHE_SQLITE_PATH, CACHE_SQLITE_MAX_ENTRIES,
+    PRICE_CACHE_TTL, PRICE_STALE_TTL, PRICE_STALE_IF_ERROR_TTL, PRICE_COALESCE,
+    FUNDAMENTALS_CACHE_TTL, FUNDAMENTALS_STALE_TTL, FUNDAMENTALS_STALE_IF_ERROR_TTL, FUNDAMENTALS_COALESCE,
+    NEWS_CACHE_TTL, NEWS_STALE_TTL, NEWS_STALE_IF_ERROR_TTL, NEWS_COALESCE
+)
+
+logger = logging.getLogger("TradePulse.Cache")
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters for one cache tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def incr(self, field: str, n: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+class CacheBackend:
+    """
+    Minimal key/value interface shared by all tiers.
+    Values are never None, so `get` returns None on a miss.
+    """
+    name = "base"
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Returns (expires_at, value) for a live entry, None on a miss."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    def local_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """get_entry limited to the in-process tier: never blocks on disk."""
+        return self.get_entry(key)
+
+    async def get_entry_async(self, key: str) -> Optional[Tuple[float, Any]]:
+        """get_entry for the event loop; tiers that block override it to use the executor."""
+        return self.get_entry(key)
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    async def set_async(self, key: str, value: Any, ttl: float):
+        self.set(key, value, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+class CountingLRUCache(LRUCache):
+    """LRUCache that counts capacity evictions into a CacheStats."""
+
+    def __init__(self, maxsize, stats: CacheStats, getsizeof: Optional[Callable[[Any], int]] = None):
+        super().__init__(maxsize, getsizeof)
+        self._stats = stats
+
+    def popitem(self):
+        item = super().popitem()
+        self._stats.incr("evictions")
+        return item
+
+ENTRY_OVERHEAD = 200 # key, expiry tuple and LRU bookkeeping, roughly
+
+def approximate_size(value: Any) -> int:
+    """Bytes a cached value holds: `nbytes` for array-backed values, else its pickled size."""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + ENTRY_OVERHEAD
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) + ENTRY_OVERHEAD
+    except Exception:
+        return 4096 + ENTRY_OVERHEAD
+
+class MemoryCache(CacheBackend):
+    """
+    Per-process LRU with per-entry expiry (the old TTLCache behaviour).
+    Bounded by entry count, or by bytes when `getsizeof` is given (it receives
+    the cached value); an entry larger than the whole bound is not kept.
+    """
+    name = "memory"
+
+    def __init__(self, maxsize: int, getsizeof: Optional[Callable[[Any], int]] = None):
+        self._stats = CacheStats()
+        self._sized = getsizeof is not None
+        self._data = CountingLRUCache(maxsize, self._stats, (lambda entry: getsizeof(entry[1])) if getsizeof else None)
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._data[key]
+                self._stats.incr("expirations")
+                entry = None
+        self._stats.incr("hits" if entry is not None else "misses")
+        return entry
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            try:
+                self._data[key] = (time.time() + ttl, value)
+            except ValueError:
+                # Too large to cache at all; don't keep serving the previous value
+                self._data.pop(key, None)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, currsize, maxsize = len(self._data), self._data.currsize, self._data.maxsize
+        if self._sized:
+            bounds = {"size": entries, "bytes": currsize, "max_bytes": maxsize}
+        else:
+            bounds = {"size": entries, "maxsize": maxsize}
+        return {"backend": self.name, **bounds, **self._stats.as_dict()}
+
+class SQLiteCache(CacheBackend):
+    """
+    On-disk cache shared by every worker on the host.
+    Values are pickled into a WAL-mode SQLite file, so gunicorn workers read each
+    other's fetches instead of all hitting Yahoo for the same ticker.
+    """
+    name = "sqlite"
+    PRUNE_EVERY = 50
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._stats = CacheStats()
+        self._local = threading.local()
+        self._sets = 0
+        self._prune_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not cross threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            row = self._conn().execute(
+                "SELECT expires_at, value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache read failed: {e}")
+            row = None
+        if row is None:
+            self._stats.incr("misses")
+            return None
+        try:
+            value = pickle.loads(row[1])
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+            self._stats.incr("misses")
+            return None
+        self._stats.incr("hits")
+        return row[0], value
+
+    def set(self, key: str, value: Any, ttl: float):
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)), time.time() + ttl),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache write failed: {e}")
+            return
+
+        with self._prune_lock:
+            self._sets += 1
+            due = self._sets % self.PRUNE_EVERY == 0
+        if due:
+            self._prune()
+
+    def _prune(self):
+        try:
+            conn = self._conn()
+            expired = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            evicted = conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache prune failed: {e}")
+            return
+        self._stats.incr("expirations", max(expired, 0))
+        self._stats.incr("evictions", max(evicted, 0))
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            size = self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            size = None
+        return {"backend": self.name, "path": self.path, "size": size, "maxsize": self.max_entries, **self._stats.as_dict()}
+
+class TieredCache(CacheBackend):
+    """
+    L1 (per-process memory) in front of L2 (shared). L2 hits are promoted to L1.
+    The async accessors check L1 on the event loop and only go to the executor
+    for L2 (sqlite I/O and unpickling).
+    """
+    name = "tiered"
+
+    def __init__(self, l1: CacheBackend, l2: CacheBackend):
+        self.l1 = l1
+        self.l2 = l2
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self.l1.get_entry(key)
+        if entry is not None:
+            return entry
+        entry = self.l2.get_entry(key)
+        if entry is not None:
+            self.l1.set(key, entry[1], entry[0] - time.time())
+        return entry
+
+    def local_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        return self.l1.get_entry(key)
+
+    async def get_entry_async(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self.l1.get_entry(key)
+        if entry is not None:
+            return entry
+        entry = await run_blocking(self.l2.get_entry, key)
+        if entry is not None:
+            self.l1.set(key, entry[1], entry[0] - time.time())
+        return entry
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.l1.set(key, value, ttl)
+        self.l2.set(key, value, ttl)
+
+    async def set_async(self, key: str, value: Any, ttl: float):
+        self.l1.set(key, value, ttl)
+        await run_blocking(self.l2.set, key, value, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"l1": self.l1.stats(), "l2": self.l2.stats()}
+
+def build_cache() -> CacheBackend:
+    l1 = MemoryCache(CACHE_L1_MAX_BYTES, getsizeof=approximate_size)
+    if CACHE_BACKEND == "memory":
+        return l1
+    if CACHE_BACKEND != "sqlite":
+        logger.warning(f"Unknown cache backend '{CACHE_BACKEND}', using sqlite")
+    return TieredCache(l1, SQLiteCache(CACHE_SQLITE_PATH, CACHE_SQLITE_MAX_ENTRIES))
+
+# Shared by the yfinance client and the news scraper
+market_cache = build_cache()
+
+def cache_stats() -> Dict[str, Any]:
+    stats = market_cache.stats()
+    # Single-tier setups still report per tier for a stable /health shape
+    return stats if "l1" in stats else {"l1": stats}
+
+def cache_key(namespace: str, *args) -> str:
+    return ":".join([namespace, *map(str, args)])
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Freshness rules for one data type.
+    ttl: how long an entry is fresh.
+    stale_ttl: how long after that it may still be served while one background
+        refresh runs (stale-while-revalidate). 0 disables it.
+    coalesce: concurrent misses for the same key share one fetch.
+    stale_if_error: how long after the stale window the entry is kept as a
+        fallback: it is refetched like a miss, but served if that fails.
+    """
+    ttl: float
+    stale_ttl: float = 0.0
+    coalesce: bool = True
+    stale_if_error: float = 0.0
+
+POLICIES: Dict[str, CachePolicy] = {
+    "history": CachePolicy(PRICE_CACHE_TTL, PRICE_STALE_TTL, PRICE_COALESCE, PRICE_STALE_IF_ERROR_TTL),
+    "fundamentals": CachePolicy(FUNDAMENTALS_CACHE_TTL, FUNDAMENTALS_STALE_TTL, FUNDAMENTALS_COALESCE, FUNDAMENTALS_STALE_IF_ERROR_TTL),
+    "news": CachePolicy(NEWS_CACHE_TTL, NEWS_STALE_TTL, NEWS_COALESCE, NEWS_STALE_IF_ERROR_TTL),
+}
+
+_flights = SingleFlight()
+# Called as listener(namespace, *args) after store() writes a new value, e.g. to
+# drop rendered responses built from the previous one. May run on executor threads.
+store_listeners: List[Callable[..., Any]] = []
+# Strong refs so background refreshes aren't garbage collected mid-flight
+_background: Set[asyncio.Task] = set()
+
+def _retention(namespace: str) -> float:
+    policy = POLICIES[namespace]
+    return policy.ttl + policy.stale_ttl + policy.stale_if_error
+
+def store(namespace: str, value: Any, *args):
+    """Writes a value using the namespace's policy (kept for ttl + stale_ttl + stale_if_error). Blocking; use store_async on the event loop."""
+    market_cache.set(cache_key(namespace, *args), value, _retention(namespace))
+    for listener in store_listeners:
+        listener(namespace, *args)
+
+async def store_async(namespace: str, value: Any, *args):
+    """store() with the shared-tier write done on the executor."""
+    await market_cache.set_async(cache_key(namespace, *args), value, _retention(namespace))
+    for listener in store_listeners:
+        listener(namespace, *args)
+
+def is_fresh(namespace: str, expires_at: float) -> bool:
+    policy = POLICIES[namespace]
+    return time.time() < expires_at - policy.stale_ttl - policy.stale_if_error
+
+def _servable_stale(namespace: str, expires_at: float) -> bool:
+    # Inside the stale-while-revalidate window
+    return time.time() < expires_at - POLICIES[namespace].stale_if_error
+
+async def get_or_fetch(
+    namespace: str,
+    *args,
+    loader: Callable[[], Awaitable[Any]],
+    should_cache: Callable[[Any], bool] = lambda value: True,
+    force: bool = False,
+) -> Any:
+    """
+    Cache-aside read with single-flight, stale-while-revalidate and
+    stale-if-error. Fresh hits return immediately; stale hits return
+    immediately and kick off one background refresh; misses await a (shared)
+    call to `loader`. Entries past the stale window are reloaded like misses,
+    but still served if the load fails or returns a value `should_cache`
+    rejects (e.g. the upstream's circuit is open).
+    `force` skips the cached value and awaits a load (used for refresh-ahead).
+    """
+    policy = POLICIES[namespace]
+    key = cache_key(namespace, *args)
+
+    async def load():
+        value = await loader()
+        if should_cache(value):
+            await store_async(namespace, value, *args)
+        return value
+
+    entry = None if force else await market_cache.get_entry_async(key)
+    if entry is not None:
+        expires_at, value = entry
+        if is_fresh(namespace, expires_at):
+            return value
+        if _servable_stale(namespace, expires_at):
+            if not _flights.inflight(key):
+                logger.info(f"Serving stale {key}, refreshing in background")
+                task = _flights.start(key, load)
+                _background.add(task)
+                task.add_done_callback(_background.discard)
+            return value
+
+    try:
+        fresh = await (_flights.do(key, load) if policy.coalesce else load())
+    except Exception as e:
+        if entry is None:
+            raise
+        logger.warning(f"Refetch of {key} failed ({e!r}), serving stale value")
+        return entry[1]
+    if entry is not None and not should_cache(fresh):
+        logger.warning(f"Refetch of {key} returned no usable data, serving stale value")
+        return entry[1]
+    return fresh
+
+def fresh_for(namespace: str, *args, local: bool = False) -> Optional[float]:
+    """
+    Seconds until the cached value stops being fresh (<= 0 once stale), None if
+    absent. Reads the shared tier too (blocking) unless `local` is set.
+    """
+    key = cache_key(namespace, *args)
+    entry = market_cache.local_entry(key) if local else market_cache.get_entry(key)
+    if entry is None:
+        return None
+    policy = POLICIES[namespace]
+    return entry[0] - policy.stale_ttl - policy.stale_if_error - time.time()
+
+def flight_stats() -> Dict[str, int]:
+    return _flights.stats()
@@ -0,0 +1,41 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+import logging
+
+from utils.config import YF_EXECUTOR_WORKERS
+
+logger = logging.getLogger("TradePulse.Executor")
+
+# yfinance is synchronous (requests under the hood), so every call goes through
+# this bounded pool instead of blocking the event loop.
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=YF_EXECUTOR_WORKERS, thread_name_prefix="tp-blocking")
+        logger.info(f"Started blocking I/O pool with {YF_EXECUTOR_WORKERS} workers")
+    return _executor
+
+async def run_blocking(func: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    Runs a blocking callable on the shared pool.
+    Raises asyncio.TimeoutError if it does not finish within `timeout` seconds
+    (the worker thread keeps running, but the caller is released).
+    The caller's context (request id, stage timings) carries over to the thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(get_executor(), partial(context.run, func, *args, **kwargs))
+    if timeout is None:
+        return await future
+    return await asyncio.wait_for(future, timeout)
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+
+from services.cache import CacheStats, CountingLRUCache
+from utils.config import HEADLINE_CACHE_SIZE, SENTIMENT_PROCESS_WORKERS, SENTIMENT_PROCESS_MIN_BATCH
+from utils.logging_utils import time_execution
+
+logger = logging.getLogger("TradePulse.Sentiment")
+
+# Per-headline VADER scores, shared across tickers and refreshes. The same
+# headlines recur for days in the RSS window and across related tickers, so most
+# lookups never reach the analyzer.
+#
+# vaderSentiment is imported and the analyzer (VADER lexicon parsing) built on
+# first use; under gunicorn the master builds it once before forking
+# (services/startup.py) and workers share it.
+
+_analyzer = None
+
+_stats = CacheStats()
+_cache = CountingLRUCache(HEADLINE_CACHE_SIZE, _stats)
+_cache_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+def normalize_headline(title: str) -> str:
+    # Whitespace only: VADER reads case ("GREAT" vs "great") and punctuation
+    # ("!") as intensity, so those must survive normalization.
+    return " ".join(unicodedata.normalize("NFC", title).split())
+
+def headline_key(title: str) -> str:
+    return hashlib.blake2b(normalize_headline(title).encode("utf-8"), digest_size=16).hexdigest()
+
+def get_analyzer():
+    """The shared vaderSentiment SentimentIntensityAnalyzer."""
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+def score_batch(titles: List[str]) -> List[float]:
+    """VADER compound scores for already-normalized titles (runs in pool processes too)."""
+    analyzer = get_analyzer()
+    return [analyzer.polarity_scores(title)["compound"] for title in titles]
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the parent is an asyncio worker with live threads
+        _pool = ProcessPoolExecutor(max_workers=SENTIMENT_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"Started sentiment process pool with {SENTIMENT_PROCESS_WORKERS} workers")
+    return _pool
+
+@time_execution("sentiment")
+async def score_headlines(titles: List[str]) -> List[float]:
+    """
+    Compound scores for `titles`, in order. Cached headlines are served from the
+    LRU; the uncached ones are scored as one batch, on the process pool when it
+    is enabled and the batch is large enough to be worth the IPC.
+    """
+    keys = [headline_key(t) for t in titles]
+    scores: Dict[str, float] = {}
+    with _cache_lock:
+        for key in keys:
+            if key in _cache:
+                scores[key] = _cache[key]
+    misses = sum(1 for key in keys if key not in scores)
+    _stats.incr("hits", len(keys) - misses)
+    _stats.incr("misses", misses)
+
+    todo: Dict[str, str] = {}
+    for key, title in zip(keys, titles):
+        if key not in scores:
+            todo.setdefault(key, normalize_headline(title))
+
+    if todo:
+        batch = list(todo.values())
+        if SENTIMENT_PROCESS_WORKERS > 0 and len(batch) >= SENTIMENT_PROCESS_MIN_BATCH:
+            computed = await asyncio.get_running_loop().run_in_executor(_get_pool(), score_batch, batch)
+        else:
+            computed = score_batch(batch)
+        fresh = dict(zip(todo.keys(), computed))
+        scores.update(fresh)
+        with _cache_lock:
+            _cache.update(fresh)
+
+    return [scores[key] for key in keys]
+
+def headline_cache_stats() -> Dict:
+    with _cache_lock:
+        size = _cache.currsize
+    return {"size": size, "maxsize": HEADLINE_CACHE_SIZE, **_stats.as_dict()}
+
+def shutdown_sentiment_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,169 @@
+import asyncio
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from models.schemas import AnalysisResponse
+from utils.config import LIVE_REFRESH_INTERVAL
+
+logger = logging.getLogger("TradePulse.Live")
+
+# Shared fan-out of live score updates.
+#
+# Every subscribed ticker gets exactly one refresh loop, however many clients
+# watch it. The loop re-runs the analysis every LIVE_REFRESH_INTERVAL, diffs it
+# against the previous result and hands only the changed fields to each
+# subscriber. Subscribers hold at most one pending message per ticker: if a
+# client falls behind, newer deltas are merged into the pending one, so a slow
+# consumer skips intermediate states instead of growing a queue.
+
+# Fields that change on every run without carrying information. The timestamp
+# rides along with real changes but does not trigger a delta on its own.
+_VOLATILE_FIELDS = ("request_id",)
+_TIMESTAMP_FIELD = "timestamp"
+
+def snapshot(result: AnalysisResponse) -> Dict[str, Any]:
+    data = result.model_dump(mode="json")
+    for field in _VOLATILE_FIELDS:
+        data.pop(field, None)
+    return data
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Changed keys of `new` relative to `old`, recursing into nested objects."""
+    delta = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            nested = diff(before, value)
+            if nested:
+                delta[key] = nested
+        elif key not in old or before != value:
+            delta[key] = value
+    return delta
+
+def merge(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Applies `delta` on top of `base` (inverse of diff), without mutating either."""
+    merged = dict(base)
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+class Subscriber:
+    """
+    One connected client. Holds the latest unsent message per ticker; `next`
+    waits for and returns the pending messages.
+    """
+
+    def __init__(self, tickers: List[str]):
+        self.tickers = tickers
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, ticker: str, message: Dict[str, Any]):
+        pending = self._pending.get(ticker)
+        if pending is not None:
+            self.dropped += 1
+            if pending["type"] in ("snapshot", "delta"):
+                if message["type"] == "error":
+                    # The pending state is still the latest good one
+                    return
+                if message["type"] == "delta":
+                    # Conflate: the client still converges on the latest state
+                    message = {**pending, "data": merge(pending["data"], message["data"])}
+        self._pending[ticker] = message
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Pending messages in push order; [] if nothing arrived within `timeout`."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        messages = list(self._pending.values())
+        self._pending.clear()
+        self._ready.clear()
+        return messages
+
+class _TickerFeed:
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.subscribers: Set[Subscriber] = set()
+        self.state: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.runs = 0
+
+class LiveHub:
+    """Owns the per-ticker refresh loops and their subscribers."""
+
+    def __init__(self, analyze: Callable[[str], Awaitable[AnalysisResponse]], interval: float = LIVE_REFRESH_INTERVAL):
+        self._analyze = analyze
+        self.interval = interval
+        self._feeds: Dict[str, _TickerFeed] = {}
+
+    def subscribe(self, tickers: List[str]) -> Subscriber:
+        subscriber = Subscriber(tickers)
+        for ticker in tickers:
+            feed = self._feeds.get(ticker)
+            if feed is None:
+                feed = self._feeds[ticker] = _TickerFeed(ticker)
+            feed.subscribers.add(subscriber)
+            if feed.state is not None:
+                # Late joiner: start from the current state
+                subscriber.push(ticker, {"type": "snapshot", "ticker": ticker, "data": feed.state})
+            if feed.task is None:
+                # Fresh context: the loop outlives the request that started it
+                feed.task = contextvars.Context().run(asyncio.create_task, self._run(feed))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for ticker in subscriber.tickers:
+            feed = self._feeds.get(ticker)
+            if feed is None:
+                continue
+            feed.subscribers.discard(subscriber)
+            if not feed.subscribers:
+                # Last viewer gone: stop the loop and forget the state
+                if feed.task is not None:
+                    feed.task.cancel()
+                del self._feeds[ticker]
+
+    async def _run(self, feed: _TickerFeed):
+        while feed.subscribers:
+            try:
+                current = snapshot(await self._analyze(feed.ticker))
+                if feed.state is None:
+                    message = {"type": "snapshot", "ticker": feed.ticker, "data": current}
+                else:
+                    changed = diff(feed.state, current)
+                    has_news = bool(changed.keys() - {_TIMESTAMP_FIELD})
+                    message = {"type": "delta", "ticker": feed.ticker, "data": changed} if has_news else None
+                feed.state = current
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Live refresh failed for {feed.ticker}: {e!r}")
+                message = {"type": "error", "ticker": feed.ticker, "error": str(e) if isinstance(e, ValueError) else "Refresh failed"}
+            feed.runs += 1
+            if message is not None:
+                for subscriber in list(feed.subscribers):
+                    subscriber.push(feed.ticker, message)
+            await asyncio.sleep(self.interval)
+
+    async def close(self):
+        tasks = [feed.task for feed in self._feeds.values() if feed.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._feeds.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        subscribers = {s for feed in self._feeds.values() for s in feed.subscribers}
+        return {
+            "tickers": len(self._feeds),
+            "subscribers": len(subscribers),
+            "dropped_updates": sum(s.dropped for s in subscribers),
+        }
@@ -0,0 +1,283 @@
+import asyncio
+import glob
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError: # not POSIX: no cross-process lock, every process leads
+    fcntl = None
+
+from services.cache import POLICIES, fresh_for
+from services.executor import run_blocking
+from utils.config import (
+    PREFETCH_INTERVAL, PREFETCH_LEAD, PREFETCH_TOP_K, PREFETCH_MIN_SCORE, PREFETCH_HALF_LIFE,
+    PREFETCH_MAX_TRACKED, PREFETCH_FETCH_BUDGET, PREFETCH_CONCURRENCY, PREFETCH_FETCH_TIMEOUT,
+    PREFETCH_WARM_TICKERS, PREFETCH_STATE_DIR
+)
+
+logger = logging.getLogger("TradePulse.Prefetch")
+
+# Refresh-ahead for popular tickers. Request handlers record every ticker they
+# serve; a background loop periodically takes the hottest ones and refreshes
+# their price/fundamentals/news entries shortly before they stop being fresh,
+# so popular tickers never pay the upstream latency on the request path.
+# Refreshes go through the normal cache accessors (force=True), so they share
+# single-flight with concurrent requests and land in the shared cache.
+#
+# Every gunicorn worker runs the loop, but only the one holding the host-wide
+# leader lock (a file lock under PREFETCH_STATE_DIR, released by the OS when
+# its holder exits) refreshes anything, so the fetch budget is per host, not
+# per worker. Workers publish their hottest tickers to the same directory
+# each cycle and the leader ranks the sum, so it still sees all the traffic.
+
+Refresher = Callable[[str], Awaitable[Any]]
+
+class PopularityTracker:
+    """
+    Exponentially decayed request counts per ticker. Scores are stored
+    relative to a fixed epoch (score * 2^(t/half_life)) so recording is O(1)
+    and no periodic decay pass is needed.
+    """
+
+    def __init__(self, half_life: float = PREFETCH_HALF_LIFE, max_tracked: int = PREFETCH_MAX_TRACKED):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self._epoch = time.time()
+        self._scores: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _growth(self, now: float) -> float:
+        return math.pow(2.0, (now - self._epoch) / self.half_life)
+
+    def record(self, ticker: str, weight: float = 1.0, now: Optional[float] = None):
+        growth = self._growth(time.time() if now is None else now)
+        with self._lock:
+            self._scores[ticker] = self._scores.get(ticker, 0.0) + weight * growth
+            if len(self._scores) > self.max_tracked:
+                # Forget the coldest quarter in one go
+                keep = heapq.nlargest(self.max_tracked * 3 // 4, self._scores.items(), key=lambda item: item[1])
+                self._scores = dict(keep)
+            if growth > 1e100:
+                self._rebase(growth)
+
+    def _rebase(self, growth: float):
+        # Keep the stored (scaled) scores in float range on long-running workers
+        self._scores = {ticker: score / growth for ticker, score in self._scores.items()}
+        self._epoch = time.time()
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """The `k` hottest tickers with their current decayed scores, hottest first."""
+        growth = self._growth(time.time() if now is None else now)
+        with self._lock:
+            hottest = heapq.nlargest(k, self._scores.items(), key=lambda item: item[1])
+        return [(ticker, score / growth) for ticker, score in hottest]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+class LeaderLock:
+    """Non-blocking exclusive lock on a file; at most one process on the host holds it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None or fcntl is None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.warning(f"Cannot open leader lock {self.path}: {e}")
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd) # drops the flock
+            self._fd = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None or fcntl is None
+
+class PrefetchScheduler:
+    """
+    Background refresh-ahead loop. `refreshers` maps a cache namespace
+    ("history", "fundamentals", "news") to a coroutine function that
+    force-refreshes that namespace for one ticker. With `state_dir` only the
+    process holding the leader lock there refreshes (see above); None means
+    this process is alone.
+    """
+
+    def __init__(self, tracker: PopularityTracker, interval: float = PREFETCH_INTERVAL, lead: float = PREFETCH_LEAD,
+                 top_k: int = PREFETCH_TOP_K, min_score: float = PREFETCH_MIN_SCORE,
+                 budget_per_minute: float = PREFETCH_FETCH_BUDGET, concurrency: int = PREFETCH_CONCURRENCY,
+                 state_dir: Optional[str] = None):
+        self.tracker = tracker
+        self.interval = interval
+        self.lead = lead
+        self.top_k = top_k
+        self.min_score = min_score
+        self.budget_per_minute = budget_per_minute
+        self.concurrency = concurrency
+        self.state_dir = state_dir
+        self._leader = LeaderLock(os.path.join(state_dir, "leader.lock")) if state_dir else None
+        self._refreshers: Dict[str, Refresher] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Budget carries over (up to one minute's worth) when cycles underspend
+        self._allowance = 0.0
+        self.counters = {"cycles": 0, "refreshed": 0, "failed": 0, "skipped_budget": 0, "warmed": 0}
+
+    def start(self, refreshers: Dict[str, Refresher], warm_tickers: List[str] = PREFETCH_WARM_TICKERS):
+        self._refreshers = dict(refreshers)
+        self._task = asyncio.create_task(self._run(list(warm_tickers)))
+        logger.info(f"Prefetch scheduler started (top {self.top_k}, {self.budget_per_minute:g} fetches/min, {len(warm_tickers)} warm tickers)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._leader is not None:
+            self._leader.release()
+        if self.state_dir:
+            try:
+                os.remove(self._published_path())
+            except OSError:
+                pass
+
+    def is_leader(self) -> bool:
+        """Takes the leader lock if it is free (the previous leader exited)."""
+        if self._leader is None:
+            return True
+        was_leader = self._leader.held
+        if self._leader.try_acquire() and not was_leader:
+            logger.info(f"Prefetch leader is now pid {os.getpid()}")
+        return self._leader.held
+
+    async def _run(self, warm_tickers: List[str]):
+        # Warm tickers are fetched once per host, by the first leader
+        if warm_tickers and self.is_leader():
+            await self.warm_up(warm_tickers)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.publish()
+                if self.is_leader():
+                    await self.run_cycle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Prefetch cycle failed: {e!r}")
+
+    def _published_path(self, pid: Optional[int] = None) -> str:
+        return os.path.join(self.state_dir, f"popularity-{os.getpid() if pid is None else pid}.json")
+
+    def publish(self):
+        """Writes this process's hottest tickers for the leader to merge."""
+        if not self.state_dir:
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._published_path()
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"at": time.time(), "scores": dict(self.tracker.top(self.top_k))}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def hottest(self) -> List[Tuple[str, float]]:
+        """Top tickers by popularity summed over this process and the other workers' published scores."""
+        totals = dict(self.tracker.top(self.top_k))
+        if self.state_dir:
+            cutoff = time.time() - 3 * self.interval
+            for path in glob.glob(os.path.join(self.state_dir, "popularity-*.json")):
+                if path == self._published_path():
+                    continue
+                try:
+                    with open(path) as f:
+                        published = json.load(f)
+                    if published["at"] < cutoff:
+                        os.remove(path) # left behind by an exited worker
+                        continue
+                except (OSError, ValueError, KeyError):
+                    continue
+                for ticker, score in published["scores"].items():
+                    totals[ticker] = totals.get(ticker, 0.0) + score
+        return heapq.nlargest(self.top_k, totals.items(), key=lambda item: item[1])
+
+    async def warm_up(self, tickers: List[str]):
+        """Fetches every namespace for `tickers` (outside the budget) and marks them popular."""
+        for ticker in tickers:
+            self.tracker.record(ticker, weight=self.min_score)
+        jobs = [(ticker, namespace) for ticker in tickers for namespace in self._refreshers]
+        self.counters["warmed"] += await self._refresh_all(jobs)
+        logger.info(f"Prefetch warm-up done for {len(tickers)} tickers")
+
+    def due(self) -> List[Tuple[str, str]]:
+        """(ticker, namespace) pairs that are missing or go stale within `lead`, hottest first."""
+        jobs = []
+        for ticker, score in self.hottest():
+            if score < self.min_score:
+                break
+            for namespace in self._refreshers:
+                remaining = fresh_for(namespace, ticker)
+                if remaining is None or remaining < min(self.lead, POLICIES[namespace].ttl):
+                    jobs.append((ticker, namespace))
+        return jobs
+
+    async def run_cycle(self) -> int:
+        self.counters["cycles"] += 1
+        self._allowance = min(self._allowance + self.budget_per_minute * self.interval / 60.0, self.budget_per_minute)
+        # Reads the shared cache and the other workers' files: off the event loop
+        jobs = await run_blocking(self.due)
+        allowed = jobs[:int(self._allowance)]
+        self.counters["skipped_budget"] += len(jobs) - len(allowed)
+        if not allowed:
+            return 0
+        self._allowance -= len(allowed)
+        return await self._refresh_all(allowed)
+
+    async def _refresh_all(self, jobs: List[Tuple[str, str]]) -> int:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(ticker: str, namespace: str) -> bool:
+            async with semaphore:
+                try:
+                    await asyncio.wait_for(self._refreshers[namespace](ticker), PREFETCH_FETCH_TIMEOUT)
+                    return True
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Prefetch of {namespace} for {ticker} failed: {e!r}")
+                    return False
+
+        results = await asyncio.gather(*[refresh(ticker, namespace) for ticker, namespace in jobs])
+        refreshed = sum(results)
+        self.counters["refreshed"] += refreshed
+        self.counters["failed"] += len(results) - refreshed
+        return refreshed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "leader": self._leader is None or self._leader.held,
+            "tracked": len(self.tracker),
+            "hottest": [{"ticker": t, "score": round(s, 2)} for t, s in self.tracker.top(5)],
+            **self.counters,
+        }
+
+popularity = PopularityTracker()
+scheduler = PrefetchScheduler(popularity, state_dir=PREFETCH_STATE_DIR)
@@ -0,0 +1,110 @@
+import threading
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from models.schemas import AnalysisResponse
+from services.cache import MemoryCache, cache_key, fresh_for, store_listeners
+from utils.config import RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAXSIZE
+from utils.logging_utils import span
+
+# Fully rendered AnalysisResponse bodies, keyed by ticker, price format and
+# whether fundamentals were included.
+# A hit skips indicators, the factor model, response validation and JSON
+# encoding; only the request_id is spliced into the cached bytes. request_id is
+# the model's first field, so the body is kept as everything after its value
+# and the id never has to be searched for (client-supplied ids can be any word,
+# e.g. "ticker").
+#
+# An entry never outlives the data it was built from: it expires when the
+# first of its history / news / fundamentals entries stops being fresh, and is
+# dropped as soon as a newer version of any of them is stored (background
+# revalidation, prefetch). Only complete responses are kept: nothing that was
+# built from stale data, hit a timeout, fell back or degraded a stage.
+
+PRICE_FORMATS = ("rows", "columnar")
+# Data a response is built from (cache namespaces keyed by ticker)
+SOURCES = ("history", "news", "fundamentals")
+
+_responses = MemoryCache(RESPONSE_CACHE_MAXSIZE)
+# Per-ticker count of source writes, to spot a store() racing a render
+_versions: Dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+def render(value: Any) -> bytes:
+    """JSON-encodes a model (or plain data) with pydantic-core's Rust encoder."""
+    with span("serialization"):
+        if isinstance(value, BaseModel):
+            return value.__pydantic_serializer__.to_json(value)
+        return to_json(value)
+
+def _key(ticker: str, price_format: str, include_fundamentals: bool) -> str:
+    return cache_key("response", ticker, price_format, int(include_fundamentals))
+
+def data_version(ticker: str) -> int:
+    """Taken before analyzing; store_rendered refuses the result if the data changed meanwhile."""
+    with _versions_lock:
+        return _versions.get(ticker, 0)
+
+def _invalidate(namespace: str, *args):
+    if namespace not in SOURCES or not args:
+        return
+    ticker = args[0]
+    with _versions_lock:
+        _versions[ticker] = _versions.get(ticker, 0) + 1
+    for price_format in PRICE_FORMATS:
+        for include_fundamentals in (False, True):
+            _responses.delete(_key(ticker, price_format, include_fundamentals))
+
+store_listeners.append(_invalidate)
+
+def is_complete(result: AnalysisResponse) -> bool:
+    quality = result.data_quality
+    return not (quality.timed_out_stages or quality.degraded_stages or quality.is_fallback_used)
+
+def _data_ttl(ticker: str, include_fundamentals: bool) -> Optional[float]:
+    """
+    Seconds until the first source entry stops being fresh; None if one isn't
+    cached. Runs on the event loop, so only this process's tier is read: the
+    analysis just went through get_or_fetch, which keeps its entries there.
+    """
+    remaining = []
+    for namespace in SOURCES:
+        if namespace == "fundamentals" and not include_fundamentals:
+            continue
+        seconds = fresh_for(namespace, ticker, local=True)
+        if seconds is None:
+            return None
+        remaining.append(seconds)
+    return min(remaining)
+
+_ID_PREFIX = b'{"request_id":'
+
+def get_rendered(ticker: str, price_format: str, request_id: str, include_fundamentals: bool = True) -> Optional[bytes]:
+    rest = _responses.get(_key(ticker, price_format, include_fundamentals))
+    if rest is None:
+        return None
+    return _ID_PREFIX + to_json(request_id) + rest
+
+def store_rendered(ticker: str, price_format: str, result: AnalysisResponse, body: bytes,
+                   include_fundamentals: bool = True, version: Optional[int] = None) -> bool:
+    """
+    Caches `body` (the rendered `result`) if it is complete and built from data
+    that is still fresh and unchanged since `version`. Returns whether it was kept.
+    """
+    if not is_complete(result):
+        return False
+    if version is not None and version != data_version(ticker):
+        return False
+    ttl = _data_ttl(ticker, include_fundamentals)
+    if ttl is None or min(ttl, RESPONSE_CACHE_TTL) <= 0:
+        return False
+    head = _ID_PREFIX + to_json(result.request_id)
+    if not body.startswith(head):
+        return False
+    _responses.set(_key(ticker, price_format, include_fundamentals), body[len(head):], ttl=min(ttl, RESPONSE_CACHE_TTL))
+    return True
+
+def response_cache_stats() -> Dict:
+    return _responses.stats()
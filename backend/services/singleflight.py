@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger("TradePulse.SingleFlight")
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight task.
+    Callers await a shielded view of the shared task, so a caller that times
+    out or disconnects does not cancel the fetch for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def start(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Returns the in-flight task for `key`, starting one if needed."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.shield(self.start(key, factory))
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so background-only tasks don't log "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"In-flight fetch for {key} failed: {task.exception()!r}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "coalesced": self.coalesced}
@@ -0,0 +1,159 @@
+import importlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.config import DATA_SOURCE_MODE, STARTUP_WARMUP
+
+logger = logging.getLogger("TradePulse.Startup")
+
+# Startup phases and readiness.
+#
+# Under gunicorn (gunicorn.conf.py) the master imports the app, preloads the
+# heavy modules and the VADER lexicon and runs the warm-up before forking, so
+# workers start with all of it already in copy-on-write shared memory and only
+# run their lifespan startup. Without a preloading master (plain uvicorn,
+# tests) the worker warms up itself, in the background, and /ready answers 503
+# until it is done. /ready also turns 503 again once shutdown begins.
+#
+# The warm-up is a dry run over synthetic data: incremental indicators, the
+# factor model, response validation and encoding, feed parsing and VADER. It
+# runs no threads and never touches the caches or the network, so it is safe
+# in the master before fork.
+#
+# Nothing heavy is imported at module level: main.py imports this first to
+# time its own imports.
+
+# Imported on first use by the modules that need them; preloading pulls them
+# into the master instead of each worker. Replay never calls yfinance.
+PRELOAD_MODULES = ("pandas", "numpy", "lxml.etree", "httpcore") + (("yfinance",) if DATA_SOURCE_MODE != "replay" else ())
+
+_origin = time.perf_counter()
+# (phase, seconds, pid that ran it)
+_phases: List[Tuple[str, float, int]] = []
+_preloaded = False
+_warmed = False
+_ready = False
+_ready_after: Optional[float] = None
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start, os.getpid()))
+
+def preload():
+    """Imports the heavy modules, builds the VADER analyzer and the TLS context (idempotent)."""
+    global _preloaded
+    if _preloaded:
+        return
+    with phase("preload"):
+        for name in PRELOAD_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logger.warning(f"Preload of {name} failed: {e}")
+        from services.headline_sentiment import get_analyzer
+        from sources.http_client import get_ssl_context
+        get_analyzer()
+        get_ssl_context()
+    _preloaded = True
+
+def _synthetic_history(bars: int = 252):
+    import numpy as np
+    from models.price_history import PriceHistory
+
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    spread = close * rng.uniform(0.002, 0.02, bars)
+    days = np.arange(bars, dtype=np.int64) + 19000
+    volume = rng.uniform(1e6, 5e6, bars)
+    return PriceHistory(days, *(column.astype(np.float32) for column in (close, close + spread, close - spread, close, volume)))
+
+_SAMPLE_RSS = (
+    b"<rss><channel><item><title>Shares rally after strong earnings beat</title>"
+    b"<link>https://example.com/a</link><source>Example</source></item></channel></rss>"
+)
+_SAMPLE_HTML = (
+    b"<html><body><ul><li class='js-stream-content'><h3>Analysts downgrade the stock on weak guidance</h3></li>"
+    b"</ul></body></html>"
+)
+
+def _dry_run():
+    from indicators.incremental import IndicatorState
+    from indicators.technical import compute_indicators
+    from models.schemas import SentimentAnalysis
+    from scoring.engine import build_analysis
+    from services.headline_sentiment import score_batch
+    from services.response_cache import render
+    from sources.news_scraper import parse_google_rss, parse_yahoo_html
+
+    history = _synthetic_history()
+    compute_indicators(history.close, history.high, history.low, history.volume)
+    indicators = IndicatorState.from_history(history).values()
+
+    titles = [item["title"] for item in parse_google_rss(_SAMPLE_RSS) + parse_yahoo_html(_SAMPLE_HTML)]
+    score = sum(score_batch(titles)) / len(titles)
+    sentiment = SentimentAnalysis(score_normalized=50 + 50 * score, raw_vader=score, headline_count=len(titles), top_headlines=[])
+    fundamentals = {"market_cap": 1e9, "pe_ratio": 20.0, "sector": "Technology", "industry": "Software", "volume_avg": 1e6}
+    for price_format in ("rows", "columnar"):
+        render(build_analysis("WARMUP", history, fundamentals, sentiment, [], "warmup", price_format, indicators=indicators))
+
+def warm_up():
+    """Runs the dry run once per process tree (a forked worker inherits the master's)."""
+    global _warmed
+    if _warmed or not STARTUP_WARMUP:
+        return
+    with phase("warmup"):
+        try:
+            _dry_run()
+        except Exception as e:
+            # Only an optimization; never keep a worker from serving
+            logger.warning(f"Startup warm-up failed: {e!r}")
+    _warmed = True
+
+def forked():
+    """In a freshly forked worker: readiness is per worker, timed from the fork."""
+    global _origin, _ready, _ready_after
+    _origin = time.perf_counter()
+    _ready, _ready_after = False, None
+
+async def become_ready():
+    """
+    Called once the worker's lifespan startup is done: preloads and warms up
+    (off the event loop) if the master didn't, then marks the worker ready.
+    """
+    global _ready, _ready_after
+    if not (_preloaded and _warmed) and STARTUP_WARMUP:
+        from services.executor import run_blocking
+        await run_blocking(preload)
+        await run_blocking(warm_up)
+    _ready = True
+    _ready_after = time.perf_counter() - _origin
+    breakdown = ", ".join(f"{name} {seconds * 1000:.0f}ms" + (" (master)" if pid != os.getpid() else "") for name, seconds, pid in _phases)
+    logger.info(f"Ready {_ready_after:.2f}s after start ({breakdown})")
+
+def draining():
+    """Shutdown has begun: take the worker out of rotation."""
+    global _ready
+    _ready = False
+
+def is_ready() -> bool:
+    return _ready
+
+def startup_stats() -> Dict[str, Any]:
+    pid = os.getpid()
+    return {
+        "ready": _ready,
+        "pid": pid,
+        "ready_after": round(_ready_after, 4) if _ready_after is not None else None,
+        "preloaded_in_master": any(p != pid for _, _, p in _phases),
+        "phases": {
+            name: {"seconds": round(seconds, 4), "process": "master" if p != pid else "worker"}
+            for name, seconds, p in _phases
+        },
+    }
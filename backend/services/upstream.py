@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from utils.config import (
+    UPSTREAM_RATE, UPSTREAM_MIN_RATE, UPSTREAM_BURST, UPSTREAM_MAX_CONCURRENCY,
+    UPSTREAM_ACQUIRE_TIMEOUT, BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN
+)
+
+logger = logging.getLogger("TradePulse.Upstream")
+
+# Outbound protection, one UpstreamGuard per upstream host (Yahoo Finance API,
+# each news host). A call needs a token from the host's bucket and one of its
+# concurrency slots. Both limits follow AIMD: every success grows them a little
+# back towards the configured maximum, a 429 / 403 / 5xx / transport error
+# halves them (at most once per second, so one burst of failures counts once),
+# and a Retry-After pauses the host. Only 2xx/3xx and "not found" answers count
+# as successes: a host refusing us (403, 429, anything with Retry-After) is
+# backed off from, never sped up against.
+#
+# Consecutive failures trip the host's circuit breaker: while it is open calls
+# fail immediately with UpstreamUnavailable (the cache then serves stale data,
+# see CachePolicy.stale_if_error); after the cooldown one probe call is let
+# through and its outcome closes or re-opens the circuit.
+
+OK, THROTTLED, ERROR, CANCELLED = "ok", "throttled", "error", "cancelled"
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+DECREASE_INTERVAL = 1.0
+MAX_RETRY_AFTER = 60.0
+# Blocks and rate limits; some hosts answer throttled clients with 403
+REFUSED_STATUSES = (403, 429)
+# Unknown symbol or feed: the upstream itself is fine
+NOT_FOUND_STATUSES = (404, 410)
+
+class UpstreamUnavailable(ConnectionError):
+    """The upstream's circuit is open, or no slot freed up in time."""
+
+def classify_status(status_code: int, retry_after: bool = False) -> str:
+    if status_code in REFUSED_STATUSES or (retry_after and status_code >= 400):
+        return THROTTLED
+    if status_code < 400 or status_code in NOT_FOUND_STATUSES:
+        return OK
+    return ERROR
+
+def classify_exception(error: BaseException) -> str:
+    if not isinstance(error, Exception):
+        return CANCELLED
+    # yfinance raises YFRateLimitError; older versions only carry the status text
+    text = f"{type(error).__name__} {error}"
+    if any(marker in text for marker in ("RateLimit", "429", "Too Many Requests", "403", "Forbidden")):
+        return THROTTLED
+    if "404" in text or "Not Found" in text:
+        return OK # unknown symbol; the upstream itself is fine
+    return ERROR
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+class Slot:
+    """One admitted call. Set `outcome` / `retry_after` to override the default classification."""
+
+    def __init__(self):
+        self.outcome: Optional[str] = None
+        self.retry_after: Optional[float] = None
+
+    def record_status(self, status_code: int, retry_after: Optional[str] = None):
+        self.retry_after = parse_retry_after(retry_after)
+        self.outcome = classify_status(status_code, self.retry_after is not None)
+
+class UpstreamGuard:
+    def __init__(self, name: str, rate: float = UPSTREAM_RATE, burst: int = UPSTREAM_BURST,
+                 max_concurrency: int = UPSTREAM_MAX_CONCURRENCY, min_rate: float = UPSTREAM_MIN_RATE,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN,
+                 acquire_timeout: float = UPSTREAM_ACQUIRE_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.acquire_timeout = acquire_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.rate = float(rate)
+        self.limit = float(max_concurrency)
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self._refilled_at = clock()
+        self._decreased_at = float("-inf")
+        self.paused_until = 0.0
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.counters = {"calls": 0, "throttled": 0, "errors": 0, "rejected": 0, "opened": 0}
+
+    # -- admission ------------------------------------------------------------
+
+    def _try_acquire(self) -> float:
+        """Admits a call (returns 0), or returns how long to wait. Raises when the circuit is open."""
+        with self._lock:
+            now = self._clock()
+            if self.state == OPEN:
+                if now - self.opened_at < self.cooldown:
+                    self.counters["rejected"] += 1
+                    raise UpstreamUnavailable(f"{self.name}: circuit open")
+                self.state = HALF_OPEN
+                logger.info(f"{self.name}: circuit half-open, probing")
+            if self.state == HALF_OPEN and self._probing:
+                self.counters["rejected"] += 1
+                raise UpstreamUnavailable(f"{self.name}: circuit half-open, probe in flight")
+
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self.in_flight >= max(1, int(self.limit)):
+                return 0.01
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+
+            self.tokens -= 1
+            self.in_flight += 1
+            self.counters["calls"] += 1
+            if self.state == HALF_OPEN:
+                self._probing = True
+            return 0.0
+
+    def _timed_out(self) -> UpstreamUnavailable:
+        with self._lock:
+            self.counters["rejected"] += 1
+        return UpstreamUnavailable(f"{self.name}: no capacity within {self.acquire_timeout:g}s")
+
+    def acquire(self):
+        """Blocking admission, for calls made on executor threads."""
+        started = self._clock()
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            if self._clock() - started + wait > self.acquire_timeout:
+                raise self._timed_out()
+            time.sleep(min(wait, 0.05))
+
+    async def acquire_async(self):
+        started = self._clock()
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            if self._clock() - started + wait > self.acquire_timeout:
+                raise self._timed_out()
+            await asyncio.sleep(min(wait, 0.05))
+
+    # -- feedback -------------------------------------------------------------
+
+    def release(self, outcome: str, retry_after: Optional[float] = None):
+        with self._lock:
+            now = self._clock()
+            self.in_flight -= 1
+            was_probe = self.state == HALF_OPEN and self._probing
+            if was_probe:
+                self._probing = False
+
+            if outcome == CANCELLED:
+                return
+            if outcome == OK:
+                self.failures = 0
+                # Additive increase: about +1 slot per window of successful calls
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+                if was_probe:
+                    self.state = CLOSED
+                    logger.info(f"{self.name}: circuit closed")
+                return
+
+            self.counters["throttled" if outcome == THROTTLED else "errors"] += 1
+            if now - self._decreased_at >= DECREASE_INTERVAL:
+                self.limit = max(1.0, self.limit / 2)
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._decreased_at = now
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + min(retry_after, MAX_RETRY_AFTER))
+
+            self.failures += 1
+            if was_probe or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = now
+                self.counters["opened"] += 1
+                logger.warning(f"{self.name}: circuit open for {self.cooldown:g}s after {self.failures} failures")
+
+    @contextmanager
+    def slot(self):
+        """
+        Admission + feedback around one blocking call. Exceptions are
+        classified (rate limit, error, cancellation); otherwise the call counts
+        as a success unless the caller sets slot.outcome.
+        """
+        self.acquire()
+        slot = Slot()
+        try:
+            yield slot
+        except BaseException as e:
+            self.release(classify_exception(e))
+            raise
+        self.release(slot.outcome or OK, slot.retry_after)
+
+    @asynccontextmanager
+    async def slot_async(self):
+        await self.acquire_async()
+        slot = Slot()
+        try:
+            yield slot
+        except BaseException as e:
+            self.release(classify_exception(e))
+            raise
+        self.release(slot.outcome or OK, slot.retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            return {
+                "state": self.state,
+                "rate": round(self.rate, 3),
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "paused_for": round(max(0.0, self.paused_until - now), 3),
+                "consecutive_failures": self.failures,
+                "retry_in": round(max(0.0, self.cooldown - (now - self.opened_at)), 3) if self.state == OPEN else None,
+                **self.counters,
+            }
+
+_guards: Dict[str, UpstreamGuard] = {}
+_guards_lock = threading.Lock()
+
+def get_guard(name: str) -> UpstreamGuard:
+    """The shared guard for an upstream host, created on first use."""
+    guard = _guards.get(name)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.setdefault(name, UpstreamGuard(name))
+    return guard
+
+def upstream_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: guard.stats() for name, guard in sorted(_guards.items())}
@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional
+import logging
+
+import httpx
+import pandas as pd
+
+from sources.http_client import get_http_client
+from utils.config import DATA_SOURCE_MODE, DATA_RECORD_DIR
+
+logger = logging.getLogger("TradePulse.DataSource")
+
+# The raw upstream calls behind the price and news pipelines. Everything above
+# this layer (caching, the OHLCV store, conditional feed requests, hedging,
+# scoring) is the same whichever implementation is active:
+#
+#   live    Yahoo Finance through yfinance, news sites through the shared client
+#   record  live, plus every response saved under TP_DATA_RECORD_DIR
+#   replay  saved responses only, with optional latency and error injection;
+#           no network access (see sources/recording.py)
+#
+# The mode comes from TP_DATA_SOURCE_MODE; set_sources() swaps implementations
+# at runtime (tests, benchmarks). yfinance is only imported by the live source,
+# on first use, so replay runs and tests never pay for it.
+
+class MarketDataSource:
+    """Price history and fundamentals. Methods are blocking."""
+    name = "market"
+
+    def history(self, ticker: str, **kwargs) -> pd.DataFrame:
+        """Daily OHLCV for one ticker; kwargs are yfinance's `period` / `start`."""
+        raise NotImplementedError
+
+    def download(self, tickers: List[str], **kwargs) -> Dict[str, pd.DataFrame]:
+        """Daily OHLCV for several tickers in one call, split per ticker (possibly empty)."""
+        raise NotImplementedError
+
+    def fundamentals(self, ticker: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+class NewsSource:
+    """
+    HTTP GET for news feeds. Same call shape as httpx.AsyncClient.get, so a
+    plain client can stand in for a source.
+    """
+    name = "news"
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+class YahooFinanceSource(MarketDataSource):
+    name = "yahoo_finance"
+
+    def history(self, ticker: str, **kwargs) -> pd.DataFrame:
+        import yfinance as yf
+        return yf.Ticker(ticker).history(**kwargs)
+
+    def download(self, tickers: List[str], **kwargs) -> Dict[str, pd.DataFrame]:
+        import yfinance as yf
+        frame = yf.download(
+            tickers, group_by="ticker", auto_adjust=True,
+            actions=True, threads=True, progress=False, **kwargs
+        )
+        histories = {}
+        for ticker in tickers:
+            try:
+                if isinstance(frame.columns, pd.MultiIndex):
+                    history = frame[ticker]
+                else:
+                    history = frame
+                history = history.dropna(how="all")
+            except KeyError:
+                history = pd.DataFrame()
+            histories[ticker] = history.rename_axis("Date")
+        return histories
+
+    def fundamentals(self, ticker: str) -> Dict[str, Any]:
+        import yfinance as yf
+        info = yf.Ticker(ticker).info
+        return {
+            "market_cap": info.get("marketCap"),
+            "pe_ratio": info.get("trailingPE"),
+            "sector": info.get("sector"),
+            "industry": info.get("industry"),
+            "volume_avg": info.get("averageVolume"),
+        }
+
+class HttpNewsSource(NewsSource):
+    name = "http"
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        return await get_http_client().get(url, headers=headers)
+
+_market_source: Optional[MarketDataSource] = None
+_news_source: Optional[NewsSource] = None
+
+def _build_sources(mode: str, directory: str):
+    if mode == "live":
+        return YahooFinanceSource(), HttpNewsSource()
+    from sources import recording
+    if mode == "record":
+        store = recording.RecordingStore(directory)
+        return recording.RecordingMarketSource(YahooFinanceSource(), store), recording.RecordingNewsSource(HttpNewsSource(), store)
+    if mode == "replay":
+        store = recording.RecordingStore(directory)
+        faults = recording.FaultInjector.from_config()
+        return recording.ReplayMarketSource(store, faults), recording.ReplayNewsSource(store, faults)
+    raise ValueError(f"Unknown data source mode: {mode!r} (expected live, record or replay)")
+
+def _ensure_sources():
+    global _market_source, _news_source
+    if _market_source is None or _news_source is None:
+        market, news = _build_sources(DATA_SOURCE_MODE, DATA_RECORD_DIR)
+        _market_source = _market_source or market
+        _news_source = _news_source or news
+        if DATA_SOURCE_MODE != "live":
+            logger.info(f"Data sources in {DATA_SOURCE_MODE} mode ({DATA_RECORD_DIR})")
+
+def get_market_source() -> MarketDataSource:
+    _ensure_sources()
+    return _market_source
+
+def get_news_source() -> NewsSource:
+    _ensure_sources()
+    return _news_source
+
+def set_sources(market: Optional[MarketDataSource] = None, news: Optional[NewsSource] = None):
+    """Replaces the active sources; None leaves that side unchanged."""
+    global _market_source, _news_source
+    if market is not None:
+        _market_source = market
+    if news is not None:
+        _news_source = news
+
+def source_stats() -> Dict[str, Any]:
+    _ensure_sources()
+    return {
+        "mode": DATA_SOURCE_MODE,
+        "market": {"source": _market_source.name, **_market_source.stats()},
+        "news": {"source": _news_source.name, **_news_source.stats()},
+    }
@@ -0,0 +1,56 @@
+import httpx
+import logging
+import ssl
+from typing import Optional
+
+from utils.config import HTTP_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY
+
+logger = logging.getLogger("TradePulse.HTTP")
+
+# One pooled client per worker for all outbound news requests, so DNS, TCP and
+# TLS setup is paid once per host instead of once per /analyze call.
+# Opened and closed by main.py's lifespan.
+_client: Optional[httpx.AsyncClient] = None
+# Loading the CA bundle is most of the cost of building a client; the context is
+# built once per process, in the gunicorn master when preloading (services/startup.py)
+_ssl_context: Optional[ssl.SSLContext] = None
+
+def get_ssl_context() -> ssl.SSLContext:
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = httpx.create_ssl_context()
+    return _ssl_context
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        verify=get_ssl_context(),
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+    )
+
+async def start_http_client():
+    global _client
+    if _client is None:
+        _client = _build_client()
+        logger.info(f"HTTP client pool ready (max {HTTP_MAX_CONNECTIONS} connections, {HTTP_MAX_KEEPALIVE} keep-alive)")
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The shared client. Outside the app lifespan (scripts, tests) one is created
+    on first use.
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
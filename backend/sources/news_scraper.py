@@ -1,97 +1,225 @@
-import httpx
-from bs4 import BeautifulSoup
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import asyncio
-from typing import List, Dict
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Callable, List, Dict, Optional, Tuple
+from urllib.parse import urlsplit
 import logging
-from datetime import datetime
 from models.schemas import NewsItem, SentimentAnalysis
+from services.cache import get_or_fetch, market_cache, cache_key
+from services.headline_sentiment import score_headlines, headline_key
+from services.upstream import get_guard
+from sources.datasource import NewsSource, get_news_source
+from utils.config import (
+    NEWS_HEDGE_ENABLED, NEWS_HEDGE_DELAY, FEED_STATE_TTL, FEED_SEEN_MAX,
+    YAHOO_NEWS_URL, GOOGLE_NEWS_RSS_URL
+)
+from utils.logging_utils import time_execution
+from utils.metrics import UPSTREAM_REQUESTS
 
 logger = logging.getLogger("TradePulse.News")
-analyzer = SentimentIntensityAnalyzer()
+SOURCE_YAHOO = "yahoo"
+SOURCE_GOOGLE = "google_rss"
 
-async def fetch_yahoo_news(client: httpx.AsyncClient, ticker: str) -> List[Dict]:
-    url = f"https://finance.yahoo.com/quote/{ticker}/news"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-    
+YAHOO_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+MAX_ITEMS = 5
+
+# Per-feed state kept in the shared market cache: validators for conditional
+# requests, the last parsed items (reused on 304 Not Modified) and the scores of
+# headlines already seen on that feed, so only new headlines get scored.
+@dataclass
+class FeedState:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    items: List[Dict] = field(default_factory=list)
+    seen: Dict[str, float] = field(default_factory=dict)
+
+def _load_feed(url: str) -> FeedState:
+    return market_cache.get(cache_key("feed", url)) or FeedState()
+
+def _save_feed(url: str, state: FeedState):
+    # Bound the seen map; dicts keep insertion order so the oldest go first
+    for key in list(state.seen)[:-FEED_SEEN_MAX]:
+        del state.seen[key]
+    market_cache.set(cache_key("feed", url), state, FEED_STATE_TTL)
+
+async def _fetch_feed(client: NewsSource, url: str, parse: Callable[[bytes], List[Dict]], headers: Optional[Dict] = None) -> List[Dict]:
+    """
+    Conditional GET + parse + score-new-headlines for one feed URL.
+    Returned items carry their `sentiment_score`. The GET goes through the
+    feed host's rate limiter / circuit breaker (services/upstream.py).
+    """
+    state = _load_feed(url)
+    request_headers = dict(headers or {})
+    if state.etag:
+        request_headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        request_headers["If-Modified-Since"] = state.last_modified
+
+    async with get_guard(urlsplit(url).hostname or url).slot_async() as slot:
+        response = await client.get(url, headers=request_headers)
+        slot.record_status(response.status_code, response.headers.get("Retry-After"))
+    if response.status_code == 304 and state.items:
+        logger.info(f"Feed not modified, reusing {len(state.items)} cached items")
+        return [dict(item) for item in state.items]
+    if response.status_code >= 400:
+        response.raise_for_status()
+
+    items = parse(response.content)
+    new_items = [item for item in items if headline_key(item["title"]) not in state.seen]
+    new_scores = await score_headlines([item["title"] for item in new_items])
+    for item, score in zip(new_items, new_scores):
+        state.seen[headline_key(item["title"])] = score
+    for item in items:
+        item["sentiment_score"] = state.seen[headline_key(item["title"])]
+
+    if response.status_code == 200:
+        state.etag = response.headers.get("ETag")
+        state.last_modified = response.headers.get("Last-Modified")
+        state.items = items
+        _save_feed(url, state)
+    return [dict(item) for item in items]
+
+def _text(element) -> str:
+    return "".join(element.itertext()).strip()
+
+def parse_yahoo_html(content: bytes, limit: int = MAX_ITEMS) -> List[Dict]:
+    """
+    Streams the quote page through lxml's HTML parser looking at <h3> elements
+    only, and stops as soon as `limit` stream headlines are found. Long <h3>s
+    outside the stream list are kept as a fallback for the newer Yahoo layout.
+    """
+    from lxml import etree # only the news path needs it; preloaded by the gunicorn master
+    primary, fallback = [], []
+    for _, element in etree.iterparse(BytesIO(content), events=("end",), tag="h3", html=True, recover=True):
+        title = _text(element)
+        in_stream = any(
+            parent.tag == "li" and "js-stream-content" in (parent.get("class") or "").split()
+            for parent in element.iterancestors()
+        )
+        if in_stream and title:
+            primary.append(title)
+            if len(primary) >= limit:
+                break
+        elif len(title) > 20 and len(fallback) < limit: # Filter out short garbage headers
+            fallback.append(title)
+        element.clear()
+
+    return [
+        {"title": title, "source": "Yahoo Finance (Scraped)", "url": None}
+        for title in (primary or fallback)[:limit]
+    ]
+
+def parse_google_rss(content: bytes, limit: int = MAX_ITEMS) -> List[Dict]:
+    """Streams <item> elements out of the RSS feed and stops after `limit`."""
+    from lxml import etree
+    items = []
+    for _, element in etree.iterparse(BytesIO(content), events=("end",), tag="item", recover=True):
+        source = element.find("source")
+        items.append({
+            "title": element.findtext("title", default=""),
+            "source": source.text if source is not None and source.text else "Google News",
+            "url": element.findtext("link"),
+            "published_at": None # parsing RSS dates can be messy, skipping for now
+        })
+        element.clear()
+        if len(items) >= limit:
+            break
+    return items
+
+async def fetch_yahoo_news(client: NewsSource, ticker: str) -> List[Dict]:
+    url = YAHOO_NEWS_URL.format(ticker=ticker)
     try:
-        response = await client.get(url, headers=headers, follow_redirects=True)
-        soup = BeautifulSoup(response.content, "lxml")
-        
-        news_items = []
-        # Try generic search for consistency
-        for item in soup.select("li.js-stream-content h3"):
-            if item.text:
-                news_items.append({
-                    "title": item.get_text().strip(),
-                    "source": "Yahoo Finance (Scraped)",
-                    "url": None
-                })
-        
-        # New Yahoo Layout Fallback
-        if not news_items:
-             for item in soup.find_all("h3"):
-                 if len(item.get_text()) > 20: # Filter out short garbage headers
-                     news_items.append({
-                        "title": item.get_text().strip(),
-                        "source": "Yahoo Finance (Scraped)",
-                        "url": None
-                    })
-
-        return news_items[:5]
+        items = await _fetch_feed(client, url, parse_yahoo_html, headers=YAHOO_HEADERS)
     except Exception as e:
+        UPSTREAM_REQUESTS.labels(SOURCE_YAHOO, "error").inc()
         logger.warning(f"Yahoo News scrape failed: {e}")
         return []
+    UPSTREAM_REQUESTS.labels(SOURCE_YAHOO, "ok").inc()
+    return items
 
-async def fetch_google_rss(client: httpx.AsyncClient, ticker: str) -> List[Dict]:
-    url = f"https://news.google.com/rss/search?q={ticker}+stock+when:7d&hl=en-US&gl=US&ceid=US:en"
-    
+async def fetch_google_rss(client: NewsSource, ticker: str) -> List[Dict]:
+    url = GOOGLE_NEWS_RSS_URL.format(ticker=ticker)
     try:
-        response = await client.get(url, follow_redirects=True)
-        soup = BeautifulSoup(response.content, features="xml")
-        items = soup.find_all("item", limit=5)
-        
-        return [{
-            "title": item.title.text,
-            "source": item.source.text if item.source else "Google News",
-            "url": item.link.text,
-            "published_at": None # parsing RSS dates can be messy, skipping for now
-        } for item in items]
+        items = await _fetch_feed(client, url, parse_google_rss)
     except Exception as e:
-        logger.warning(f"Google RSS failed: {e}")
+        UPSTREAM_REQUESTS.labels(SOURCE_GOOGLE, "error").inc()
+        logger.warning(f"Google RSS failed: {e!r}")
         return []
+    UPSTREAM_REQUESTS.labels(SOURCE_GOOGLE, "ok").inc()
+    return items
 
-async def get_news_sentiment(ticker: str) -> SentimentAnalysis:
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        # Try Yahoo first, then Google in parallel to be fast? 
-        # Actually user wants "Fallback", so let's try Yahoo then Google.
+async def get_news_sentiment(ticker: str, force: bool = False) -> SentimentAnalysis:
+    # Don't pin an empty result (both sources failed) for a whole TTL
+    return await get_or_fetch(
+        "news", ticker,
+        loader=lambda: _scrape_news_sentiment(ticker),
+        should_cache=lambda sentiment: sentiment.headline_count > 0,
+        force=force,
+    )
+
+@time_execution("news_fetch")
+async def _fetch_news_items(ticker: str) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Returns (news items, source used). Yahoo is preferred; Google RSS is the
+    fallback. In hedged mode Google is started as soon as Yahoo exceeds its
+    latency budget (or returns nothing), and the first usable result wins.
+    """
+    client = get_news_source()
+
+    if not NEWS_HEDGE_ENABLED:
         news_data = await fetch_yahoo_news(client, ticker)
-        
-        if not news_data:
-            logger.info("Falling back to Google RSS")
-            news_data = await fetch_google_rss(client, ticker)
-            
+        if news_data:
+            return news_data, SOURCE_YAHOO
+        logger.info("Falling back to Google RSS")
+        return await fetch_google_rss(client, ticker), SOURCE_GOOGLE
+
+    yahoo = asyncio.ensure_future(fetch_yahoo_news(client, ticker))
+    tasks = {yahoo: SOURCE_YAHOO}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=NEWS_HEDGE_DELAY)
+        if yahoo in done and yahoo.result():
+            return yahoo.result(), SOURCE_YAHOO
+
+        logger.info("Yahoo slow or empty, hedging with Google RSS")
+        tasks[asyncio.ensure_future(fetch_google_rss(client, ticker))] = SOURCE_GOOGLE
+        pending = {t for t in tasks if t not in done}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer Yahoo if both land in the same tick
+            for task in sorted(done, key=lambda t: tasks[t] != SOURCE_YAHOO):
+                if task.result():
+                    return task.result(), tasks[task]
+        return [], None
+    finally:
+        # Loser (or everything, if we were cancelled) stops here
+        for task in tasks:
+            task.cancel()
+
+async def _scrape_news_sentiment(ticker: str) -> SentimentAnalysis:
+    news_data, news_source = await _fetch_news_items(ticker)
+
     # Deduplicate by title
-    unique_news = {n['title']: n for n in news_data}.values()
-    
-    processed_news = []
-    compound_scores = []
+    unique_news = list({n['title']: n for n in news_data}.values())
     
-    for item in unique_news:
-        # Finance-Adjusted VADER (Basic Implementation)
-        # In a real app we would update the lexicon here with finance terms
-        score = analyzer.polarity_scores(item['title'])
-        compound = score['compound']
-        
-        processed_news.append(NewsItem(
+    # Finance-Adjusted VADER (Basic Implementation)
+    # In a real app we would update the lexicon here with finance terms.
+    # Feeds score their new headlines as they are parsed; anything else is scored here.
+    unscored = [item for item in unique_news if item.get('sentiment_score') is None]
+    for item, score in zip(unscored, await score_headlines([item['title'] for item in unscored])):
+        item['sentiment_score'] = score
+    compound_scores = [item['sentiment_score'] for item in unique_news]
+
+    processed_news = [
+        NewsItem(
             title=item['title'],
             source=item['source'],
             url=item.get('url'),
             sentiment_score=compound
-        ))
-        compound_scores.append(compound)
+        )
+        for item, compound in zip(unique_news, compound_scores)
+    ]
     
     avg_score = sum(compound_scores) / len(compound_scores) if compound_scores else 0
     
@@ -102,5 +230,6 @@ async def get_news_sentiment(ticker: str) -> SentimentAnalysis:
         score_normalized=score_norm,
         raw_vader=avg_score,
         headline_count=len(processed_news),
-        top_headlines=processed_news
+        top_headlines=processed_news,
+        news_source=news_source
     )
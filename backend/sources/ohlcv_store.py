@@ -0,0 +1,128 @@
+import os
+import fcntl
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from models.price_history import PriceHistory
+from utils.config import OHLCV_STORE_DIR, OHLCV_MAX_BARS, OHLCV_RETAIN_BARS
+
+logger = logging.getLogger("TradePulse.OHLCVStore")
+
+# Persistent per-ticker daily OHLCV, shared by every worker and surviving restarts.
+#
+# Layout: one `<TICKER>.npy` per ticker holding a float64 array of shape
+# (6, bars): row 0 is the bar date as epoch days, rows 1-5 are Open, High, Low,
+# Close, Volume. Rows are contiguous, so memory-mapping the file gives each
+# column as a zero-copy view. Writers replace the file atomically under an
+# flock, so readers never see a half-written array.
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+def _path(ticker: str) -> str:
+    return os.path.join(OHLCV_STORE_DIR, f"{ticker.upper()}.npy")
+
+@contextmanager
+def _write_lock(ticker: str):
+    os.makedirs(OHLCV_STORE_DIR, exist_ok=True)
+    with open(_path(ticker) + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def read_array(ticker: str) -> Optional[np.ndarray]:
+    """Memory-mapped (6, bars) array for `ticker`, or None if nothing is stored."""
+    try:
+        return np.load(_path(ticker), mmap_mode="r")
+    except FileNotFoundError:
+        return None
+    except (ValueError, OSError) as e:
+        logger.warning(f"Ignoring unreadable OHLCV file for {ticker}: {e}")
+        return None
+
+def last_date(ticker: str) -> Optional[pd.Timestamp]:
+    arr = read_array(ticker)
+    if arr is None or arr.shape[1] == 0:
+        return None
+    return pd.Timestamp(int(arr[0, -1]), unit="D")
+
+def to_frame(arr: np.ndarray, bars: Optional[int] = None) -> pd.DataFrame:
+    """
+    Builds a history DataFrame (same columns as yfinance) over the stored
+    array without copying the price columns.
+    """
+    if bars is not None:
+        arr = arr[:, -bars:]
+    index = pd.DatetimeIndex(pd.to_datetime(arr[0].astype(np.int64), unit="D"), name="Date")
+    return pd.DataFrame({name: arr[i + 1] for i, name in enumerate(COLUMNS)}, index=index, copy=False)
+
+def read(ticker: str, bars: Optional[int] = None) -> Optional[pd.DataFrame]:
+    arr = read_array(ticker)
+    if arr is None or arr.shape[1] == 0:
+        return None
+    return to_frame(arr, bars)
+
+def read_history(ticker: str, bars: Optional[int] = None) -> Optional[PriceHistory]:
+    """Stored bars as a compact PriceHistory (float32 copy, for the cache)."""
+    arr = read_array(ticker)
+    if arr is None or arr.shape[1] == 0:
+        return None
+    return PriceHistory.from_array(arr, bars)
+
+def _from_frame(history: pd.DataFrame) -> np.ndarray:
+    index = pd.DatetimeIndex(history.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    days = index.normalize().values.astype("datetime64[D]").astype(np.int64)
+    arr = np.empty((1 + len(COLUMNS), len(history)), dtype=np.float64)
+    arr[0] = days
+    for i, name in enumerate(COLUMNS):
+        arr[i + 1] = history[name].to_numpy(dtype=np.float64) if name in history else np.nan
+    return arr
+
+def write(ticker: str, history: pd.DataFrame, replace: bool = False) -> np.ndarray:
+    """
+    Merges `history` into the stored bars (or replaces them when `replace`).
+    Stored bars on or after the first new date are overwritten, so a revised
+    intraday bar replaces the partial one. Returns the stored array.
+    """
+    new = _from_frame(history)
+    with _write_lock(ticker):
+        existing = None if replace else read_array(ticker)
+        if existing is not None and existing.shape[1] and new.shape[1]:
+            keep = existing[:, existing[0] < new[0, 0]]
+            merged = np.concatenate([keep, new], axis=1)
+        else:
+            merged = new
+
+        # Retention: let the file grow to OHLCV_MAX_BARS, then trim back in one
+        # step so the window start (and incremental indicator state) stays put
+        # between compactions.
+        if merged.shape[1] > OHLCV_MAX_BARS:
+            merged = merged[:, -OHLCV_RETAIN_BARS:]
+
+        path = _path(ticker)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(merged))
+        os.replace(tmp, path)
+    return merged
+
+def overlap_matches(stored: np.ndarray, fresh: pd.DataFrame, rtol: float = 1e-6) -> bool:
+    """
+    True if the closes of fully-settled bars that appear in both the stored array
+    and a fresh fetch agree. A mismatch means Yahoo re-adjusted the series (split,
+    dividend) and the stored history must be replaced rather than appended to.
+    The last stored bar is excluded: it may be an intraday bar that moved.
+    """
+    fresh_arr = _from_frame(fresh)
+    settled = stored[:, :-1]
+    common, stored_idx, fresh_idx = np.intersect1d(settled[0], fresh_arr[0], return_indices=True)
+    if len(common) == 0:
+        return True
+    return bool(np.allclose(settled[4, stored_idx], fresh_arr[4, fresh_idx], rtol=rtol, equal_nan=True))
@@ -0,0 +1,353 @@
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from sources.datasource import MarketDataSource, NewsSource
+from utils.config import REPLAY_LATENCY, REPLAY_JITTER, REPLAY_ERROR_RATE, REPLAY_SEED
+
+logger = logging.getLogger("TradePulse.Recording")
+
+# Record / replay of upstream responses (TP_DATA_SOURCE_MODE=record|replay).
+#
+# Layout under the recording directory, one file per ticker or feed URL:
+#   history/<TICKER>.npz          OHLCV, compressed; later recordings are merged in
+#   fundamentals/<TICKER>.json
+#   news/<sha1(url)>.json.gz      status 200 body + ETag / Last-Modified
+#
+# Replay answers history requests by slicing the recorded bars (`start` or
+# `period`), so delta downloads from the OHLCV store work as they do live, and
+# feed requests honour If-None-Match. Files are read once and kept in memory.
+#
+#   python -m sources.recording AAPL MSFT NVDA     # record a set of tickers
+
+# Calendar days covered by yfinance `period` values
+_PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653}
+
+_FEED_HEADERS = ("ETag", "Last-Modified", "Content-Type")
+
+class InjectedFault(ConnectionError):
+    """Upstream failure simulated in replay mode."""
+
+class FaultInjector:
+    """Seeded latency / error draws shared by the replay sources."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "FaultInjector":
+        return cls(REPLAY_LATENCY, REPLAY_JITTER, REPLAY_ERROR_RATE, REPLAY_SEED)
+
+    def draw(self):
+        """(delay in seconds, whether this call fails)."""
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = bool(self.error_rate) and self._random.random() < self.error_rate
+        return delay, fail
+
+class RecordingStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._memory: Dict[str, Any] = {}
+
+    def _path(self, kind: str, name: str, suffix: str) -> str:
+        return os.path.join(self.directory, kind, quote(name, safe="") + suffix)
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _cached(self, path: str, load):
+        with self._lock:
+            if path in self._memory:
+                return self._memory[path]
+        value = load(path) if os.path.exists(path) else None
+        with self._lock:
+            self._memory[path] = value
+        return value
+
+    # -- price history --------------------------------------------------------
+
+    @staticmethod
+    def _encode_history(history: pd.DataFrame) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            index=history.index.asi8,
+            columns=np.array([str(c) for c in history.columns]),
+            values=history.to_numpy(dtype=np.float64),
+        )
+        return buffer.getvalue()
+
+    @staticmethod
+    def _decode_history(path: str) -> pd.DataFrame:
+        with np.load(path) as data:
+            index = pd.DatetimeIndex(data["index"].astype("datetime64[ns]"), name="Date")
+            return pd.DataFrame(data["values"], index=index, columns=list(data["columns"]))
+
+    def save_history(self, ticker: str, history: pd.DataFrame):
+        if history.empty:
+            return
+        path = self._path("history", ticker, ".npz")
+        fresh = history.copy()
+        # Wall-clock dates, tz dropped: single and bulk downloads differ in tz handling
+        if getattr(fresh.index, "tz", None) is not None:
+            fresh.index = fresh.index.tz_localize(None)
+        with self._lock:
+            if os.path.exists(path):
+                stored = self._decode_history(path)
+                fresh = pd.concat([stored, fresh])
+                fresh = fresh[~fresh.index.duplicated(keep="last")].sort_index()
+            self._write(path, self._encode_history(fresh.rename_axis("Date")))
+            self._memory.pop(path, None)
+
+    def load_history(self, ticker: str) -> Optional[pd.DataFrame]:
+        return self._cached(self._path("history", ticker, ".npz"), self._decode_history)
+
+    # -- fundamentals ---------------------------------------------------------
+
+    def save_fundamentals(self, ticker: str, fundamentals: Dict[str, Any]):
+        path = self._path("fundamentals", ticker, ".json")
+        with self._lock:
+            self._write(path, json.dumps(fundamentals, default=str).encode())
+            self._memory.pop(path, None)
+
+    def load_fundamentals(self, ticker: str) -> Optional[Dict[str, Any]]:
+        def load(path):
+            with open(path) as f:
+                return json.load(f)
+        return self._cached(self._path("fundamentals", ticker, ".json"), load)
+
+    # -- news feeds -----------------------------------------------------------
+
+    def _feed_path(self, url: str) -> str:
+        return self._path("news", hashlib.sha1(url.encode()).hexdigest(), ".json.gz")
+
+    def has_feed(self, url: str) -> bool:
+        return os.path.exists(self._feed_path(url))
+
+    def save_feed(self, url: str, response: httpx.Response):
+        record = {
+            "url": url,
+            "headers": {name: response.headers[name] for name in _FEED_HEADERS if name in response.headers},
+            "content": base64.b64encode(response.content).decode(),
+        }
+        path = self._feed_path(url)
+        with self._lock:
+            self._write(path, gzip.compress(json.dumps(record).encode()))
+            self._memory.pop(path, None)
+
+    def load_feed(self, url: str) -> Optional[Dict[str, Any]]:
+        def load(path):
+            with gzip.open(path, "rt") as f:
+                record = json.load(f)
+            record["content"] = base64.b64decode(record["content"])
+            return record
+        return self._cached(self._feed_path(url), load)
+
+# -- record -------------------------------------------------------------------
+
+class RecordingMarketSource(MarketDataSource):
+    def __init__(self, inner: MarketDataSource, store: RecordingStore):
+        self.inner = inner
+        self.store = store
+        self.name = f"record({inner.name})"
+        self.recorded = 0
+
+    def history(self, ticker: str, **kwargs) -> pd.DataFrame:
+        history = self.inner.history(ticker, **kwargs)
+        self._save_history(ticker, history)
+        return history
+
+    def download(self, tickers: List[str], **kwargs) -> Dict[str, pd.DataFrame]:
+        histories = self.inner.download(tickers, **kwargs)
+        for ticker, history in histories.items():
+            self._save_history(ticker, history)
+        return histories
+
+    def _save_history(self, ticker: str, history: pd.DataFrame):
+        try:
+            self.store.save_history(ticker, history)
+            self.recorded += not history.empty
+        except Exception as e:
+            logger.warning(f"Failed to record price history for {ticker}: {e!r}")
+
+    def fundamentals(self, ticker: str) -> Dict[str, Any]:
+        fundamentals = self.inner.fundamentals(ticker)
+        try:
+            self.store.save_fundamentals(ticker, fundamentals)
+            self.recorded += 1
+        except Exception as e:
+            logger.warning(f"Failed to record fundamentals for {ticker}: {e!r}")
+        return fundamentals
+
+    def stats(self) -> Dict[str, Any]:
+        return {"recorded": self.recorded}
+
+class RecordingNewsSource(NewsSource):
+    def __init__(self, inner: NewsSource, store: RecordingStore):
+        self.inner = inner
+        self.store = store
+        self.name = f"record({inner.name})"
+        self.recorded = 0
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        if not self.store.has_feed(url) and headers:
+            # A 304 would leave nothing to record: ask for the full body once
+            headers = {k: v for k, v in headers.items() if k not in ("If-None-Match", "If-Modified-Since")}
+        response = await self.inner.get(url, headers=headers)
+        if response.status_code == 200:
+            try:
+                self.store.save_feed(url, response)
+                self.recorded += 1
+            except Exception as e:
+                logger.warning(f"Failed to record feed {url}: {e!r}")
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {"recorded": self.recorded}
+
+# -- replay -------------------------------------------------------------------
+
+class ReplayMarketSource(MarketDataSource):
+    name = "replay"
+
+    def __init__(self, store: RecordingStore, faults: Optional[FaultInjector] = None):
+        self.store = store
+        self.faults = faults or FaultInjector()
+        self.counters = {"hits": 0, "misses": 0, "injected_errors": 0}
+
+    def _upstream_call(self):
+        delay, fail = self.faults.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.counters["injected_errors"] += 1
+            raise InjectedFault("Injected upstream error (replay)")
+
+    def _slice(self, ticker: str, period: Optional[str] = None, start=None) -> pd.DataFrame:
+        history = self.store.load_history(ticker)
+        if history is None or history.empty:
+            self.counters["misses"] += 1
+            return pd.DataFrame()
+        self.counters["hits"] += 1
+        if start is not None:
+            return history[history.index >= pd.Timestamp(start)].copy()
+        days = _PERIOD_DAYS.get(period)
+        if days is not None:
+            return history[history.index > history.index[-1] - pd.Timedelta(days=days)].copy()
+        return history.copy()
+
+    def history(self, ticker: str, period: Optional[str] = None, start=None, **kwargs) -> pd.DataFrame:
+        self._upstream_call()
+        return self._slice(ticker, period, start)
+
+    def download(self, tickers: List[str], period: Optional[str] = None, start=None, **kwargs) -> Dict[str, pd.DataFrame]:
+        self._upstream_call()
+        return {ticker: self._slice(ticker, period, start) for ticker in tickers}
+
+    def fundamentals(self, ticker: str) -> Dict[str, Any]:
+        self._upstream_call()
+        fundamentals = self.store.load_fundamentals(ticker)
+        if fundamentals is None:
+            self.counters["misses"] += 1
+            raise LookupError(f"No recorded fundamentals for {ticker}")
+        self.counters["hits"] += 1
+        return dict(fundamentals)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters)
+
+class ReplayNewsSource(NewsSource):
+    name = "replay"
+
+    def __init__(self, store: RecordingStore, faults: Optional[FaultInjector] = None):
+        self.store = store
+        self.faults = faults or FaultInjector()
+        self.counters = {"hits": 0, "not_modified": 0, "misses": 0, "injected_errors": 0}
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        request = httpx.Request("GET", url, headers=headers)
+        delay, fail = self.faults.draw()
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            self.counters["injected_errors"] += 1
+            return httpx.Response(503, request=request)
+
+        record = self.store.load_feed(url)
+        if record is None:
+            self.counters["misses"] += 1
+            return httpx.Response(404, request=request)
+        etag = record["headers"].get("ETag")
+        if etag and (headers or {}).get("If-None-Match") == etag:
+            self.counters["not_modified"] += 1
+            return httpx.Response(304, headers={"ETag": etag}, request=request)
+        self.counters["hits"] += 1
+        return httpx.Response(200, headers=record["headers"], content=record["content"], request=request)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters)
+
+# -- CLI ----------------------------------------------------------------------
+
+async def _record(tickers: List[str], store: RecordingStore):
+    from sources.datasource import YahooFinanceSource, HttpNewsSource
+    from sources.http_client import close_http_client
+    from sources.news_scraper import YAHOO_HEADERS
+    from utils.config import YAHOO_NEWS_URL, GOOGLE_NEWS_RSS_URL
+
+    market = RecordingMarketSource(YahooFinanceSource(), store)
+    news = RecordingNewsSource(HttpNewsSource(), store)
+    try:
+        for ticker in tickers:
+            results = await asyncio.gather(
+                asyncio.to_thread(market.history, ticker, period="1y"),
+                asyncio.to_thread(market.fundamentals, ticker),
+                news.get(YAHOO_NEWS_URL.format(ticker=ticker), headers=YAHOO_HEADERS),
+                news.get(GOOGLE_NEWS_RSS_URL.format(ticker=ticker)),
+                return_exceptions=True,
+            )
+            failed = [
+                name for name, result in zip(("history", "fundamentals", "yahoo news", "google news"), results)
+                if isinstance(result, BaseException) or (isinstance(result, httpx.Response) and result.status_code != 200)
+            ]
+            print(f"{ticker}: recorded" + (f" (failed: {', '.join(failed)})" if failed else ""))
+    finally:
+        await close_http_client()
+
+def main(argv: Optional[List[str]] = None):
+    from utils.config import DATA_RECORD_DIR
+
+    parser = argparse.ArgumentParser(description="Record live upstream responses for replay mode.")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--dir", default=DATA_RECORD_DIR, help="recording directory (default: TP_DATA_RECORD_DIR)")
+    args = parser.parse_args(argv)
+    asyncio.run(_record([t.upper() for t in args.tickers], RecordingStore(args.dir)))
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,209 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Tuple
-from cachetools import TTLCache, cached
+from typing import Dict, Any, List, Union
 import logging
 
+from models.price_history import PriceHistory, as_price_history
+from services.cache import market_cache, cache_key, get_or_fetch, is_fresh, store
+from services.executor import run_blocking
+from services.upstream import get_guard
+from sources import ohlcv_store
+from sources.datasource import get_market_source
+from utils.config import ANALYSIS_BARS, OHLCV_STORE_ENABLED, OHLCV_DELTA_OVERLAP_DAYS
+from utils.logging_utils import time_execution
+from utils.metrics import UPSTREAM_REQUESTS
+
 logger = logging.getLogger("TradePulse.YFinance")
 
-# Cache data for 15 minutes to avoid hitting rate limits and improve speed
-cache = TTLCache(maxsize=100, ttl=900)
+# Data is cached (15 minutes by default) to avoid hitting rate limits and improve
+# speed. The cache is shared by all workers on the host and concurrent misses for
+# a ticker share one fetch, see services/cache.py. The upstream calls themselves
+# go through the active MarketDataSource (live, record or replay), behind the
+# shared rate limiter / circuit breaker for Yahoo Finance (services/upstream.py).
+# History is cached as a compact PriceHistory (float32 OHLCV), not the yfinance
+# frame; as_price_history also covers frames cached before that change.
+
+UPSTREAM = "yahoo_finance"
+
+async def get_price_history(ticker: str, force: bool = False) -> PriceHistory:
+    history = await get_or_fetch("history", ticker, loader=lambda: run_blocking(fetch_price_history, ticker), force=force)
+    return as_price_history(history)
+
+async def get_fundamentals(ticker: str, force: bool = False) -> Dict[str, Any]:
+    return await get_or_fetch("fundamentals", ticker, loader=lambda: run_blocking(fetch_fundamentals, ticker), force=force)
+
+@time_execution("yfinance_fetch")
+def fetch_price_history(ticker: str) -> PriceHistory:
+    """
+    Fetches daily OHLCV history (at least 1 Year for robust Tech Analysis).
+    Blocking and uncached; use get_price_history from async code.
+
+    With the local OHLCV store enabled only bars after the last stored date are
+    requested from Yahoo and appended, and the result is read back from the
+    stored file. Either way the result is the last ANALYSIS_BARS bars.
+    """
+    if not OHLCV_STORE_ENABLED:
+        return PriceHistory.from_frame(_download_history(ticker, period="1y")).tail(ANALYSIS_BARS)
+
+    stored = ohlcv_store.read_array(ticker)
+    if stored is None or stored.shape[1] == 0:
+        ohlcv_store.write(ticker, _download_history(ticker, period="1y"), replace=True)
+    else:
+        _merge_delta(ticker, stored, _download_history(ticker, start=_delta_start(stored), allow_empty=True))
+    return ohlcv_store.read_history(ticker, ANALYSIS_BARS)
+
+def _download_history(ticker: str, allow_empty: bool = False, **kwargs) -> pd.DataFrame:
+    logger.info(f"Fetching price history for {ticker} from Yahoo Finance ({kwargs})")
+    try:
+        with get_guard(UPSTREAM).slot():
+            history = get_market_source().history(ticker, **kwargs)
+    except Exception as e:
+        UPSTREAM_REQUESTS.labels(UPSTREAM, "error").inc()
+        logger.error(f"YFinance Error for {ticker}: {e}")
+        raise e
+    UPSTREAM_REQUESTS.labels(UPSTREAM, "ok").inc()
+
+    if history.empty and not allow_empty:
+        logger.warning(f"No price data found for {ticker}")
+        raise ValueError(f"No price data found for {ticker}")
+
+    return history
+
+def _delta_start(stored: np.ndarray) -> str:
+    # Re-request a few settled bars as an overlap to detect re-adjusted history
+    last = pd.Timestamp(int(stored[0, -1]), unit="D")
+    return (last - pd.Timedelta(days=OHLCV_DELTA_OVERLAP_DAYS)).strftime("%Y-%m-%d")
 
-@cached(cache)
-def get_stock_data(ticker: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+def _merge_delta(ticker: str, stored: np.ndarray, fresh: pd.DataFrame):
+    """Appends a delta fetch to the store, refetching in full if Yahoo re-adjusted prices."""
+    if fresh.empty:
+        return # nothing new (weekend, holiday)
+    if ohlcv_store.overlap_matches(stored, fresh):
+        ohlcv_store.write(ticker, fresh)
+    else:
+        logger.info(f"Stored history for {ticker} was re-adjusted upstream, refetching in full")
+        ohlcv_store.write(ticker, _download_history(ticker, period="1y"), replace=True)
+
+def _download_many(tickers: List[str], **kwargs) -> Dict[str, pd.DataFrame]:
+    """One multi-ticker download, split into per-ticker frames (possibly empty)."""
+    try:
+        with get_guard(UPSTREAM).slot():
+            histories = get_market_source().download(tickers, **kwargs)
+    except Exception:
+        UPSTREAM_REQUESTS.labels(UPSTREAM, "error").inc()
+        raise
+    UPSTREAM_REQUESTS.labels(UPSTREAM, "ok").inc()
+    return histories
+
+@time_execution("yfinance_fetch")
+def get_price_histories(tickers: List[str]) -> Dict[str, Union[PriceHistory, Exception]]:
     """
-    Fetches 1 year of history and fundamentals.
-    Returns (history dataframe, fundamentals dict).
+    Bulk variant of get_price_history for watchlists (blocking).
+    Fresh cached tickers are served from the cache; the rest are fetched with
+    multi-ticker `yf.download` calls (one delta download for tickers already in
+    the OHLCV store, one full download for the others) and written back to the
+    cache. Stale entries are refreshed too and served if the download fails.
+    Tickers without data map to a ValueError instead of failing the batch.
     """
-    logger.info(f"Fetching data for {ticker} from Yahoo Finance")
+    results: Dict[str, Union[PriceHistory, Exception]] = {}
+    stale: Dict[str, PriceHistory] = {}
+    missing = []
+    for ticker in tickers:
+        entry = market_cache.get_entry(cache_key("history", ticker))
+        if entry is not None and is_fresh("history", entry[0]):
+            results[ticker] = as_price_history(entry[1])
+            continue
+        if entry is not None:
+            stale[ticker] = as_price_history(entry[1])
+        missing.append(ticker)
+
+    if not missing:
+        return results
+
+    stored = {}
+    if OHLCV_STORE_ENABLED:
+        for ticker in missing:
+            arr = ohlcv_store.read_array(ticker)
+            if arr is not None and arr.shape[1]:
+                stored[ticker] = arr
+    unstored = [t for t in missing if t not in stored]
+
+    logger.info(f"Bulk fetching price history for {len(missing)} tickers from Yahoo Finance ({len(stored)} delta)")
     try:
-        stock = yf.Ticker(ticker)
-        
-        # 1. Fetch History (1 Year for robust Tech Analysis)
-        history = stock.history(period="1y")
-        
-        if history.empty:
+        fresh: Dict[str, pd.DataFrame] = {}
+        if unstored:
+            fresh.update(_download_many(unstored, period="1y"))
+        if stored:
+            fresh.update(_download_many(list(stored), start=min(_delta_start(arr) for arr in stored.values())))
+    except Exception as e:
+        logger.error(f"YFinance bulk download error: {e}")
+        if not stale:
+            raise e
+        results.update(stale)
+        for ticker in missing:
+            results.setdefault(ticker, e)
+        return results
+
+    for ticker in missing:
+        frame = fresh.get(ticker, pd.DataFrame())
+        try:
+            if ticker in stored:
+                _merge_delta(ticker, stored[ticker], frame)
+                history = ohlcv_store.read_history(ticker, ANALYSIS_BARS)
+            elif OHLCV_STORE_ENABLED and not frame.empty:
+                ohlcv_store.write(ticker, frame, replace=True)
+                history = ohlcv_store.read_history(ticker, ANALYSIS_BARS)
+            else:
+                history = PriceHistory.from_frame(frame).tail(ANALYSIS_BARS)
+        except Exception as e:
+            logger.warning(f"Failed to update stored history for {ticker}: {e!r}")
+            results[ticker] = stale.get(ticker, e)
+            continue
+
+        if history is None or history.empty:
+            if ticker in stale:
+                results[ticker] = stale[ticker]
+                continue
             logger.warning(f"No price data found for {ticker}")
-            raise ValueError(f"No price data found for {ticker}")
-            
-        # 2. Fetch Fundamentals (Best Effort)
-        info = stock.info
-        fundamentals = {
-            "market_cap": info.get("marketCap"),
-            "pe_ratio": info.get("trailingPE"),
-            "sector": info.get("sector"),
-            "industry": info.get("industry"),
-            "volume_avg": info.get("averageVolume"),
-            "current_price": info.get("currentPrice") or history['Close'].iloc[-1]
-        }
-        
-        return history, fundamentals
+            results[ticker] = ValueError(f"No price data found for {ticker}")
+            continue
 
+        results[ticker] = history
+        store("history", history, ticker)
+
+    return results
+
+def cached_price_histories(tickers: List[str]) -> Dict[str, PriceHistory]:
+    """
+    History already held on this host, fresh or stale: the cache entry, else the
+    OHLCV store. Never calls Yahoo; tickers with neither are left out. Blocking
+    (reads SQLite and the store).
+    """
+    results: Dict[str, PriceHistory] = {}
+    for ticker in tickers:
+        value = market_cache.get(cache_key("history", ticker))
+        if value is None and OHLCV_STORE_ENABLED:
+            value = ohlcv_store.read_history(ticker, ANALYSIS_BARS)
+        if value is not None:
+            history = as_price_history(value)
+            if not history.empty:
+                results[ticker] = history
+    return results
+
+@time_execution("yfinance_fetch")
+def fetch_fundamentals(ticker: str) -> Dict[str, Any]:
+    """
+    Fetches fundamentals (`stock.info` when live, Best Effort). Blocking and uncached.
+    The quote price is not taken from here: the latest bar is fresher than a
+    day-old cached `info`.
+    """
+    logger.info(f"Fetching fundamentals for {ticker} from Yahoo Finance")
+    try:
+        with get_guard(UPSTREAM).slot():
+            fundamentals = get_market_source().fundamentals(ticker)
     except Exception as e:
+        UPSTREAM_REQUESTS.labels(UPSTREAM, "error").inc()
         logger.error(f"YFinance Error for {ticker}: {e}")
         raise e
+    UPSTREAM_REQUESTS.labels(UPSTREAM, "ok").inc()
+    return fundamentals
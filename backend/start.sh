@@ -10,4 +10,5 @@ if [ -d "backend" ]; then
 fi
 
 echo "Starting TradePulse Production Server from $(pwd)..."
-exec gunicorn -k uvicorn.workers.UvicornWorker main:app --bind 0.0.0.0:${PORT:-8000} --workers 2 --timeout 120
+# Workers, timeout and master preloading live in gunicorn.conf.py
+exec gunicorn -c gunicorn.conf.py main:app
@@ -0,0 +1,29 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# The cache file, OHLCV store and prefetch state default to shared paths under
+# the system temp dir that running workers use. Point them at a scratch
+# directory before any app module reads utils.config, so the suite never reads
+# or writes production state.
+_scratch = tempfile.mkdtemp(prefix="tradepulse-tests-")
+os.environ["TP_CACHE_SQLITE_PATH"] = os.path.join(_scratch, "cache.sqlite3")
+os.environ["TP_OHLCV_STORE_DIR"] = os.path.join(_scratch, "ohlcv")
+os.environ["TP_PREFETCH_STATE_DIR"] = os.path.join(_scratch, "prefetch")
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+@pytest.fixture(autouse=True)
+def isolated_market_cache(monkeypatch):
+    """A fresh in-memory market cache per test, also where modules imported it by name."""
+    from scoring import engine, screener
+    from services import cache
+    from sources import news_scraper, yfinance_client
+
+    fresh = cache.MemoryCache(maxsize=10_000)
+    for module in (cache, engine, screener, news_scraper, yfinance_client):
+        monkeypatch.setattr(module, "market_cache", fresh)
+    return fresh
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from models.price_history import PriceHistory
+from api import routes
+from scoring import engine
+from services import cache as cache_module
+from services.cache import POLICIES, MemoryCache, cache_key, store
+from sources import ohlcv_store, yfinance_client
+from sources.datasource import MarketDataSource
+from utils.config import ANALYSIS_BARS
+
+def make_history(n: int = 260, base: float = 100.0) -> pd.DataFrame:
+    close = base + np.sin(np.arange(n) / 5.0) + np.arange(n) * 0.1
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6},
+        index=pd.bdate_range(end="2025-06-30", periods=n, tz="America/New_York", name="Date"),
+    )
+
+class FakeMarket(MarketDataSource):
+    """Multi-ticker downloads from fixed frames; `start` returns the bars from that date on."""
+    name = "fake"
+
+    def __init__(self, frames, error=None):
+        self.frames = frames
+        self.error = error
+        self.downloads = []
+
+    def download(self, tickers, **kwargs):
+        self.downloads.append((sorted(tickers), kwargs))
+        if self.error is not None:
+            raise self.error
+        results = {}
+        for ticker in tickers:
+            frame = self.frames.get(ticker, pd.DataFrame())
+            if "start" in kwargs and not frame.empty:
+                frame = frame[frame.index >= pd.Timestamp(kwargs["start"]).tz_localize(frame.index.tz)]
+            results[ticker] = frame
+        return results
+
+@pytest.fixture
+def market(tmp_path, monkeypatch):
+    cache = MemoryCache(maxsize=100)
+    monkeypatch.setattr(cache_module, "market_cache", cache)
+    monkeypatch.setattr(yfinance_client, "market_cache", cache)
+    monkeypatch.setattr(ohlcv_store, "OHLCV_STORE_DIR", str(tmp_path))
+    fake = FakeMarket({"AAA": make_history(), "BBB": make_history(base=50.0)})
+    monkeypatch.setattr(yfinance_client, "get_market_source", lambda: fake)
+    return fake
+
+def test_fresh_cache_hit_skips_the_download(market):
+    history = PriceHistory.from_frame(make_history())
+    store("history", history, "AAA")
+    assert yfinance_client.get_price_histories(["AAA"]) == {"AAA": history}
+    assert market.downloads == []
+
+def test_stored_tickers_get_one_delta_download(market):
+    ohlcv_store.write("AAA", make_history()[:-5], replace=True)
+    results = yfinance_client.get_price_histories(["AAA", "BBB"])
+
+    periods = {tuple(tickers): kwargs for tickers, kwargs in market.downloads}
+    assert periods[("BBB",)] == {"period": "1y"}
+    assert set(periods[("AAA",)]) == {"start"}
+    # The store keeps every bar; the analysis gets the fixed window
+    assert ohlcv_store.read_array("AAA").shape[1] == 260
+    assert len(results["AAA"]) == len(results["BBB"]) == ANALYSIS_BARS
+    assert results["AAA"].day(-1) == "2025-06-30"
+    assert cache_module.market_cache.get(cache_key("history", "BBB")) is results["BBB"]
+
+def test_ticker_without_data_does_not_fail_the_batch(market):
+    results = yfinance_client.get_price_histories(["AAA", "NODATA"])
+    assert len(results["AAA"]) == ANALYSIS_BARS
+    assert isinstance(results["NODATA"], ValueError)
+
+def test_failed_download_serves_stale_entries(market):
+    stale = PriceHistory.from_frame(make_history()[:-1])
+    policy = POLICIES["history"]
+    # Past its freshness, still inside the stale windows
+    cache_module.market_cache.set(cache_key("history", "AAA"), stale, policy.stale_ttl + policy.stale_if_error - 1)
+    market.error = ConnectionError("download failed")
+
+    results = yfinance_client.get_price_histories(["AAA", "BBB"])
+    assert results["AAA"] is stale
+    assert results["BBB"] is market.error
+
+def test_batch_endpoint_streams_one_line_per_ticker(market, monkeypatch):
+    async def news(ticker):
+        return engine._neutral_sentiment()
+
+    async def fundamentals(ticker):
+        return {"sector": "Technology"}
+
+    monkeypatch.setattr(engine, "get_news_sentiment", news)
+    monkeypatch.setattr(engine, "get_fundamentals", fundamentals)
+    monkeypatch.setattr(engine, "latest_indicators", lambda ticker, history: {
+        "rsi": 55.0, "macd_line": 1.0, "signal_line": 0.5, "histogram": 0.5, "atr": 2.0, "adx": 30.0,
+    })
+    app = FastAPI()
+    app.include_router(routes.router)
+
+    async def post():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/analyze/batch", json={"tickers": ["AAA", "BBB", "NODATA", "BAD1"], "stream": True})
+
+    response = asyncio.run(post())
+    assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["ticker"] for line in lines) == ["AAA", "BAD1", "BBB", "NODATA"]
+    status = {line["ticker"]: (line["status"], line.get("error")) for line in lines}
+    assert status["AAA"][0] == status["BBB"][0] == "ok"
+    assert status["NODATA"] == ("error", "No price data found for NODATA")
+    assert status["BAD1"] == ("error", "Invalid Ticker Format")
+    assert len(market.downloads) == 1 # one bulk download for the whole watchlist
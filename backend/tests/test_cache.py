@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+import pandas as pd
+from services import cache as cache_module
+from services.cache import MemoryCache, SQLiteCache, TieredCache, CachePolicy, get_or_fetch
+
+def test_memory_cache_expiry_and_eviction():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.set("c", 3, ttl=60) # evicts "a" (LRU)
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+    cache.set("d", 4, ttl=-1) # already expired
+    assert cache.get("d") is None
+
+    stats = cache.stats()
+    assert stats["evictions"] >= 1
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1
+
+def test_sqlite_cache_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    frame = pd.DataFrame({"Close": [1.0, 2.0, 3.0]})
+
+    SQLiteCache(path, max_entries=10).set("history:AAPL", frame, ttl=60)
+    # A second instance stands in for another gunicorn worker
+    other = SQLiteCache(path, max_entries=10)
+    assert other.get("history:AAPL").equals(frame)
+    assert other.get("history:MSFT") is None
+    assert other.stats()["hits"] == 1
+
+def test_tiered_cache_promotes_l2_hits(tmp_path):
+    l2 = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    l2.set("news:AAPL", "payload", ttl=60)
+
+    tiered = TieredCache(MemoryCache(maxsize=10), l2)
+    assert tiered.get("news:AAPL") == "payload"
+    assert tiered.get("news:AAPL") == "payload"
+
+    stats = tiered.stats()
+    assert stats["l2"]["hits"] == 1 # second read served by L1
+    assert stats["l1"]["hits"] == 1
+    expires_at, _ = tiered.l1.get_entry("news:AAPL")
+    assert expires_at <= time.time() + 60
+
+def test_get_or_fetch_coalesces_and_serves_stale(monkeypatch):
+    monkeypatch.setattr(cache_module, "market_cache", MemoryCache(maxsize=10))
+    monkeypatch.setitem(cache_module.POLICIES, "history", CachePolicy(ttl=60, stale_ttl=60))
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        # 10 concurrent misses -> one upstream fetch
+        results = await asyncio.gather(*[get_or_fetch("history", "AAPL", loader=loader) for _ in range(10)])
+        assert results == [1] * 10 and len(calls) == 1
+
+        # Expired but within the stale window: old value now, one refresh behind it
+        cache_module.market_cache.set("history:AAPL", 1, ttl=30) # fresh until ttl - stale_ttl < now
+        stale = await asyncio.gather(*[get_or_fetch("history", "AAPL", loader=loader) for _ in range(5)])
+        assert stale == [1] * 5
+        await asyncio.sleep(0.05)
+        assert len(calls) == 2
+        assert await get_or_fetch("history", "AAPL", loader=loader) == 2
+
+    asyncio.run(scenario())
+
+def test_get_or_fetch_serves_stale_if_refetch_fails(monkeypatch):
+    monkeypatch.setattr(cache_module, "market_cache", MemoryCache(maxsize=10))
+    monkeypatch.setitem(cache_module.POLICIES, "news", CachePolicy(ttl=60, stale_ttl=60, stale_if_error=600))
+
+    async def failing():
+        raise ConnectionError("circuit open")
+
+    async def empty():
+        return 0
+
+    async def scenario():
+        # Past the stale window, inside stale-if-error: refetched like a miss...
+        cache_module.market_cache.set("news:AAPL", 7, ttl=300)
+        assert await get_or_fetch("news", "AAPL", loader=failing) == 7
+        assert await get_or_fetch("news", "AAPL", loader=empty, should_cache=bool) == 7
+        # ...and replaced when the refetch works
+        assert await get_or_fetch("news", "AAPL", loader=lambda: asyncio.sleep(0, 8)) == 8
+        assert cache_module.fresh_for("news", "AAPL") > 59
+
+    asyncio.run(scenario())
+
+def test_get_or_fetch_keeps_l2_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+
+    class RecordingSQLiteCache(SQLiteCache):
+        def get_entry(self, key):
+            threads.append(threading.get_ident())
+            return super().get_entry(key)
+
+        def set(self, key, value, ttl):
+            threads.append(threading.get_ident())
+            super().set(key, value, ttl)
+
+    l2 = RecordingSQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    monkeypatch.setattr(cache_module, "market_cache", TieredCache(MemoryCache(maxsize=10), l2))
+
+    async def scenario():
+        assert await get_or_fetch("news", "AAPL", loader=lambda: asyncio.sleep(0, "fetched")) == "fetched"
+        cache_module.market_cache.l1.delete("news:AAPL")
+        assert await get_or_fetch("news", "AAPL", loader=lambda: asyncio.sleep(0, "refetched")) == "fetched"
+        assert await get_or_fetch("news", "AAPL", loader=lambda: asyncio.sleep(0, "refetched")) == "fetched"
+
+    asyncio.run(scenario())
+    assert len(threads) == 3 # miss, write, read after L1 lost it; the last read is an L1 hit
+    assert threading.get_ident() not in threads
+    assert cache_module.fresh_for("news", "AAPL", local=True) > 0
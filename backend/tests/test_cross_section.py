@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+import numpy as np
+import pandas as pd
+from models.price_history import PriceHistory
+from scoring import cross_section
+from scoring.cross_section import ReturnMatrix, pairwise_correlation, rolling_beta, sector_zscores
+from scoring.screener import ScreenIndex
+from services.cache import store
+from sources import ohlcv_store, yfinance_client
+
+def make_histories(n: int, bars: int = 120, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2025-03-03", periods=bars, name="Date")
+    market = rng.normal(0, 0.01, bars)
+    histories = {}
+    for i, ticker in enumerate(["SPY"] + [f"T{chr(65 + i)}" for i in range(n)]):
+        returns = market if ticker == "SPY" else (0.5 + 0.2 * i) * market + rng.normal(0, 0.008, bars)
+        close = 100 * np.exp(np.cumsum(returns))
+        frame = pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": 1e6}, index=dates)
+        if i % 2:
+            frame = frame.drop(frame.index[[10, 11, 40]]) # gaps: pairwise-complete statistics
+        histories[ticker] = PriceHistory.from_frame(frame, dtype=np.float64)
+    return histories
+
+def frame_of_returns(histories: dict) -> pd.DataFrame:
+    return pd.DataFrame({
+        t: pd.Series(h.close, index=pd.to_datetime(h.days.astype("datetime64[D]"))).pct_change()
+        for t, h in histories.items()
+    })
+
+def test_statistics_match_pandas():
+    histories = make_histories(5)
+    matrix = ReturnMatrix(days=100)
+    for ticker, history in histories.items():
+        assert matrix.update(ticker, history)
+    tickers = list(histories)
+    present, returns, dates = matrix.snapshot(tickers, 100)
+    assert present == tickers and returns.shape == (6, 100)
+
+    expected = frame_of_returns(histories).loc[dates[0]:].corr(min_periods=20)
+    assert np.allclose(pairwise_correlation(returns), expected.to_numpy(), atol=1e-12)
+
+    betas = rolling_beta(returns, returns[0], 30)
+    window = frame_of_returns(histories).loc[dates[-30]:]
+    both = window[["TB", "SPY"]].dropna()
+    assert np.isclose(betas[2, -1], both["TB"].cov(both["SPY"]) / both["SPY"].var())
+    assert np.isclose(betas[0, -1], 1.0)
+
+    z = sector_zscores(np.array([1.0, 2.0, 3.0, 10.0, 5.0]), ["A", "A", "A", "B", None])
+    assert np.allclose(z[:3], [-1, 0, 1]) and np.isnan(z[3]) and np.isnan(z[4])
+
+def test_matrix_is_maintained_incrementally():
+    histories = make_histories(2)
+    matrix = ReturnMatrix(days=50)
+    history = histories["TA"]
+    matrix.update("TA", history[:-1])
+    assert not matrix.update("TA", history[:-1]) # unchanged last bar: skipped
+
+    assert matrix.update("TA", history) # a new day shifts the columns once
+    _, returns, dates = matrix.snapshot(["TA"], 50)
+    close = history.close
+    assert dates[-1] == history.day(-1)
+    assert np.isclose(returns[0, -1], close[-1] / close[-2] - 1)
+    assert matrix.stats()["shifts"] == 1
+
+def test_cross_section_endpoint_flow(monkeypatch):
+    histories = make_histories(4)
+    index = ScreenIndex({"TA": "Tech", "TB": "Tech", "TC": "Tech", "TD": "Energy"})
+    for ticker in ("TA", "TB", "TC", "TD"):
+        index.update(ticker, histories[ticker])
+    monkeypatch.setattr(cross_section, "screen_index", index)
+    monkeypatch.setattr(cross_section, "return_matrix", ReturnMatrix(days=100))
+    monkeypatch.setattr(cross_section, "cached_price_histories", lambda tickers: {t: histories[t] for t in tickers if t in histories})
+
+    result = asyncio.run(cross_section.analyze_cross_section(["TA", "TB", "TC", "TD", "NOPE"], "SPY", 100, 30, 5))
+    assert result.missing == ["NOPE"] and [row.ticker for row in result.tickers] == ["TA", "TB", "TC", "TD"]
+    assert len(result.correlation) == 4 and result.correlation[0][0] == 1.0
+    assert len(result.rolling_beta.dates) == 5 and result.rolling_beta.dates[-1] == result.as_of
+
+    rows = {row.ticker: row for row in result.tickers}
+    tech = np.array([index.entries[t].final_score for t in ("TA", "TB", "TC")])
+    assert np.isclose(rows["TA"].final_score_z, (tech[0] - tech.mean()) / tech.std(ddof=1), atol=1e-3)
+    assert rows["TD"].final_score_z is None # alone in its sector
+    assert rows["TB"].beta < rows["TD"].beta # built with increasing market loadings
+
+def test_benchmark_without_returns_is_not_found(monkeypatch):
+    histories = make_histories(1)
+    histories["SPY"] = histories["SPY"][-1:] # one bar: no return to compute
+    monkeypatch.setattr(cross_section, "screen_index", ScreenIndex({}))
+    monkeypatch.setattr(cross_section, "return_matrix", ReturnMatrix(days=100))
+    monkeypatch.setattr(cross_section, "cached_price_histories", lambda tickers: {t: histories[t] for t in tickers})
+
+    with pytest.raises(ValueError, match="benchmark SPY"):
+        asyncio.run(cross_section.analyze_cross_section(["TA"], "SPY", 100, 30, 5))
+
+def test_request_path_reads_only_local_history(tmp_path, monkeypatch):
+    histories = make_histories(2)
+    monkeypatch.setattr(ohlcv_store, "OHLCV_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(yfinance_client, "get_market_source", lambda: pytest.fail("upstream called"))
+    store("history", histories["TA"], "XSCACHED")
+    ohlcv_store.write("XSSTORED", histories["TB"].to_frame(), replace=True)
+
+    local = yfinance_client.cached_price_histories(["XSCACHED", "XSSTORED", "XSNONE"])
+    assert set(local) == {"XSCACHED", "XSSTORED"}
+    assert np.allclose(local["XSSTORED"].close, histories["TB"].close)
@@ -0,0 +1,51 @@
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from scoring import engine
+
+def run_analysis(monkeypatch, fundamentals_delay, include=True, fail=False):
+    dates = pd.date_range("2024-01-01", periods=120, freq="B", name="Date")
+    close = np.linspace(100, 130, 120)
+    history = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6}, index=dates)
+
+    async def price(ticker):
+        return history
+
+    async def news(ticker):
+        return engine._neutral_sentiment()
+
+    async def fundamentals(ticker):
+        await asyncio.sleep(fundamentals_delay)
+        if fail:
+            raise ConnectionError("upstream down")
+        return {"market_cap": 1e12, "sector": "Technology", "current_price": 1.0}
+
+    monkeypatch.setattr(engine, "get_price_history", price)
+    monkeypatch.setattr(engine, "get_news_sentiment", news)
+    monkeypatch.setattr(engine, "get_fundamentals", fundamentals)
+    monkeypatch.setattr(engine, "FUNDAMENTALS_GRACE", 0.05)
+    start = time.perf_counter()
+    result = asyncio.run(engine.analyze_ticker("TEST", include_fundamentals=include))
+    return result, time.perf_counter() - start, history
+
+def test_fundamentals_included_when_ready(monkeypatch):
+    result, _, history = run_analysis(monkeypatch, 0.0)
+    assert result.fundamentals.sector == "Technology"
+    assert result.current_price == history["Close"].iloc[-1] # never the cached quote
+    assert result.data_quality.timed_out_stages == []
+
+def test_slow_fundamentals_do_not_block_the_response(monkeypatch):
+    result, elapsed, _ = run_analysis(monkeypatch, 2.0)
+    assert elapsed < 1.0
+    assert result.fundamentals.sector is None
+    assert result.data_quality.timed_out_stages == ["fundamentals"]
+
+def test_fundamentals_can_be_skipped(monkeypatch):
+    result, _, _ = run_analysis(monkeypatch, 0.0, include=False)
+    assert result.fundamentals is None and result.data_quality.missing_fields == []
+
+def test_failed_fundamentals_are_flagged_as_degraded(monkeypatch):
+    result, _, _ = run_analysis(monkeypatch, 0.0, fail=True)
+    assert result.fundamentals.sector is None
+    assert result.data_quality.degraded_stages == ["fundamentals"] and result.data_quality.timed_out_stages == []
@@ -0,0 +1,74 @@
+import json
+import numpy as np
+import pandas as pd
+from indicators.incremental import IndicatorState
+from indicators.technical import compute_indicators
+
+def make_history(n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame({
+        "Open": close,
+        "High": close + rng.random(n),
+        "Low": close - rng.random(n),
+        "Close": close,
+        "Volume": rng.integers(100_000, 1_000_000, n).astype(float),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="B", name="Date"))
+
+def full_recompute(history: pd.DataFrame) -> dict:
+    return compute_indicators(
+        history["Close"].to_numpy(), history["High"].to_numpy(),
+        history["Low"].to_numpy(), history["Volume"].to_numpy(),
+    )
+
+def assert_parity(state: IndicatorState, history: pd.DataFrame):
+    expected = full_recompute(history)
+    got = state.values()
+    for name in ("rsi", "macd_line", "signal_line", "histogram", "atr", "adx"):
+        # EWM recursions follow pandas step for step: identical, not just close
+        assert np.array_equal(got[name], expected[name], equal_nan=True), name
+    assert np.isclose(got["volume_z"], expected["volume_z"], rtol=1e-9, equal_nan=True)
+
+def test_incremental_matches_full_recompute_bar_by_bar():
+    history = make_history(260)
+    state = IndicatorState.from_history(history.iloc[:5])
+    for end in range(6, len(history) + 1):
+        state = state.sync(history.iloc[:end])
+        assert_parity(state, history.iloc[:end])
+
+def test_replacing_intraday_bar_and_round_trip():
+    history = make_history(120)
+    state = IndicatorState.from_history(history)
+
+    revised = history.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 2.5
+    revised.iloc[-1, revised.columns.get_loc("High")] += 3.0
+    revised.iloc[-1, revised.columns.get_loc("Volume")] *= 1.4
+    state = state.sync(revised)
+    assert state.bars == len(revised)
+    assert_parity(state, revised)
+
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    extended = make_history(121)
+    extended.iloc[:120] = revised.to_numpy()
+    assert_parity(restored.sync(extended), extended)
+
+def test_cached_state_is_keyed_by_series(isolated_market_cache):
+    from scoring.engine import latest_indicators
+    real, synthetic = make_history(200, seed=3), make_history(200, seed=4) # same dates, other bars
+    latest_indicators("SPY", real)
+    got = latest_indicators("SPY", synthetic)
+    expected = full_recompute(synthetic)
+    assert np.isclose(got["rsi"], expected["rsi"])
+    assert len([key for key in isolated_market_cache._data if key.startswith("indicators:SPY:")]) == 2
+
+def test_indicators_use_the_fixed_analysis_window():
+    from scoring.engine import latest_indicators
+    from utils.config import ANALYSIS_BARS
+    long = make_history(ANALYSIS_BARS + 300)
+    # However much history is held, the values are those of the last ANALYSIS_BARS bars
+    for held in (long, long.iloc[-ANALYSIS_BARS - 40:]):
+        got = latest_indicators("WIN", held)
+        expected = full_recompute(long.iloc[-ANALYSIS_BARS:])
+        for name in ("rsi", "macd_line", "atr", "adx"):
+            assert np.isclose(got[name], expected[name], rtol=1e-5), name
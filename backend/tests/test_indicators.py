@@ -1,7 +1,9 @@
 import pytest
 import pandas as pd
 import numpy as np
-from indicators.technical import calculate_rsi, calculate_macd, calculate_atr, calculate_adx
+from indicators.technical import (
+    calculate_rsi, calculate_macd, calculate_atr, calculate_adx, get_volume_z_score, compute_indicators
+)
 
 @pytest.fixture
 def mock_price_data():
@@ -44,3 +46,26 @@ def test_rsi_handle_nan():
     short_data = pd.Series([100, 101, 102])
     rsi = calculate_rsi(short_data)
     assert rsi == 50.0 # Our fallback default
+
+def test_fused_kernel_matches_wrappers_per_ticker():
+    rng = np.random.default_rng(7)
+    close = 100 + rng.standard_normal((3, 120)).cumsum(axis=1)
+    high = close + rng.random((3, 120))
+    low = close - rng.random((3, 120))
+    volume = rng.integers(100_000, 1_000_000, (3, 120)).astype(float)
+
+    out = compute_indicators(close, high, low, volume)
+    for i in range(3):
+        c, h, l = pd.Series(close[i]), pd.Series(high[i]), pd.Series(low[i])
+        assert out["rsi"][i] == calculate_rsi(c)
+        assert (out["macd_line"][i], out["signal_line"][i], out["histogram"][i]) == calculate_macd(c)
+        assert out["atr"][i] == calculate_atr(h, l, c)
+        assert out["adx"][i] == calculate_adx(h, l, c)
+        assert out["volume_z"][i] == get_volume_z_score(pd.Series(volume[i]))
+
+def test_fused_kernel_full_series_shape():
+    close = np.linspace(100, 130, 60)
+    out = compute_indicators(close, close + 1, close - 1, include=("rsi", "adx"), full=True)
+    assert out["rsi"].shape == close.shape
+    assert np.isnan(out["rsi"][0])
+    assert out["rsi"][-1] == calculate_rsi(pd.Series(close))
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+from services import live
+from services.live import LiveHub, Subscriber, diff, merge
+
+def test_diff_and_merge_round_trip():
+    old = {"price": 1.0, "signal": {"score": 50, "label": "HOLD"}, "points": [1, 2]}
+    new = {"price": 1.0, "signal": {"score": 61, "label": "HOLD"}, "points": [1, 2, 3]}
+    delta = diff(old, new)
+    assert delta == {"signal": {"score": 61}, "points": [1, 2, 3]}
+    assert merge(old, delta) == new
+
+def test_slow_subscriber_gets_conflated_latest_state():
+    subscriber = Subscriber(["AAPL"])
+    subscriber.push("AAPL", {"type": "snapshot", "ticker": "AAPL", "data": {"a": 1, "b": {"c": 1, "d": 1}}})
+    subscriber.push("AAPL", {"type": "delta", "ticker": "AAPL", "data": {"b": {"c": 2}}})
+    subscriber.push("AAPL", {"type": "delta", "ticker": "AAPL", "data": {"a": 3}})
+    subscriber.push("AAPL", {"type": "error", "ticker": "AAPL", "error": "boom"})
+
+    messages = asyncio.run(subscriber.next(timeout=0.1))
+    assert messages == [{"type": "snapshot", "ticker": "AAPL", "data": {"a": 3, "b": {"c": 2, "d": 1}}}]
+    assert subscriber.dropped == 3
+
+def test_hub_runs_one_loop_per_ticker(monkeypatch):
+    calls = []
+
+    async def analyze(ticker):
+        calls.append(ticker)
+        return SimpleNamespace(ticker=ticker, run=len(calls))
+
+    monkeypatch.setattr(live, "snapshot", lambda result: {"ticker": result.ticker, "score": min(result.run, 2)})
+
+    async def scenario():
+        hub = LiveHub(analyze, interval=0.01)
+        viewers = [hub.subscribe(["AAPL"]) for _ in range(50)]
+        first = await viewers[0].next(timeout=1)
+        assert first == [{"type": "snapshot", "ticker": "AAPL", "data": {"ticker": "AAPL", "score": 1}}]
+        second = await viewers[0].next(timeout=1)
+        assert second == [{"type": "delta", "ticker": "AAPL", "data": {"score": 2}}]
+        assert hub.stats()["tickers"] == 1 and hub.stats()["subscribers"] == 50
+
+        # Unchanged results push nothing
+        await asyncio.sleep(0.05)
+        assert await viewers[0].next(timeout=0.01) == []
+        # ~one analysis per interval, not per viewer
+        assert len(calls) < 20
+
+        for viewer in viewers:
+            hub.unsubscribe(viewer)
+        assert hub.stats()["tickers"] == 0
+        await hub.close()
+
+    asyncio.run(scenario())
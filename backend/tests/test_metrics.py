@@ -0,0 +1,47 @@
+import asyncio
+from utils.logging_utils import RequestContext, span, time_execution
+from utils.metrics import Counter, Histogram, Registry
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 5.0):
+        histogram.labels("fetch").observe(value)
+    text = registry.render()
+    assert 't_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="fetch",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="fetch"} 3' in text
+
+def test_counter_and_collector_output():
+    registry = Registry()
+    counter = registry.register(Counter("t_total", "test", ("outcome",)))
+    counter.labels("ok").inc()
+    counter.labels("ok").inc(2)
+    registry.register_collector(lambda: [("t_entries", "gauge", "test", ("cache",), [(("l1",), 7), (("l2",), None)])])
+    text = registry.render()
+    assert 't_total{outcome="ok"} 3' in text
+    assert 't_entries{cache="l1"} 7' in text
+    assert 'cache="l2"' not in text
+
+def test_spans_are_recorded_per_request():
+    @time_execution("work")
+    async def work():
+        with span("inner"):
+            await asyncio.sleep(0)
+
+    async def handle(rid):
+        tokens = RequestContext.begin(rid)
+        try:
+            await work()
+            return RequestContext.get_id(), RequestContext.stage_timings()
+        finally:
+            RequestContext.end(tokens)
+
+    async def main():
+        return await asyncio.gather(handle("a"), handle("b"))
+
+    (rid_a, timings_a), (rid_b, timings_b) = asyncio.run(main())
+    assert (rid_a, rid_b) == ("a", "b")
+    assert set(timings_a) == set(timings_b) == {"work", "inner"}
+    assert RequestContext.get_id() == "SYSTEM"
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from sources import news_scraper
+
+def run_hedged(monkeypatch, yahoo_delay, yahoo_items, google_items, hedge_delay=0.05):
+    async def yahoo(client, ticker):
+        await asyncio.sleep(yahoo_delay)
+        return yahoo_items
+
+    async def google(client, ticker):
+        await asyncio.sleep(0.01)
+        return google_items
+
+    monkeypatch.setattr(news_scraper, "fetch_yahoo_news", yahoo)
+    monkeypatch.setattr(news_scraper, "fetch_google_rss", google)
+    monkeypatch.setattr(news_scraper, "NEWS_HEDGE_ENABLED", True)
+    monkeypatch.setattr(news_scraper, "NEWS_HEDGE_DELAY", hedge_delay)
+    monkeypatch.setattr(news_scraper, "get_news_source", lambda: None)
+    return asyncio.run(news_scraper._fetch_news_items("AAPL"))
+
+YAHOO = [{"title": "Yahoo headline", "source": "Yahoo Finance (Scraped)", "url": None}]
+GOOGLE = [{"title": "Google headline", "source": "Reuters", "url": "https://example.com"}]
+
+def test_fast_yahoo_wins_without_hedging(monkeypatch):
+    assert run_hedged(monkeypatch, 0.0, YAHOO, GOOGLE) == (YAHOO, news_scraper.SOURCE_YAHOO)
+
+def test_slow_yahoo_is_hedged_with_google(monkeypatch):
+    items, source = run_hedged(monkeypatch, 1.0, YAHOO, GOOGLE)
+    assert (items, source) == (GOOGLE, news_scraper.SOURCE_GOOGLE)
+
+@pytest.mark.parametrize("google_items, expected", [(GOOGLE, news_scraper.SOURCE_GOOGLE), ([], None)])
+def test_empty_yahoo_falls_back(monkeypatch, google_items, expected):
+    assert run_hedged(monkeypatch, 0.0, [], google_items) == (google_items, expected)
+
+def test_headline_scores_are_cached_and_pool_matches_inline(monkeypatch):
+    from services import headline_sentiment as hs
+
+    titles = ["Stocks  rally on GREAT earnings!", "Shares plunge after guidance cut", "Stocks rally on GREAT earnings!"]
+    inline = asyncio.run(hs.score_headlines(titles))
+    assert inline[0] == inline[2] # whitespace-only difference shares a cache entry
+    assert inline[0] == hs.get_analyzer().polarity_scores(titles[2])["compound"]
+
+    before = hs.headline_cache_stats()["hits"]
+    assert asyncio.run(hs.score_headlines(titles[:2])) == inline[:2]
+    assert hs.headline_cache_stats()["hits"] == before + 2
+
+    monkeypatch.setattr(hs, "SENTIMENT_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(hs, "SENTIMENT_PROCESS_MIN_BATCH", 1)
+    try:
+        pooled = asyncio.run(hs.score_headlines(["Analysts upgrade the stock", "Regulators open probe"]))
+    finally:
+        hs.shutdown_sentiment_pool()
+    assert pooled == hs.score_batch(["Analysts upgrade the stock", "Regulators open probe"])
+
+RSS = b"""<?xml version="1.0"?><rss><channel>
+<item><title>Chipmaker soars on record demand</title><link>https://example.com/1</link><source url="x">Reuters</source></item>
+<item><title>Regulators open probe into supplier</title><link>https://example.com/2</link></item>
+</channel></rss>"""
+
+def test_conditional_feed_fetch_reuses_items_on_304(monkeypatch):
+    import httpx
+    from services.cache import MemoryCache
+
+    monkeypatch.setattr(news_scraper, "market_cache", MemoryCache(maxsize=10))
+    scored = []
+    real_score = news_scraper.score_headlines
+
+    async def counting_score(titles):
+        scored.extend(titles)
+        return await real_score(titles)
+
+    monkeypatch.setattr(news_scraper, "score_headlines", counting_score)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=RSS, headers={"ETag": '"v1"'})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await news_scraper.fetch_google_rss(client, "NVDA")
+            second = await news_scraper.fetch_google_rss(client, "NVDA")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert [item["title"] for item in first] == ["Chipmaker soars on record demand", "Regulators open probe into supplier"]
+    assert first[1]["source"] == "Google News"
+    assert second == first
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert len(scored) == 2 # the 304 scored nothing
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sources import ohlcv_store
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_store, "OHLCV_STORE_DIR", str(tmp_path))
+
+def make_history(start: str, n: int, base: float = 100.0) -> pd.DataFrame:
+    close = base + np.arange(n, dtype=float)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6},
+        index=pd.date_range(start, periods=n, freq="B", tz="America/New_York", name="Date"),
+    )
+
+def test_append_replaces_overlapping_bars():
+    ohlcv_store.write("AAPL", make_history("2025-01-01", 10))
+
+    # Delta fetch re-sends the last two bars (one revised intraday) plus two new ones
+    delta = make_history("2025-01-13", 4, base=500.0)
+    ohlcv_store.write("AAPL", delta)
+
+    history = ohlcv_store.read("AAPL")
+    assert len(history) == 12
+    assert history.index.is_unique and history.index.is_monotonic_increasing
+    assert history["Close"].iloc[7] == 107.0
+    assert list(history["Close"].iloc[-4:]) == [500.0, 501.0, 502.0, 503.0]
+    assert ohlcv_store.last_date("AAPL") == pd.Timestamp("2025-01-16")
+
+def test_read_is_memory_mapped_and_windowed():
+    ohlcv_store.write("MSFT", make_history("2025-01-01", 30))
+    history = ohlcv_store.read("MSFT", bars=5)
+    assert len(history) == 5
+    assert not history["Close"].to_numpy().flags.writeable # view over the read-only map
+    assert ohlcv_store.read("NOPE") is None
+
+def test_overlap_detects_readjusted_history():
+    stored = ohlcv_store.write("NVDA", make_history("2025-01-01", 10))
+    assert ohlcv_store.overlap_matches(stored, make_history("2025-01-08", 5, base=105.0))
+    # A split halves every historical close
+    split = make_history("2025-01-08", 5, base=105.0)
+    split[["Open", "High", "Low", "Close"]] /= 2
+    assert not ohlcv_store.overlap_matches(stored, split)
@@ -0,0 +1,67 @@
+import asyncio
+import os
+from services import cache as cache_module
+from services.cache import MemoryCache, CachePolicy, store
+from services.prefetch import PopularityTracker, PrefetchScheduler
+
+def test_popularity_decays_old_requests():
+    tracker = PopularityTracker(half_life=60)
+    t0 = tracker._epoch
+    for _ in range(8):
+        tracker.record("OLD", now=t0)
+    for _ in range(3):
+        tracker.record("NEW", now=t0 + 180)
+
+    # 8 requests three half-lives ago are worth 1 request now
+    top = dict(tracker.top(2, now=t0 + 180))
+    assert list(tracker.top(2, now=t0 + 180))[0][0] == "NEW"
+    assert abs(top["OLD"] - 1.0) < 1e-9 and abs(top["NEW"] - 3.0) < 1e-9
+
+def test_scheduler_refreshes_hot_entries_within_budget(monkeypatch):
+    monkeypatch.setattr(cache_module, "market_cache", MemoryCache(maxsize=100))
+    monkeypatch.setitem(cache_module.POLICIES, "history", CachePolicy(ttl=600, stale_ttl=0))
+    refreshed = []
+
+    async def refresh_history(ticker):
+        refreshed.append(ticker)
+        store("history", "fresh", ticker)
+
+    tracker = PopularityTracker()
+    for ticker, hits in (("AAPL", 5), ("MSFT", 4), ("TSLA", 3), ("COLD", 1)):
+        for _ in range(hits):
+            tracker.record(ticker)
+    store("history", "cached", "MSFT") # fresh for 600s, outside the lead
+
+    scheduler = PrefetchScheduler(tracker, interval=60, lead=60, min_score=2, budget_per_minute=1)
+    scheduler._refreshers = {"history": refresh_history}
+
+    assert scheduler.due() == [("AAPL", "history"), ("TSLA", "history")]
+    assert asyncio.run(scheduler.run_cycle()) == 1
+    assert refreshed == ["AAPL"] and scheduler.counters["skipped_budget"] == 1
+    asyncio.run(scheduler.run_cycle())
+    assert refreshed == ["AAPL", "TSLA"]
+
+def test_one_leader_per_host_ranks_every_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "market_cache", MemoryCache(maxsize=100))
+    leader_tracker, follower_tracker = PopularityTracker(), PopularityTracker()
+    leader = PrefetchScheduler(leader_tracker, min_score=1.5, state_dir=str(tmp_path))
+    follower = PrefetchScheduler(follower_tracker, min_score=1.5, state_dir=str(tmp_path))
+    leader._refreshers = follower._refreshers = {"history": None}
+
+    assert leader.is_leader()
+    # The lock is per open file, so a second holder in this process stands in for another worker
+    assert not follower.is_leader() and not follower.stats()["leader"]
+
+    # Popular only once both workers' requests are counted
+    leader_tracker.record("AAPL")
+    follower_tracker.record("AAPL")
+    assert leader.due() == []
+    follower.publish()
+    # Published under this pid; renamed, it stands in for another worker's file
+    published = tmp_path / f"popularity-{os.getpid()}.json"
+    published.rename(tmp_path / "popularity-1.json")
+    assert leader.due() == [("AAPL", "history")]
+
+    asyncio.run(leader.stop()) # leader exits: the lock is free again
+    assert follower.is_leader()
+    asyncio.run(follower.stop())
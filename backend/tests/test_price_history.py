@@ -0,0 +1,68 @@
+import pickle
+import numpy as np
+import pandas as pd
+from indicators.incremental import IndicatorState
+from indicators.technical import compute_indicators
+from models.price_history import PriceHistory
+from services.cache import MemoryCache, approximate_size
+from sources import ohlcv_store
+
+def make_frame(n: int, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame({
+        "Open": close,
+        "High": close + rng.random(n),
+        "Low": close - rng.random(n),
+        "Close": close.round(2),
+        "Volume": rng.integers(100_000, 5_000_000, n).astype(float),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=pd.date_range("2025-01-01", periods=n, freq="B", tz="America/New_York", name="Date"))
+
+def test_compact_container_from_frame_and_store(tmp_path, monkeypatch):
+    frame = make_frame(252)
+    history = PriceHistory.from_frame(frame)
+    assert len(history) == 252 and history.close.dtype == np.float32 and history.days.dtype == np.int64
+    assert history.nbytes == 252 * (8 + 5 * 4)
+    assert history.day(0) == "2025-01-01" and history.date_strings()[-1] == frame.index[-1].strftime("%Y-%m-%d")
+    assert history.last_close == float(frame["Close"].iloc[-1]) # no float32 noise
+    assert len(pickle.dumps(history)) < 252 * 40
+
+    tail = history.tail(90)
+    assert len(tail) == 90 and tail.day(-1) == history.day(-1)
+    assert list(tail.to_frame().columns) == ["Open", "High", "Low", "Close", "Volume"]
+
+    monkeypatch.setattr(ohlcv_store, "OHLCV_STORE_DIR", str(tmp_path))
+    ohlcv_store.write("AAPL", frame)
+    stored = ohlcv_store.read_history("AAPL", bars=10)
+    assert stored.date_strings() == history.tail(10).date_strings()
+    assert np.array_equal(stored.close, history.close[-10:])
+
+def test_indicators_on_compact_history_match_full_recompute():
+    history = PriceHistory.from_frame(make_frame(200))
+    state = IndicatorState.from_history(history[:150])
+    state = state.sync(history)
+    assert state.bars == 200
+
+    # Same (float32) inputs, widened to float64 exactly as the state sees them
+    expected = compute_indicators(*(column.astype(np.float64) for column in (history.close, history.high, history.low, history.volume)))
+    got = state.values()
+    for name in ("rsi", "macd_line", "signal_line", "histogram", "atr", "adx"):
+        assert np.array_equal(got[name], expected[name], equal_nan=True), name
+
+def test_memory_cache_bounded_by_bytes():
+    histories = {t: PriceHistory.from_frame(make_frame(252, seed=i)) for i, t in enumerate("ABCDE")}
+    entry_size = approximate_size(histories["A"])
+    cache = MemoryCache(maxsize=3 * entry_size, getsizeof=approximate_size)
+    for ticker, history in histories.items():
+        cache.set(ticker, history, ttl=60)
+
+    stats = cache.stats()
+    assert stats["size"] == 3 and stats["bytes"] == 3 * entry_size <= stats["max_bytes"]
+    assert stats["evictions"] == 2
+    assert cache.get("A") is None and cache.get("E") is histories["E"]
+
+    # A value larger than the whole bound replaces nothing and isn't kept
+    cache.set("E", PriceHistory.from_frame(make_frame(2520)), ttl=60)
+    assert cache.get("E") is None
@@ -0,0 +1,80 @@
+import asyncio
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from sources.datasource import MarketDataSource, NewsSource
+from sources.recording import (
+    FaultInjector, InjectedFault, RecordingStore, RecordingMarketSource, RecordingNewsSource,
+    ReplayMarketSource, ReplayNewsSource
+)
+
+URL = "https://news.example.com/rss?q=NVDA"
+
+def make_history(start: str, n: int, base: float = 100.0) -> pd.DataFrame:
+    close = base + np.arange(n, dtype=float)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6},
+        index=pd.date_range(start, periods=n, freq="B", tz="America/New_York", name="Date"),
+    )
+
+class StubMarket(MarketDataSource):
+    name = "stub"
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def history(self, ticker, **kwargs):
+        return self.frames.pop(0)
+
+    def fundamentals(self, ticker):
+        return {"sector": "Technology", "pe_ratio": 31.5}
+
+class StubNews(NewsSource):
+    def __init__(self):
+        self.requests = []
+
+    async def get(self, url, headers=None):
+        self.requests.append(dict(headers or {}))
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=b"<rss/>", request=httpx.Request("GET", url))
+
+def test_recorded_history_replays_by_period_and_start(tmp_path):
+    recorder = RecordingMarketSource(StubMarket([make_history("2025-01-01", 300), make_history("2026-02-09", 5, base=900.0)]), RecordingStore(str(tmp_path)))
+    recorder.history("AAPL", period="1y")
+    recorder.history("AAPL", start="2026-02-09")  # delta download is merged into the recording
+    recorder.fundamentals("AAPL")
+
+    replay = ReplayMarketSource(RecordingStore(str(tmp_path)))
+    full = replay.history("AAPL", period="1y")
+    assert full.index[-1] == pd.Timestamp("2026-02-13")
+    assert full.index[-1] - full.index[0] < pd.Timedelta(days=366)
+    assert list(replay.history("AAPL", start="2026-02-12")["Close"]) == [903.0, 904.0]
+    assert replay.download(["AAPL", "MSFT"], period="1y")["MSFT"].empty
+    assert replay.fundamentals("AAPL") == {"sector": "Technology", "pe_ratio": 31.5}
+    with pytest.raises(LookupError):
+        replay.fundamentals("MSFT")
+
+def test_replayed_feed_honours_etag_and_injected_errors(tmp_path):
+    stub = StubNews()
+    recorder = RecordingNewsSource(stub, RecordingStore(str(tmp_path)))
+
+    async def run():
+        # Nothing recorded yet: conditional headers are dropped so a full body is saved
+        await recorder.get(URL, headers={"If-None-Match": '"v0"', "User-Agent": "x"})
+        replay = ReplayNewsSource(RecordingStore(str(tmp_path)))
+        first = await replay.get(URL)
+        second = await replay.get(URL, headers={"If-None-Match": first.headers["ETag"]})
+        missing = await replay.get("https://news.example.com/other")
+        failing = await ReplayNewsSource(RecordingStore(str(tmp_path)), FaultInjector(error_rate=1.0)).get(URL)
+        return first, second, missing, failing
+
+    first, second, missing, failing = asyncio.run(run())
+    assert stub.requests == [{"User-Agent": "x"}]
+    assert (first.status_code, first.content) == (200, b"<rss/>")
+    assert [second.status_code, missing.status_code, failing.status_code] == [304, 404, 503]
+
+def test_fault_injection_is_deterministic():
+    draws = [FaultInjector(latency=0.01, jitter=0.02, error_rate=0.3, seed=7).draw() for _ in range(2)]
+    assert draws[0] == draws[1] and 0.01 <= draws[0][0] <= 0.03
+    with pytest.raises(InjectedFault):
+        ReplayMarketSource(RecordingStore("/nonexistent"), FaultInjector(error_rate=1.0)).history("AAPL")
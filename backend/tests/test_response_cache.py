@@ -0,0 +1,82 @@
+import json
+import numpy as np
+import pandas as pd
+import time
+from models.schemas import SentimentAnalysis
+from scoring.engine import build_analysis
+from services import response_cache
+from services import cache as cache_module
+from services.cache import POLICIES, cache_key, store
+
+def _analysis(price_format):
+    dates = pd.date_range("2024-01-01", periods=120, freq="B", name="Date")
+    close = pd.Series(np.linspace(100, 130, 120) + np.sin(np.arange(120)), index=dates)
+    history = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6}, index=dates)
+    sentiment = SentimentAnalysis(score_normalized=50.0, raw_vader=0.0, headline_count=0, top_headlines=[])
+    return history, build_analysis("TEST", history, {}, sentiment, [], "req-1", price_format)
+
+def test_price_history_formats_match_rows():
+    history, rows = _analysis("rows")
+    _, columnar = _analysis("columnar")
+
+    expected = [(d.strftime("%Y-%m-%d"), round(c, 2)) for d, c in history["Close"].tail(90).items()]
+    assert [(p.date, p.price) for p in rows.price_history] == expected
+    assert rows.price_history_columnar is None
+    assert columnar.price_history == []
+    assert list(zip(columnar.price_history_columnar.dates, columnar.price_history_columnar.prices)) == expected
+
+def _store_sources(history, fundamentals_ttl=None):
+    store("history", history, "TEST")
+    store("news", _analysis("rows")[1].sentiment_analysis, "TEST")
+    store("fundamentals", {}, "TEST")
+    if fundamentals_ttl is not None:
+        policy = POLICIES["fundamentals"]
+        cache_module.market_cache.set(cache_key("fundamentals", "TEST"), {}, fundamentals_ttl + policy.stale_ttl + policy.stale_if_error)
+
+def test_rendered_response_is_cached_with_fresh_request_id():
+    history, result = _analysis("rows")
+    body = response_cache.render(result)
+    assert json.loads(body) == json.loads(result.model_dump_json())
+
+    _store_sources(history)
+    assert response_cache.store_rendered("TEST", "rows", result, body)
+    cached = json.loads(response_cache.get_rendered("TEST", "rows", "req-2"))
+    assert cached["request_id"] == "req-2"
+    assert cached["price_history"] == json.loads(body)["price_history"]
+    assert response_cache.get_rendered("TEST", "columnar", "req-3") is None
+
+    # Client-supplied ids can be any word that also appears as a key or value
+    for request_id in ("ticker", "request_id", "TEST", "rows"):
+        result = result.model_copy(update={"request_id": request_id})
+        body = response_cache.render(result)
+        assert response_cache.store_rendered("TEST", "rows", result, body)
+        assert response_cache.get_rendered("TEST", "rows", request_id) == body
+        replayed = json.loads(response_cache.get_rendered("TEST", "rows", "req-4"))
+        assert replayed == {**json.loads(body), "request_id": "req-4"}
+
+def test_cached_response_follows_its_source_data():
+    history, result = _analysis("rows")
+    body = response_cache.render(result)
+
+    # Expires with the first source entry to go stale
+    _store_sources(history, fundamentals_ttl=30)
+    assert response_cache.store_rendered("TEST", "rows", result, body)
+    expires_at, _ = response_cache._responses.get_entry(cache_key("response", "TEST", "rows", 1))
+    assert expires_at - time.time() <= 30
+
+    # A newer version of any source drops it
+    store("news", result.sentiment_analysis, "TEST")
+    assert response_cache.get_rendered("TEST", "rows", "req-2") is None
+
+    # Data rewritten while the response was being built: not cached
+    version = response_cache.data_version("TEST")
+    store("history", history, "TEST")
+    assert not response_cache.store_rendered("TEST", "rows", result, body, version=version)
+
+    # Built from stale data, or degraded: not cached
+    _store_sources(history, fundamentals_ttl=-1)
+    assert not response_cache.store_rendered("TEST", "rows", result, body)
+    _store_sources(history)
+    degraded = result.model_copy(update={"data_quality": result.data_quality.model_copy(update={"degraded_stages": ["news"]})})
+    assert not response_cache.store_rendered("TEST", "rows", degraded, response_cache.render(degraded))
+    assert response_cache.get_rendered("TEST", "rows", "req-3") is None
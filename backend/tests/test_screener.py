@@ -0,0 +1,62 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from models.price_history import PriceHistory
+from scoring import screener
+from scoring.screener import ScreenIndex, load_universe
+
+def make_history(n: int, drift: float) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(np.full(n, drift) + 0.01 * np.sin(np.arange(n))))
+    return pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": 1e6},
+        index=pd.date_range("2024-01-01", periods=n, freq="B", name="Date"),
+    )
+
+def test_load_universe(tmp_path):
+    path = tmp_path / "universe.csv"
+    path.write_text("# comment\naapl,Information Technology\n\nXOM # no sector\n")
+    assert load_universe(str(path)) == {"AAPL": "Information Technology", "XOM": None}
+
+def test_index_filters_ranks_and_skips_unchanged():
+    index = ScreenIndex({"UPA": "Tech", "UPB": "Tech", "DOWN": "Energy"})
+    histories = {"UPA": make_history(120, 0.004), "UPB": make_history(120, 0.002), "DOWN": make_history(120, -0.004)}
+    for ticker, history in histories.items():
+        assert index.update(ticker, history)
+    assert not index.update("UPA", histories["UPA"]) # same last bar: nothing to do
+
+    everything = index.query()
+    scores = [entry.final_score for entry in everything.results]
+    assert scores == sorted(scores, reverse=True) and everything.matched == 3
+
+    tech = index.query(sectors=["tech"], limit=1)
+    assert tech.matched == 2 and len(tech.results) == 1 and tech.results[0].sector == "Tech"
+
+    down = index.query(signals=[index.entries["DOWN"].signal], rsi_max=index.entries["DOWN"].rsi)
+    assert "DOWN" in [entry.ticker for entry in down.results]
+    assert index.query(rsi_min=101).matched == 0
+
+def test_only_the_lock_holder_downloads(tmp_path, monkeypatch):
+    histories = {"UPA": PriceHistory.from_frame(make_history(120, 0.004)), "DOWN": PriceHistory.from_frame(make_history(120, -0.004))}
+    downloads = []
+
+    def download(tickers):
+        downloads.append(list(tickers))
+        return {t: histories[t] for t in tickers}
+
+    monkeypatch.setattr(screener, "get_price_histories", download)
+    monkeypatch.setattr(screener, "cached_price_histories", lambda tickers: {"UPA": histories["UPA"]})
+    universe = {"UPA": "Tech", "DOWN": "Energy"}
+    leader, follower = ScreenIndex(universe, state_dir=str(tmp_path)), ScreenIndex(universe, state_dir=str(tmp_path))
+    try:
+        asyncio.run(leader.refresh())
+        asyncio.run(follower.refresh())
+        assert downloads == [["UPA", "DOWN"]]
+        assert set(leader.entries) == {"UPA", "DOWN"} and set(follower.entries) == {"UPA"}
+        assert leader.stats()["leader"] and not follower.stats()["leader"]
+        assert follower.entries["UPA"] == leader.entries["UPA"]
+
+        asyncio.run(leader.stop()) # the lock passes to the next process that refreshes
+        asyncio.run(follower.refresh())
+        assert follower.stats()["leader"] and len(downloads) == 2
+    finally:
+        asyncio.run(follower.stop())
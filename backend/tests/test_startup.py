@@ -0,0 +1,34 @@
+import asyncio
+import json
+from api import routes
+from services import startup
+from services.cache import market_cache, cache_stats
+
+def fresh_state(monkeypatch):
+    for name, value in (("_phases", []), ("_preloaded", False), ("_warmed", False), ("_ready", False), ("_ready_after", None)):
+        monkeypatch.setattr(startup, name, value)
+    monkeypatch.setattr(startup, "STARTUP_WARMUP", True)
+
+def test_warm_up_is_a_dry_run(monkeypatch):
+    fresh_state(monkeypatch)
+    before = cache_stats()["l1"]["size"]
+    startup.preload()
+    startup.warm_up()
+    startup.warm_up() # once per process
+
+    assert [name for name, _, _ in startup._phases] == ["preload", "warmup"]
+    assert market_cache.get("indicators:WARMUP") is None
+    assert cache_stats()["l1"]["size"] == before
+
+def test_ready_only_between_warm_up_and_shutdown(monkeypatch):
+    fresh_state(monkeypatch)
+    assert routes.readiness().status_code == 503
+
+    asyncio.run(startup.become_ready())
+    response = routes.readiness()
+    body = json.loads(response.body)
+    assert response.status_code == 200 and body["ready"]
+    assert set(body["phases"]) == {"preload", "warmup"} and not body["preloaded_in_master"]
+
+    startup.draining()
+    assert routes.readiness().status_code == 503
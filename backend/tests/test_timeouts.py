@@ -0,0 +1,75 @@
+import asyncio
+import time
+import httpx
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from api import routes
+from scoring import engine
+
+def make_history(n: int = 120) -> pd.DataFrame:
+    close = np.linspace(100, 130, n)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6},
+        index=pd.date_range("2024-01-01", periods=n, freq="B", name="Date"),
+    )
+
+def slow_sources(monkeypatch, price=0.0, news=0.0, fundamentals=0.0):
+    """Replaces the three fetches with ones that take the given number of seconds."""
+    history = make_history()
+
+    async def get_price(ticker):
+        await asyncio.sleep(price)
+        return history
+
+    async def get_news(ticker):
+        await asyncio.sleep(news)
+        return engine._neutral_sentiment().model_copy(update={"headline_count": 3, "score_normalized": 80.0})
+
+    async def get_fundamentals(ticker):
+        await asyncio.sleep(fundamentals)
+        return {"sector": "Technology"}
+
+    monkeypatch.setattr(engine, "get_price_history", get_price)
+    monkeypatch.setattr(engine, "get_news_sentiment", get_news)
+    monkeypatch.setattr(engine, "get_fundamentals", get_fundamentals)
+
+def test_news_timeout_degrades_to_neutral(monkeypatch):
+    slow_sources(monkeypatch, news=5.0)
+    monkeypatch.setattr(engine, "NEWS_FETCH_TIMEOUT", 0.05)
+    start = time.perf_counter()
+    result = asyncio.run(engine.analyze_ticker("SLOWN"))
+
+    assert time.perf_counter() - start < 1.0
+    assert result.sentiment_analysis.score_normalized == 50.0 and result.sentiment_analysis.headline_count == 0
+    assert result.data_quality.timed_out_stages == ["news"]
+    assert result.fundamentals.sector == "Technology"
+
+def test_fundamentals_past_grace_are_left_out(monkeypatch):
+    slow_sources(monkeypatch, fundamentals=5.0)
+    monkeypatch.setattr(engine, "FUNDAMENTALS_GRACE", 0.05)
+
+    async def collect():
+        stages = []
+        task = engine._start_fundamentals("SLOWF", True)
+        return await engine._collect_fundamentals("SLOWF", task, stages, []), stages, task
+
+    fundamentals, stages, task = asyncio.run(collect())
+    assert fundamentals == {} and stages == ["fundamentals"]
+    assert task.cancelled()
+
+def test_price_timeout_is_a_504(monkeypatch):
+    slow_sources(monkeypatch, price=5.0)
+    monkeypatch.setattr(engine, "PRICE_FETCH_TIMEOUT", 0.05)
+    app = FastAPI()
+    app.include_router(routes.router)
+
+    async def post():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/analyze", json={"ticker": "SLOWP"})
+
+    start = time.perf_counter()
+    response = asyncio.run(post())
+    assert time.perf_counter() - start < 1.0
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Upstream price data timed out"
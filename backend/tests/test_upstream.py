@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from services.upstream import UpstreamGuard, UpstreamUnavailable, CLOSED, OPEN, HALF_OPEN, OK, ERROR, THROTTLED, classify_exception, classify_status
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_guard(clock, **kwargs):
+    options = dict(rate=10, burst=2, max_concurrency=4, min_rate=1, failure_threshold=3, cooldown=30, acquire_timeout=0.2)
+    options.update(kwargs)
+    return UpstreamGuard("test", clock=clock, **options)
+
+def test_token_bucket_and_concurrency_cap():
+    clock = Clock()
+    guard = make_guard(clock)
+    assert guard._try_acquire() == 0 and guard._try_acquire() == 0
+    assert guard._try_acquire() == pytest.approx(0.1)  # bucket empty: one token per 100ms
+    clock.now += 0.1
+    assert guard._try_acquire() == 0
+
+    guard = UpstreamGuard("test", rate=10, burst=10, max_concurrency=2, acquire_timeout=0.2)
+    guard.acquire()
+    guard.acquire()
+    with pytest.raises(UpstreamUnavailable):
+        guard.acquire()  # both slots busy past the acquire timeout
+    guard.release(OK)
+    guard.acquire()
+
+def test_aimd_halves_on_throttling_and_recovers_additively():
+    clock = Clock()
+    guard = make_guard(clock, burst=100, failure_threshold=100)
+    for _ in range(3):
+        guard.acquire()
+    guard.release(THROTTLED, retry_after=5)
+    guard.release(THROTTLED)  # same congestion event: no second decrease
+    assert (guard.rate, guard.limit) == (5, 2)
+    assert guard._try_acquire() == pytest.approx(5)  # Retry-After pauses the host
+
+    clock.now += 5
+    for _ in range(50):
+        guard.acquire()
+        guard.release(OK)
+    assert guard.rate == pytest.approx(10) and guard.limit == 4
+    guard.release(OK)
+
+def test_breaker_opens_fails_fast_and_closes_after_probe():
+    clock = Clock()
+    guard = make_guard(clock, burst=100)
+    for _ in range(3):
+        guard.acquire()
+        guard.release(ERROR)
+    assert guard.state == OPEN
+    with pytest.raises(UpstreamUnavailable):
+        guard.acquire()
+
+    clock.now += 30
+    guard.acquire()  # the probe
+    assert guard.state == HALF_OPEN
+    with pytest.raises(UpstreamUnavailable):
+        guard.acquire()  # only one probe at a time
+    guard.release(ERROR)
+    assert guard.state == OPEN
+
+    clock.now += 30
+    async def probe():
+        async with guard.slot_async() as slot:
+            slot.record_status(200)
+    asyncio.run(probe())
+    assert guard.state == CLOSED and guard.stats()["opened"] == 2
+
+def test_exception_classification():
+    assert classify_exception(Exception("HTTP Error 429: Too Many Requests")) == THROTTLED
+    assert classify_exception(ConnectionResetError()) == ERROR
+    assert classify_exception(Exception("HTTP Error 404: Not Found")) == OK
+    assert classify_exception(asyncio.CancelledError()) == "cancelled"
+
+def test_refusals_back_off_instead_of_counting_as_success():
+    assert [classify_status(code) for code in (200, 304, 404, 410)] == [OK] * 4
+    assert [classify_status(code) for code in (403, 429)] == [THROTTLED] * 2
+    assert classify_status(400) == ERROR and classify_status(503) == ERROR
+    assert classify_status(400, retry_after=True) == THROTTLED
+    assert classify_exception(Exception("HTTP Error 403: Forbidden")) == THROTTLED
+
+    clock = Clock()
+    guard = make_guard(clock, burst=100)
+    for _ in range(3):
+        with guard.slot() as slot:
+            slot.record_status(403)
+        clock.now += 1
+    assert guard.rate < 10 and guard.state == OPEN
+
+    guard = make_guard(clock, burst=100)
+    with guard.slot() as slot:
+        slot.record_status(400, retry_after="7")
+    assert guard.rate == 5 and guard.stats()["paused_for"] == 7
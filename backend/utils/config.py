@@ -0,0 +1,195 @@
+import os
+import tempfile
+
+# Runtime settings, overridable through environment variables so the same
+# build can be tuned per deployment (gunicorn workers, Render, local dev).
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+# Thread pool used for blocking yfinance calls (history, stock.info)
+YF_EXECUTOR_WORKERS = _env_int("TP_YF_EXECUTOR_WORKERS", 8)
+
+# Per-stage timeouts (seconds) for analyze_ticker
+PRICE_FETCH_TIMEOUT = _env_float("TP_PRICE_FETCH_TIMEOUT", 15.0)
+FUNDAMENTALS_FETCH_TIMEOUT = _env_float("TP_FUNDAMENTALS_FETCH_TIMEOUT", 8.0)
+NEWS_FETCH_TIMEOUT = _env_float("TP_NEWS_FETCH_TIMEOUT", 8.0)
+# How long a response waits for fundamentals once prices and news are ready
+FUNDAMENTALS_GRACE = _env_float("TP_FUNDAMENTALS_GRACE", 0.25)
+
+# Batch (watchlist) analysis
+BATCH_MAX_TICKERS = _env_int("TP_BATCH_MAX_TICKERS", 200)
+BATCH_NEWS_CONCURRENCY = _env_int("TP_BATCH_NEWS_CONCURRENCY", 10)
+BATCH_PRICE_FETCH_TIMEOUT = _env_float("TP_BATCH_PRICE_FETCH_TIMEOUT", 60.0)
+
+# Market data cache: "sqlite" = per-process memory L1 in front of a SQLite file
+# shared by all workers on the host, "memory" = per-process only
+CACHE_BACKEND = os.getenv("TP_CACHE_BACKEND", "sqlite").lower()
+# The per-process L1 is bounded by (approximate) bytes, not entries: a year of
+# compact price history is ~7 KB, a news sentiment entry a few KB
+CACHE_L1_MAX_BYTES = _env_int("TP_CACHE_L1_MAX_BYTES", 64 * 1024 * 1024)
+CACHE_SQLITE_PATH = os.getenv("TP_CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "tradepulse-cache.sqlite3"))
+CACHE_SQLITE_MAX_ENTRIES = _env_int("TP_CACHE_SQLITE_MAX_ENTRIES", 5000)
+
+# Cache TTLs (seconds) per data type
+PRICE_CACHE_TTL = _env_float("TP_PRICE_CACHE_TTL", 900)
+# Fundamentals (market cap, P/E, sector) barely move intraday: cached for a day
+FUNDAMENTALS_CACHE_TTL = _env_float("TP_FUNDAMENTALS_CACHE_TTL", 86400)
+NEWS_CACHE_TTL = _env_float("TP_NEWS_CACHE_TTL", 900)
+# Incremental indicator state, kept next to the history it was built from
+INDICATOR_STATE_TTL = _env_float("TP_INDICATOR_STATE_TTL", 86400)
+
+# Stale-while-revalidate window (seconds past TTL an entry may still be served
+# while one background refresh runs; 0 disables) and single-flight coalescing
+PRICE_STALE_TTL = _env_float("TP_PRICE_STALE_TTL", 300)
+FUNDAMENTALS_STALE_TTL = _env_float("TP_FUNDAMENTALS_STALE_TTL", 43200)
+NEWS_STALE_TTL = _env_float("TP_NEWS_STALE_TTL", 600)
+# Stale-if-error: once past the stale window an entry is still kept this long
+# and served when the refetch fails (e.g. the upstream's circuit is open)
+PRICE_STALE_IF_ERROR_TTL = _env_float("TP_PRICE_STALE_IF_ERROR_TTL", 6 * 3600)
+FUNDAMENTALS_STALE_IF_ERROR_TTL = _env_float("TP_FUNDAMENTALS_STALE_IF_ERROR_TTL", 86400)
+NEWS_STALE_IF_ERROR_TTL = _env_float("TP_NEWS_STALE_IF_ERROR_TTL", 6 * 3600)
+PRICE_COALESCE = _env_bool("TP_PRICE_COALESCE", True)
+FUNDAMENTALS_COALESCE = _env_bool("TP_FUNDAMENTALS_COALESCE", True)
+NEWS_COALESCE = _env_bool("TP_NEWS_COALESCE", True)
+
+# Local on-disk OHLCV store (per-ticker memory-mapped NumPy files). Cache misses
+# only fetch bars after the last stored date. The file grows to OHLCV_MAX_BARS and
+# is then trimmed back to OHLCV_RETAIN_BARS.
+OHLCV_STORE_ENABLED = _env_bool("TP_OHLCV_STORE", True)
+OHLCV_STORE_DIR = os.getenv("TP_OHLCV_STORE_DIR", os.path.join(tempfile.gettempdir(), "tradepulse-ohlcv"))
+OHLCV_MAX_BARS = _env_int("TP_OHLCV_MAX_BARS", 756)
+OHLCV_RETAIN_BARS = _env_int("TP_OHLCV_RETAIN_BARS", 252)
+OHLCV_DELTA_OVERLAP_DAYS = _env_int("TP_OHLCV_DELTA_OVERLAP_DAYS", 7)
+# Bars the analysis sees (indicators, scoring, screener), whatever the store
+# currently holds; keep OHLCV_RETAIN_BARS at least this large.
+ANALYSIS_BARS = _env_int("TP_ANALYSIS_BARS", 252)
+
+# Shared outbound HTTP client (news sources)
+HTTP_TIMEOUT = _env_float("TP_HTTP_TIMEOUT", 5.0)
+HTTP_MAX_CONNECTIONS = _env_int("TP_HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE = _env_int("TP_HTTP_MAX_KEEPALIVE", 20)
+HTTP_KEEPALIVE_EXPIRY = _env_float("TP_HTTP_KEEPALIVE_EXPIRY", 30.0)
+
+# Outbound limits per upstream host (services/upstream.py): a token bucket of
+# UPSTREAM_RATE requests/s (burst UPSTREAM_BURST) and at most
+# UPSTREAM_MAX_CONCURRENCY calls in flight, both halved on 403 / 429 / 5xx / errors
+# and grown back additively. Calls that can't be admitted within
+# UPSTREAM_ACQUIRE_TIMEOUT fail. BREAKER_FAILURE_THRESHOLD consecutive failures
+# open the host's circuit for BREAKER_COOLDOWN seconds.
+UPSTREAM_RATE = _env_float("TP_UPSTREAM_RATE", 10.0)
+UPSTREAM_MIN_RATE = _env_float("TP_UPSTREAM_MIN_RATE", 0.5)
+UPSTREAM_BURST = _env_int("TP_UPSTREAM_BURST", 20)
+UPSTREAM_MAX_CONCURRENCY = _env_int("TP_UPSTREAM_MAX_CONCURRENCY", 8)
+UPSTREAM_ACQUIRE_TIMEOUT = _env_float("TP_UPSTREAM_ACQUIRE_TIMEOUT", 5.0)
+BREAKER_FAILURE_THRESHOLD = _env_int("TP_BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_COOLDOWN = _env_float("TP_BREAKER_COOLDOWN", 30.0)
+
+# Hedged news fetch: start Google RSS once Yahoo has taken this long (seconds)
+# and use whichever returns headlines first. Disabled = strict Yahoo -> Google fallback
+NEWS_HEDGE_ENABLED = _env_bool("TP_NEWS_HEDGE_ENABLED", True)
+NEWS_HEDGE_DELAY = _env_float("TP_NEWS_HEDGE_DELAY", 1.0)
+
+# Per-headline VADER score cache, and optional process pool for scoring batches
+# of uncached headlines (0 = score inline)
+HEADLINE_CACHE_SIZE = _env_int("TP_HEADLINE_CACHE_SIZE", 20000)
+SENTIMENT_PROCESS_WORKERS = _env_int("TP_SENTIMENT_PROCESS_WORKERS", 0)
+SENTIMENT_PROCESS_MIN_BATCH = _env_int("TP_SENTIMENT_PROCESS_MIN_BATCH", 20)
+
+# News feeds. URL templates are overridable so benchmarks/tests can point them
+# at local servers. Feed state (ETag/Last-Modified, last items, seen headline
+# scores) is kept in the market cache for FEED_STATE_TTL.
+YAHOO_NEWS_URL = os.getenv("TP_YAHOO_NEWS_URL", "https://finance.yahoo.com/quote/{ticker}/news")
+GOOGLE_NEWS_RSS_URL = os.getenv(
+    "TP_GOOGLE_NEWS_RSS_URL",
+    "https://news.google.com/rss/search?q={ticker}+stock+when:7d&hl=en-US&gl=US&ceid=US:en",
+)
+FEED_STATE_TTL = _env_float("TP_FEED_STATE_TTL", 7 * 86400)
+FEED_SEEN_MAX = _env_int("TP_FEED_SEEN_MAX", 200)
+
+# Upstream data sources (sources/datasource.py): "live", "record" (live, saving
+# every response under DATA_RECORD_DIR) or "replay" (saved responses only, no
+# network). Replay adds REPLAY_LATENCY seconds (+ up to REPLAY_JITTER) per call
+# and fails REPLAY_ERROR_RATE of calls, drawn from a seeded generator.
+DATA_SOURCE_MODE = os.getenv("TP_DATA_SOURCE_MODE", "live").lower()
+DATA_RECORD_DIR = os.getenv("TP_DATA_RECORD_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "recordings"))
+REPLAY_LATENCY = _env_float("TP_REPLAY_LATENCY", 0.0)
+REPLAY_JITTER = _env_float("TP_REPLAY_JITTER", 0.0)
+REPLAY_ERROR_RATE = _env_float("TP_REPLAY_ERROR_RATE", 0.0)
+REPLAY_SEED = _env_int("TP_REPLAY_SEED", 0)
+
+# Rendered /analyze response bytes, per process. RESPONSE_CACHE_TTL is only an
+# upper bound: each entry also expires when the first history / news /
+# fundamentals entry it was built from stops being fresh, and is dropped when
+# any of them is rewritten (services/response_cache.py).
+RESPONSE_CACHE_TTL = _env_float("TP_RESPONSE_CACHE_TTL", min(PRICE_CACHE_TTL, FUNDAMENTALS_CACHE_TTL, NEWS_CACHE_TTL))
+RESPONSE_CACHE_MAXSIZE = _env_int("TP_RESPONSE_CACHE_MAXSIZE", 512)
+
+# Live score streaming (GET /stream): one shared refresh loop per subscribed ticker
+LIVE_REFRESH_INTERVAL = _env_float("TP_LIVE_REFRESH_INTERVAL", 15)
+LIVE_MAX_TICKERS = _env_int("TP_LIVE_MAX_TICKERS", 50)
+LIVE_HEARTBEAT_INTERVAL = _env_float("TP_LIVE_HEARTBEAT_INTERVAL", 15)
+
+# Background prefetch: tickers are ranked by an exponentially decayed request
+# count (half-life in seconds). Every PREFETCH_INTERVAL the hottest
+# PREFETCH_TOP_K get any cache entry that goes stale within PREFETCH_LEAD
+# refreshed, spending at most PREFETCH_FETCH_BUDGET upstream fetches per minute
+# per host: only the worker holding the leader lock in PREFETCH_STATE_DIR
+# refreshes, ranking the popularity every worker publishes there.
+# PREFETCH_WARM_TICKERS (comma separated) are fetched at startup.
+PREFETCH_ENABLED = _env_bool("TP_PREFETCH_ENABLED", True)
+PREFETCH_INTERVAL = _env_float("TP_PREFETCH_INTERVAL", 30)
+PREFETCH_LEAD = _env_float("TP_PREFETCH_LEAD", 90)
+PREFETCH_TOP_K = _env_int("TP_PREFETCH_TOP_K", 50)
+PREFETCH_MIN_SCORE = _env_float("TP_PREFETCH_MIN_SCORE", 2.0)
+PREFETCH_HALF_LIFE = _env_float("TP_PREFETCH_HALF_LIFE", 3600)
+PREFETCH_MAX_TRACKED = _env_int("TP_PREFETCH_MAX_TRACKED", 2000)
+PREFETCH_FETCH_BUDGET = _env_float("TP_PREFETCH_FETCH_BUDGET", 60)
+PREFETCH_CONCURRENCY = _env_int("TP_PREFETCH_CONCURRENCY", 4)
+PREFETCH_FETCH_TIMEOUT = _env_float("TP_PREFETCH_FETCH_TIMEOUT", 30)
+PREFETCH_STATE_DIR = os.getenv("TP_PREFETCH_STATE_DIR", os.path.join(tempfile.gettempdir(), "tradepulse-prefetch"))
+PREFETCH_WARM_TICKERS = [t.strip().upper() for t in os.getenv("TP_PREFETCH_WARM_TICKERS", "").split(",") if t.strip()]
+
+# Backtest (python -m scoring.backtest): forward-return horizons in bars, leading
+# bars skipped while the indicators warm up, and process pool size (0 = inline)
+BACKTEST_HORIZONS = tuple(int(h) for h in os.getenv("TP_BACKTEST_HORIZONS", "1,5,20").split(","))
+BACKTEST_WARMUP_BARS = _env_int("TP_BACKTEST_WARMUP_BARS", 50)
+BACKTEST_WORKERS = _env_int("TP_BACKTEST_WORKERS", 0)
+
+# Screener (GET /screen): tickers to rank, one per line as TICKER or
+# TICKER,Sector ('#' comments), and how often the background job refreshes the
+# in-memory score index from the price cache/store
+SCREEN_ENABLED = _env_bool("TP_SCREEN_ENABLED", True)
+SCREEN_UNIVERSE_FILE = os.getenv("TP_SCREEN_UNIVERSE_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "universe.csv"))
+SCREEN_REFRESH_INTERVAL = _env_float("TP_SCREEN_REFRESH_INTERVAL", 300)
+SCREEN_DEFAULT_LIMIT = _env_int("TP_SCREEN_DEFAULT_LIMIT", 20)
+
+# Cross-sectional analytics (POST /cross-section): weekdays of daily returns kept
+# per ticker in the aligned return matrix, default benchmark and beta window,
+# and the minimum overlapping returns for a correlation or beta to be reported
+CROSS_SECTION_DAYS = _env_int("TP_CROSS_SECTION_DAYS", 260)
+CROSS_SECTION_BENCHMARK = os.getenv("TP_CROSS_SECTION_BENCHMARK", "SPY").upper()
+CROSS_SECTION_BETA_WINDOW = _env_int("TP_CROSS_SECTION_BETA_WINDOW", 60)
+CROSS_SECTION_MIN_OVERLAP = _env_int("TP_CROSS_SECTION_MIN_OVERLAP", 20)
+CROSS_SECTION_MAX_TICKERS = _env_int("TP_CROSS_SECTION_MAX_TICKERS", 500)
+
+# Startup (services/startup.py): under gunicorn, load the app, heavy modules and
+# the VADER lexicon in the master so workers fork with them already in memory;
+# warm-up runs a dry pass of scoring on synthetic data before /ready turns 200
+STARTUP_PRELOAD = _env_bool("TP_STARTUP_PRELOAD", True)
+STARTUP_WARMUP = _env_bool("TP_STARTUP_WARMUP", True)
@@ -1,7 +1,13 @@
+import asyncio
 import logging
 import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
 import time
+from typing import Dict, Optional
+
+from utils.metrics import STAGE_DURATION
 
 # Configure structured logging
 logging.basicConfig(
@@ -10,37 +16,86 @@ logging.basicConfig(
 )
 logger = logging.getLogger("TradePulse")
 
-def get_request_id():
-    # Context var could be used here for thread safety in bigger apps, 
-    # but for now passing it explicitly is fine.
+SYSTEM_REQUEST_ID = "SYSTEM"
+
+# Per-request context. Context variables follow the request through awaits,
+# tasks it spawns and run_blocking threads, so concurrent requests never see
+# each other's ids or timings.
+_request_id: ContextVar[str] = ContextVar("request_id", default=SYSTEM_REQUEST_ID)
+_stage_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+def new_request_id() -> str:
     return str(uuid.uuid4())
 
-class RequestContext:
-    _request_id = "SYSTEM"
+def get_request_id():
+    # The id of the request being handled, or a fresh one outside a request
+    request_id = _request_id.get()
+    return request_id if request_id != SYSTEM_REQUEST_ID else new_request_id()
 
+class RequestContext:
     @classmethod
     def set_id(cls, rid):
-        cls._request_id = rid
-    
+        return _request_id.set(rid)
+
     @classmethod
     def get_id(cls):
-        return cls._request_id
+        return _request_id.get()
 
-# Log filter to inject request ID
+    @classmethod
+    def begin(cls, rid: str):
+        """Starts a request: sets its id and an empty stage timing table."""
+        return _request_id.set(rid), _stage_timings.set({})
+
+    @classmethod
+    def end(cls, tokens):
+        id_token, timings_token = tokens
+        _stage_timings.reset(timings_token)
+        _request_id.reset(id_token)
+
+    @classmethod
+    def stage_timings(cls) -> Dict[str, float]:
+        return dict(_stage_timings.get() or {})
+
+# Log filter to inject request ID. Installed on the handlers, not just the
+# "TradePulse" logger, so records from child loggers get it too.
 class RequestIdFilter(logging.Filter):
     def filter(self, record):
         record.request_id = RequestContext.get_id()
         return True
 
 logger.addFilter(RequestIdFilter())
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(RequestIdFilter())
+
+@contextmanager
+def span(stage: str):
+    """
+    Times a processing stage: feeds the stage latency histogram and adds the
+    duration to the current request's timings (Server-Timing header).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_DURATION.labels(stage).observe(duration)
+        timings = _stage_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + duration
+
+def time_execution(stage: str):
+    """Decorator form of `span` for sync and async functions."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
 
-def time_execution(func):
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        start = time.time()
-        try:
-            return await func(*args, **kwargs)
-        finally:
-            duration = time.time() - start
-            logger.info(f"Function {func.__name__} took {duration:.4f}s")
-    return wrapper
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,186 @@
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Minimal Prometheus instrumentation (text exposition format 0.0.4), so the
+# service needs no client library. Metrics live per process: with several
+# gunicorn workers each scrape sees the worker that answered it.
+#
+# Counter / Gauge / Histogram take label values positionally via `labels()`.
+# Values that other modules already track (cache stats etc.) are exported
+# through `register_collector` callbacks evaluated at scrape time.
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class _Child:
+    def __init__(self, metric: "_ValueMetric", key: LabelValues):
+        self._metric, self._key = metric, key
+
+    def inc(self, amount: float = 1.0):
+        self._metric._add(self._key, amount)
+
+    def dec(self, amount: float = 1.0):
+        self._metric._add(self._key, -amount)
+
+    def set(self, value: float):
+        with self._metric._lock:
+            self._metric._values[self._key] = value
+
+class _ValueMetric(_Metric):
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def labels(self, *values: str) -> _Child:
+        return _Child(self, tuple(str(v) for v in values))
+
+    def _add(self, key: LabelValues, amount: float):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def inc(self, amount: float = 1.0):
+        self._add((), amount)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+class Counter(_ValueMetric):
+    kind = "counter"
+
+class Gauge(_ValueMetric):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self._add((), -amount)
+
+    def set(self, value: float):
+        with self._lock:
+            self._values[()] = value
+
+class _HistogramChild:
+    def __init__(self, metric: "Histogram", key: LabelValues):
+        self._metric, self._key = metric, key
+
+    def observe(self, value: float):
+        self._metric._observe(self._key, value)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def labels(self, *values: str) -> _HistogramChild:
+        return _HistogramChild(self, tuple(str(v) for v in values))
+
+    def observe(self, value: float):
+        self._observe((), value)
+
+    def _observe(self, key: LabelValues, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            snapshot = sorted((key, list(counts), total[0]) for key, (counts, total) in self._series.items())
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+# A collector returns (name, kind, documentation, labelnames, [(label values, value)])
+Sample = Tuple[str, str, str, Sequence[str], Iterable[Tuple[Sequence[str], float]]]
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, labelnames, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for values, value in samples:
+                    if value is not None:
+                        lines.append(f"{name}{_labels(labelnames, values)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# -- application metrics --------------------------------------------------------
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "tradepulse_http_request_duration_seconds", "HTTP request latency until the response starts.",
+    ("method", "route", "status"),
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "tradepulse_http_requests_in_flight", "HTTP requests currently being handled.",
+))
+STAGE_DURATION = registry.register(Histogram(
+    "tradepulse_stage_duration_seconds", "Time spent per processing stage (see utils/logging_utils.span).",
+    ("stage",),
+))
+UPSTREAM_REQUESTS = registry.register(Counter(
+    "tradepulse_upstream_requests_total", "Calls to external data sources by outcome.",
+    ("source", "outcome"),
+))